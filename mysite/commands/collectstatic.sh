@@ -0,0 +1,2 @@
+# Copia los archivos estáticos a STATIC_ROOT, con el hash del contenido en el nombre y sus versiones .gz
+python manage.py collectstatic --noinput
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""mysite URL Configuration for ASGI
+
+The same URLs as mysite/urls.py, with the asynchronous views of sandwichesweb (see sandwichesweb/async_urls.py).
+sandwichesweb.middleware.ASGIUrlconfMiddleware selects this module for ASGI requests (SANDWICHESWEB_ASGI_URLCONF).
+"""
+from django.urls import path, include
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('sandwichesweb/', include('sandwichesweb.async_urls')),
+] + [pattern for pattern in sync_urlpatterns if str(pattern.pattern) != 'sandwichesweb/']
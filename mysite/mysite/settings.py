@@ -45,8 +45,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para que el tiempo medido incluya a los demás middleware.
+    'sandwichesweb.middleware.TimingMiddleware',
+    'sandwichesweb.middleware.ASGIUrlconfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'sandwichesweb.cart.middleware.CartMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -71,6 +75,8 @@ TEMPLATES = [
         },
     },
 ]
+# Sin 'loaders' y con DEBUG = False, Django ya usa el cargador de plantillas con caché: cada plantilla se lee y se
+# compila una sola vez por proceso.
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
@@ -86,6 +92,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Carritos de compras de CacheCart. MAX_ENTRIES limita la cantidad de carritos guardados.
+    'carts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'carts',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Fragmentos de las plantillas ({% cache %}). Sus claves incluyen la versión del catálogo que muestran.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template_fragments',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -123,3 +153,34 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+if not DEBUG:
+    # collectstatic agrega el hash del contenido a los nombres y genera las versiones .gz (ver commands/collectstatic.sh).
+    # Los archivos en STATIC_ROOT pueden servirse con "Cache-Control: public, max-age=31536000, immutable".
+    STATICFILES_STORAGE = 'sandwichesweb.storage.CompressedManifestStaticFilesStorage'
+
+# Fotos de los productos (ImageField con upload_to='uploads/') y sus versiones reducidas, en una carpeta propia,
+# fuera del código, la configuración y la base de datos.
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+
+# SandwichesWeb
+
+# Almacenamiento del carrito de compras: SessionCart, CookieCart o CacheCart.
+SANDWICHESWEB_CART_STORAGE = 'sandwichesweb.cart.session.SessionCart'
+SANDWICHESWEB_CART_TTL = 60 * 60
+SANDWICHESWEB_CART_MAX_LINES = 50
+
+# Hilos para las consultas de las vistas asíncronas (ASGI).
+SANDWICHESWEB_ASYNC_ORM_WORKERS = 4
+# Rutas de las peticiones ASGI: las de mysite.urls, con las vistas asíncronas.
+SANDWICHESWEB_ASGI_URLCONF = 'mysite.asgi_urls'
+
+# Hilos que generan las versiones reducidas de las fotos de los productos.
+SANDWICHESWEB_IMAGE_WORKERS = 2
+
+# Las compras se guardan a través de un único hilo escritor, agrupando las simultáneas en una sola transacción.
+# None: solo con SQLite en un archivo (ver sandwichesweb/checkout.py).
+SANDWICHESWEB_CHECKOUT_WRITER = None
@@ -14,10 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
+    path('sandwichesweb/api/', include('sandwichesweb.api.urls')),
     path('sandwichesweb/', include('sandwichesweb.urls')),
     path('admin/', admin.site.urls),
 ]
+
+# Solo con DEBUG: en producción el servidor web sirve MEDIA_ROOT en MEDIA_URL.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,20 +1,215 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
 
 from .models import *
 
-admin.site.register(Addition)
-admin.site.register(Bill)
-# admin.site.register(Client)
-admin.site.register(Combo)
-admin.site.register(Detail)
-admin.site.register(Drink)
-admin.site.register(Ingredient)
-admin.site.register(Order)
-admin.site.register(ProductsInCombo)
-admin.site.register(PromApplication)
-admin.site.register(Promotion)
-admin.site.register(Purchase)
-admin.site.register(QuantityOfProducts)
-admin.site.register(Sandwich)
-admin.site.register(ScheduleProm)
-admin.site.register(SideDish)
+# Por debajo de este número de filas se cuentan exactamente: contar una tabla pequeña es barato.
+ESTIMATE_THRESHOLD = 100000
+
+
+def estimated_count(model) -> int:
+	"""Estima el número de filas de una tabla sin recorrerla.
+
+	Con PostgreSQL usa las estadísticas de la tabla. Con los demás motores usa la distancia entre el menor y el mayor
+	id, que se leen de los extremos del índice de la clave primaria. El archivo (ver ``archive.py``) elimina las filas
+	más antiguas, así que el menor id avanza con él; solo sobrestima por las filas eliminadas entre medio.
+
+	:rtype: int
+	"""
+	if connection.vendor == 'postgresql':
+		with connection.cursor() as cursor:
+			cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+			row = cursor.fetchone()
+		return int(row[0]) if row else 0
+
+	# Una consulta por extremo: SQLite solo lee el extremo del índice si la consulta tiene un único MIN o MAX.
+	manager = model._default_manager
+	last = manager.aggregate(last=Max('pk'))['last']
+	if last is None:
+		return 0
+	return last - manager.aggregate(first=Min('pk'))['first'] + 1
+
+
+class EstimatedCountPaginator(Paginator):
+	"""Paginador que, para listas sin filtros de tablas grandes, usa un número estimado de filas en lugar de
+	``COUNT(*)``.
+	"""
+	@cached_property
+	def count(self):
+		queryset = self.object_list
+		if not queryset.query.where:
+			estimate = estimated_count(queryset.model)
+			if estimate >= ESTIMATE_THRESHOLD:
+				return estimate
+
+		return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+	"""Administración de las tablas que crecen con cada compra.
+
+	Cuenta las filas de forma estimada, no muestra el total de la tabla al filtrar y ordena por la clave primaria.
+	Las subclases buscan solo por columnas indexadas y usan campos de id (``raw_id_fields``) en lugar de listas
+	desplegables que cargarían tablas completas.
+	"""
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+	ordering = ('-id',)
+	list_per_page = 50
+
+
+class CatalogAdmin(admin.ModelAdmin):
+	list_filter = ('is_activated',)
+	list_editable = ('is_activated',)
+
+
+# Catálogo
+@admin.register(Sandwich)
+class SandwichAdmin(CatalogAdmin):
+	list_display = ('id', 'size', 'price', 'is_activated')
+	search_fields = ('size',)
+
+
+@admin.register(Drink)
+class DrinkAdmin(CatalogAdmin):
+	list_display = ('id', 'name', 'drink_type', 'price', 'is_activated')
+	list_filter = ('is_activated', 'drink_type')
+	search_fields = ('name',)
+
+
+@admin.register(SideDish)
+class SideDishAdmin(CatalogAdmin):
+	list_display = ('id', 'name', 'price', 'is_activated')
+	search_fields = ('name',)
+
+
+@admin.register(Combo)
+class ComboAdmin(CatalogAdmin):
+	list_display = ('id', 'name', 'price', 'is_activated')
+	search_fields = ('name',)
+
+
+@admin.register(Ingredient)
+class IngredientAdmin(CatalogAdmin):
+	list_display = ('id', 'name', 'price', 'is_activated')
+	search_fields = ('name',)
+
+
+@admin.register(ProductsInCombo)
+class ProductsInComboAdmin(CatalogAdmin):
+	list_display = ('id', 'combo', 'sandwich', 'drink', 'side_dish', 'is_activated')
+	list_select_related = ('combo', 'sandwich', 'drink', 'side_dish')
+	list_filter = ('is_activated', 'combo')
+	raw_id_fields = ('combo', 'sandwich', 'drink', 'side_dish')
+
+
+@admin.register(ComboSummary)
+class ComboSummaryAdmin(admin.ModelAdmin):
+	list_display = ('combo', 'parts_total', 'savings')
+	list_select_related = ('combo',)
+	readonly_fields = ('combo', 'components', 'parts_total', 'savings')
+
+
+# Ofertas
+@admin.register(ScheduleProm)
+class SchedulePromAdmin(CatalogAdmin):
+	list_display = ('id', 'start_hour', 'end_hour', 'is_activated')
+
+
+@admin.register(Promotion)
+class PromotionAdmin(CatalogAdmin):
+	list_display = ('id', 'name', 'discount', 'start_date', 'end_date', 'is_activated')
+	list_select_related = ('schedule',)
+	search_fields = ('name',)
+	raw_id_fields = ('schedule',)
+
+
+@admin.register(PromApplication)
+class PromApplicationAdmin(LargeTableAdmin):
+	list_display = ('id', 'promotion', 'order_id')
+	list_select_related = ('promotion',)
+	list_filter = ('promotion',)
+	search_fields = ('=order__id',)
+	raw_id_fields = ('order', 'promotion')
+
+
+# Compras
+@admin.register(Purchase)
+class PurchaseAdmin(LargeTableAdmin):
+	list_display = ('id', 'date', 'reference')
+	search_fields = ('=id', '=reference')
+
+
+@admin.register(Order)
+class OrderAdmin(LargeTableAdmin):
+	list_display = ('id', 'day', 'number', 'purchase_id', 'sub_total')
+	list_filter = ('day',)
+	search_fields = ('=purchase__id',)
+	raw_id_fields = ('purchase', 'drink', 'side_dish', 'combo')
+
+
+@admin.register(Addition)
+class AdditionAdmin(LargeTableAdmin):
+	list_display = ('id', 'order_id', 'sandwich', 'ingredient')
+	list_select_related = ('ingredient', 'sandwich')
+	search_fields = ('=order__id',)
+	raw_id_fields = ('order', 'sandwich', 'ingredient')
+
+
+@admin.register(Bill)
+class BillAdmin(LargeTableAdmin):
+	list_display = ('id', 'date', 'ci_client', 'first_name_client', 'surname_client', 'total')
+	list_filter = ('date',)
+	search_fields = ('=ci_client', '=id')
+	raw_id_fields = ('purchase',)
+
+
+@admin.register(Detail)
+class DetailAdmin(LargeTableAdmin):
+	list_display = ('id', 'bill_id', 'product', 'name', 'size', 'price')
+	search_fields = ('=bill__id',)
+	raw_id_fields = ('bill',)
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(LargeTableAdmin):
+	list_display = ('bill_id',)
+	search_fields = ('=bill__id',)
+	raw_id_fields = ('bill',)
+	ordering = ('-bill_id',)
+
+
+@admin.register(QuantityOfProducts)
+class QuantityOfProductsAdmin(LargeTableAdmin):
+	list_display = ('id', 'bill_id', 'product', 'quantity')
+	search_fields = ('=bill__id',)
+	raw_id_fields = ('bill',)
+
+
+@admin.register(ArchivedPurchase)
+class ArchivedPurchaseAdmin(LargeTableAdmin):
+	list_display = ('id', 'date', 'bill_id', 'ci_client', 'total')
+	search_fields = ('=id', '=bill_id', '=ci_client', '=reference')
+	readonly_fields = ('id', 'date', 'reference', 'bill_id', 'ci_client', 'total', 'document', 'invoice')
+
+
+# Ventas acumuladas y números de pedido
+@admin.register(HourlySales)
+class HourlySalesAdmin(LargeTableAdmin):
+	list_display = ('period', 'product', 'name', 'quantity', 'total')
+	ordering = ('-period',)
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(LargeTableAdmin):
+	list_display = ('day', 'product', 'name', 'quantity', 'total')
+	ordering = ('-day',)
+
+
+@admin.register(OrderNumberSequence)
+class OrderNumberSequenceAdmin(admin.ModelAdmin):
+	list_display = ('day', 'last_number')
+	ordering = ('-day',)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import hmac
+
+from rest_framework.permissions import BasePermission
+
+from ..conf import get_setting
+
+
+class IsKiosk(BasePermission):
+	"""Solo los quioscos configurados en ``KIOSK_TOKENS``, identificados con el encabezado
+	``Authorization: Token <token>``. Asigna el nombre del quiosco a ``request.kiosk``.
+	"""
+	message = "Se requiere el token de un quiosco."
+	keyword = 'Token'
+
+	def has_permission(self, request, view):
+		keyword, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+		if keyword != self.keyword or not token:
+			return False
+
+		for kiosk, kiosk_token in get_setting('KIOSK_TOKENS').items():
+			if hmac.compare_digest(token.encode(), str(kiosk_token).encode()):
+				request.kiosk = kiosk
+				return True
+
+		return False
@@ -1,11 +1,182 @@
-from abc import ABC
-
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
 from rest_framework import serializers
 
+from ..conf import get_setting
 from ..models import *
+from ..prices import COMBO, DRINK, INGREDIENT, SANDWICH, SIDE_DISH, get_price_index
+from ..pricing import get_pricing_rules
+
+# Ingrediente base de todo sándwich, igual que en el flujo HTML (ver views.selecting_sandwich).
+BASE_INGREDIENT = 'Queso'
+
+
+# Catálogo
+class SandwichSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = Sandwich
+		fields = ['id', 'size', 'price', 'photo']
+
+
+class DrinkSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = Drink
+		fields = ['id', 'name', 'drink_type', 'price', 'photo']
+
+
+class SideDishSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = SideDish
+		fields = ['id', 'name', 'price', 'photo']
+
+
+class ComboSerializer(serializers.ModelSerializer):
+	# Del resumen del combo (ComboSummary), cargado junto con el combo.
+	components = serializers.JSONField(source='summary.components', read_only=True)
+	parts_total = serializers.DecimalField(source='summary.parts_total', max_digits=9, decimal_places=2, read_only=True)
+	savings = serializers.DecimalField(source='summary.savings', max_digits=9, decimal_places=2, read_only=True)
 
+	class Meta:
+		model = Combo
+		fields = ['id', 'name', 'price', 'photo', 'components', 'parts_total', 'savings']
 
-class SelectionProductsSerializer(serializers.Serializer, ABC):
+
+class IngredientSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = Ingredient
+		fields = ['id', 'name', 'price']
+
+
+class PromotionSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = Promotion
+		fields = ['id', 'name', 'description', 'discount', 'start_date', 'end_date']
+
+
+# Carrito
+class CartLineSerializer(serializers.Serializer):
+	"""Un pedido a agregar al carrito. Valida el producto contra el índice de precios y calcula su sub total, sin
+	ofertas (se aplican al pagar, ver ``pricing.py``).
+	"""
+	product_type = serializers.ChoiceField(choices=[SANDWICH, DRINK, SIDE_DISH, COMBO])
 	product_id = serializers.IntegerField()
-	product_type = serializers.CharField(max_length=20)
-	decision = serializers.IntegerField()
+	ingredients = serializers.ListField(  # Solo para sándwiches. Por defecto, el ingrediente base.
+		child=serializers.IntegerField(),
+		required=False,
+		max_length=20
+	)
+
+	def validate(self, attrs):
+		prices = get_price_index()
+		product = prices.get(attrs['product_type'], attrs['product_id'])
+		if product is None:
+			raise serializers.ValidationError({'product_id': "El producto no está disponible."})
+
+		if attrs['product_type'] != SANDWICH:
+			if attrs.get('ingredients'):
+				raise serializers.ValidationError({'ingredients': "Solo los sándwiches llevan ingredientes."})
+			line = {attrs['product_type'] + '_id': product.id}
+		else:
+			if attrs.get('ingredients'):
+				ingredients = [prices.get(INGREDIENT, pk) for pk in attrs['ingredients']]
+			else:
+				ingredients = [prices.get_by_name(INGREDIENT, BASE_INGREDIENT)]
+			if None in ingredients:
+				raise serializers.ValidationError({'ingredients': "Algún ingrediente no está disponible."})
+			line = {
+				'additions': [{'ingredient_id': ingredient.id, 'sandwich_id': product.id} for ingredient in ingredients],
+			}
+
+		line['sub_total'] = get_pricing_rules().base_price(line)
+		return line
+
+
+class CartLinesSerializer(serializers.Serializer):
+	lines = CartLineSerializer(many=True, allow_empty=False)
+
+
+class CartSerializer(serializers.Serializer):
+	"""Contenido del carrito (``BaseCart.lines``).
+	"""
+	lines = serializers.ListField(child=serializers.DictField())
+	total = serializers.DecimalField(max_digits=9, decimal_places=2)
+
+
+# Compra
+class ClientSerializer(serializers.Serializer):
+	"""Datos del cliente para la factura. Con ``lines`` se agregan esos pedidos al carrito antes de pagar, así la
+	compra completa se hace en una sola petición.
+	"""
+	ci = serializers.IntegerField(min_value=0)
+	first_name = serializers.CharField(max_length=30)
+	middle_name = serializers.CharField(max_length=30, required=False, allow_blank=True, default='')
+	surname = serializers.CharField(max_length=30)
+	second_surname = serializers.CharField(max_length=30, required=False, allow_blank=True, default='')
+	lines = CartLineSerializer(many=True, required=False)
+
+	def to_bill(self) -> Bill:
+		data = self.validated_data
+		return Bill(
+			ci_client=data['ci'],
+			first_name_client=data['first_name'].upper(),
+			middle_name_client=data['middle_name'].upper(),
+			surname_client=data['surname'].upper(),
+			second_surname_client=data['second_surname'].upper(),
+		)
+
+
+class BillSerializer(serializers.ModelSerializer):
+	orders = serializers.SerializerMethodField()
+
+	class Meta:
+		model = Bill
+		fields = ['id', 'date', 'total', 'ci_client', 'orders']
+
+	def get_orders(self, bill) -> list:
+		return [order.number for order in self.context.get('orders', [])]
+
+
+# Sincronización de los quioscos
+class SyncLineSerializer(CartLineSerializer):
+	"""Un pedido de una compra hecha sin conexión, con el sub total que cobró el quiosco. Se conserva en
+	``kiosk_sub_total``, aparte del sub total de la línea del carrito (sin ofertas).
+	"""
+	sub_total = serializers.DecimalField(max_digits=9, decimal_places=2, min_value=0)
+
+	def validate(self, attrs):
+		line = super().validate(attrs)
+		line['kiosk_sub_total'] = attrs['sub_total']
+		return line
+
+
+class SyncPurchaseSerializer(ClientSerializer):
+	"""Una compra hecha sin conexión: los datos del cliente, sus pedidos, la referencia que le asignó el quiosco, y
+	la fecha y el total de la compra en el quiosco.
+	"""
+	reference = serializers.CharField(max_length=40)
+	date = serializers.DateTimeField()
+	total = serializers.DecimalField(max_digits=9, decimal_places=2, min_value=0)
+	lines = SyncLineSerializer(many=True, allow_empty=False)
+
+	def validate(self, attrs):
+		if attrs['total'] != sum(line['kiosk_sub_total'] for line in attrs['lines']):
+			raise serializers.ValidationError({'total': "El total no es la suma de los sub totales de los pedidos."})
+		return attrs
+
+	def to_bill(self) -> Bill:
+		bill = super().to_bill()
+		bill.date = self.validated_data['date']
+		return bill
+
+
+class SyncSerializer(serializers.Serializer):
+	"""Lote de compras a sincronizar. Cada compra se valida por separado (ver ``api.views.SyncView``).
+	"""
+	purchases = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+	def validate_purchases(self, value):
+		if len(value) > get_setting('SYNC_MAX_PURCHASES'):
+			raise serializers.ValidationError(
+				"Se admiten hasta %d compras por petición." % get_setting('SYNC_MAX_PURCHASES')
+			)
+		return value
@@ -0,0 +1,18 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'api'
+urlpatterns = [
+	path('sandwiches/', views.SandwichListView.as_view(), name='sandwiches'),
+	path('drinks/', views.DrinkListView.as_view(), name='drinks'),
+	path('side-dishes/', views.SideDishListView.as_view(), name='side_dishes'),
+	path('combos/', views.ComboListView.as_view(), name='combos'),
+	path('ingredients/', views.IngredientListView.as_view(), name='ingredients'),
+	path('promotions/', views.PromotionListView.as_view(), name='promotions'),
+	path('cart/', views.CartView.as_view(), name='cart'),
+	path('cart/lines/', views.CartLinesView.as_view(), name='cart_lines'),
+	path('checkout/', views.CheckoutView.as_view(), name='checkout'),
+	path('sync/', views.SyncView.as_view(), name='sync'),
+]
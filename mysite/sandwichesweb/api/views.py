@@ -1,22 +1,287 @@
-from django.http import Http404
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""API REST del catálogo, del carrito y de la compra.
 
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
+Las listas del catálogo responden con ``ETag`` y ``Last-Modified`` calculados a partir de las versiones de sus datos
+(ver ``versioning.py``), sin consultar la base de datos, y responden 304 si el cliente ya tiene la versión vigente.
+Los pedidos se agregan al carrito de a varios por petición, y la compra puede incluir los pedidos, así un quiosco
+o una aplicación móvil completa la compra en una sola petición. Los quioscos sincronizan las compras hechas sin
+conexión por lotes, con ``SyncView``.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
 
-from rest_framework import mixins
-from rest_framework import generics
+from django.db import IntegrityError
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import generics, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from ..cart import CartFull, lines_to_models
+from ..checkout import CheckoutTimeout, checkout, checkout_many
 from ..models import *
+from ..promotions import applicable_promotions, promotions_key
+from ..versioning import get_version
+from .permissions import IsKiosk
 from .serializers import *
-from ..views import *
 
 
-class SelectionProductsSerializer(APIView):
-	def get(self, request, product_id, product_type, decision):
-		selection(product_id)
-		
-		if decision == 2:
-			return
+class CatalogPagination(CursorPagination):
+	ordering = 'pk'
+	page_size = 50
+	max_page_size = 200
+	page_size_query_param = 'page_size'
+
+
+def _etag(request, *versions) -> str:
+	# La dirección completa incluye el cursor de la página.
+	path = hashlib.md5(request.get_full_path().encode()).hexdigest()[:8]
+	return '"%s-%s"' % ('-'.join(str(version) for version in versions), path)
+
+
+def versioned_condition(*names):
+	"""Decorador que agrega ``ETag`` y ``Last-Modified`` según las versiones de los conjuntos de datos ``names``.
+	"""
+	def etag(request, *args, **kwargs):
+		return _etag(request, *[get_version(name) for name in names])
+
+	def last_modified(request, *args, **kwargs):
+		milliseconds = max(get_version(name) for name in names)
+		return datetime.fromtimestamp(milliseconds / 1000, tz=dt_timezone.utc)
+
+	return method_decorator(condition(etag_func=etag, last_modified_func=last_modified), name='dispatch')
+
+
+class CatalogListView(generics.ListAPIView):
+	pagination_class = CatalogPagination
+	model = None
+
+	def get_queryset(self):
+		return self.model.active.all()
+
+
+@versioned_condition('menu', 'prices')
+class SandwichListView(CatalogListView):
+	model = Sandwich
+	serializer_class = SandwichSerializer
+
+
+@versioned_condition('menu', 'prices')
+class DrinkListView(CatalogListView):
+	model = Drink
+	serializer_class = DrinkSerializer
+
+
+@versioned_condition('menu', 'prices')
+class SideDishListView(CatalogListView):
+	model = SideDish
+	serializer_class = SideDishSerializer
+
+
+@versioned_condition('menu', 'prices')
+class ComboListView(CatalogListView):
+	model = Combo
+	serializer_class = ComboSerializer
+
+	def get_queryset(self):
+		return Combo.active.select_related('summary')
+
+
+@versioned_condition('prices')
+class IngredientListView(CatalogListView):
+	model = Ingredient
+	serializer_class = IngredientSerializer
+
+
+def _promotions_etag(request, *args, **kwargs):
+	# Las ofertas aplicables cambian con la hora, sin que cambie su versión: solo se usa el ETag.
+	key = promotions_key(applicable_promotions())
+	return _etag(request, get_version('promotions'), hashlib.md5(key.encode()).hexdigest()[:8])
+
+
+@method_decorator(condition(etag_func=_promotions_etag), name='dispatch')
+class PromotionListView(CatalogListView):
+	"""Ofertas aplicables en este momento.
+	"""
+	serializer_class = PromotionSerializer
+
+	def get_queryset(self):
+		return Promotion.active.filter(pk__in=[promotion.id for promotion in applicable_promotions()])
+
+
+def cart_response(cart, status_code=status.HTTP_200_OK) -> Response:
+	total = sum((Decimal(line['sub_total']) for line in cart.lines), Decimal(0))
+	return Response(CartSerializer({'lines': cart.lines, 'total': total}).data, status=status_code)
+
+
+class CartView(APIView):
+	"""Consulta (GET) o vacía (DELETE) el carrito.
+	"""
+	def get(self, request):
+		return cart_response(request.cart)
+
+	def delete(self, request):
+		request.cart.clear()
+		return cart_response(request.cart)
+
+
+class CartLinesView(APIView):
+	"""Agrega varios pedidos al carrito en una sola petición: ``{"lines": [{"product_type", "product_id",
+	"ingredients"}, ...]}``. Se agregan todos o ninguno.
+	"""
+	def post(self, request):
+		serializer = CartLinesSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+
+		try:
+			request.cart.add_lines(serializer.validated_data['lines'])
+		except CartFull:
+			return Response({'detail': "El carrito está lleno."}, status=status.HTTP_400_BAD_REQUEST)
+
+		return cart_response(request.cart, status.HTTP_201_CREATED)
+
+
+class CheckoutView(APIView):
+	"""Paga el carrito, con los pedidos de ``lines`` agregados si se indican, y genera la factura.
+
+	Los pedidos de ``lines`` no se guardan en el carrito: si la compra falla, el carrito queda como estaba y el
+	cliente puede reintentarla con la misma petición.
+	"""
+	def post(self, request):
+		serializer = ClientSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+
+		cart = request.cart
+		try:
+			lines = cart.with_lines(serializer.validated_data.get('lines', []))
+		except CartFull:
+			return Response({'detail': "El carrito está lleno."}, status=status.HTTP_400_BAD_REQUEST)
+
+		lines = [line for line in lines if not cart.line_is_empty(line)]
+		if not lines:
+			return Response({'detail': "El carrito está vacío."}, status=status.HTTP_400_BAD_REQUEST)
+
+		bill = serializer.to_bill()
+		orders, additions = lines_to_models(lines, bill.date)
+
+		try:
+			bill = checkout(bill, orders, additions)
+		except CheckoutTimeout:
+			# La compra no se guardó: el cliente puede reintentarla.
+			return Response({'detail': "Intente de nuevo."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+		cart.clear()
+
+		return Response(BillSerializer(bill, context={'orders': orders}).data, status=status.HTTP_201_CREATED)
+
+
+def synced_references(references: list) -> dict:
+	"""Busca cuáles de las referencias de los quioscos ya se sincronizaron.
+
+	:return: la factura de cada referencia ya sincronizada.
+	:rtype: dict
+	"""
+	synced = dict(
+		Bill.objects.filter(purchase__reference__in=references).values_list('purchase__reference', 'id')
+	)
+	missing = [reference for reference in references if reference not in synced]
+	if missing:  # Las compras muy antiguas ya pueden estar archivadas (ver archive.py).
+		synced.update(ArchivedPurchase.objects.filter(reference__in=missing).values_list('reference', 'bill_id'))
+
+	return synced
+
+
+def sync_entry(reference: str, serializer) -> tuple:
+	"""Construye, sin guardarla, una compra sincronizada, con la fecha y los sub totales que registró el quiosco.
+
+	Las ofertas se buscan en el momento de la compra. Si el quiosco cobró otro sub total, se conserva el suyo, sin
+	oferta registrada.
+
+	:return: una tupla (referencia, factura, pedidos, adicionales), como la espera ``checkout_many``.
+	:rtype: tuple
+	"""
+	bill = serializer.to_bill()
+	lines = serializer.validated_data['lines']
+	orders, additions = lines_to_models(lines, moment=bill.date)
+	for order, line in zip(orders, lines):
+		if order.sub_total != line['kiosk_sub_total']:
+			order.sub_total = line['kiosk_sub_total']
+			order.promotion_id = None
+
+	return reference, bill, orders, additions
+
+
+class SyncView(APIView):
+	"""Guarda un lote de compras hechas sin conexión por un quiosco: ``{"purchases": [{"reference", "date", "total",
+	"ci", "first_name", "middle_name", "surname", "second_surname", "lines"}, ...]}``. Cada pedido de ``lines`` lleva
+	su ``sub_total``. Solo la usan los quioscos, con su token (ver ``api.permissions.IsKiosk``).
+
+	Las compras válidas se guardan juntas, con inserciones masivas en una sola transacción, con la fecha y los
+	totales del quiosco. Las compras con una referencia ya sincronizada no se vuelven a guardar, así el quiosco puede
+	reenviar el lote sin duplicar compras. Si otro lote guarda a la vez alguna de las mismas referencias, esas
+	compras se informan como duplicadas y se guardan las demás.
+	La respuesta tiene un resultado por compra, en el mismo orden: 'created', 'duplicate' o 'invalid'.
+	"""
+	authentication_classes = []
+	permission_classes = [IsKiosk]
+
+	def post(self, request):
+		batch = SyncSerializer(data=request.data)
+		batch.is_valid(raise_exception=True)
+
+		results = []
+		valid = {}
+		for data in batch.validated_data['purchases']:
+			serializer = SyncPurchaseSerializer(data=data)
+			if not serializer.is_valid():
+				results.append({'reference': data.get('reference'), 'status': 'invalid', 'errors': serializer.errors})
+				continue
+
+			reference = serializer.validated_data['reference']
+			results.append({'reference': reference})
+			if reference not in valid:
+				valid[reference] = serializer
+
+		synced = synced_references(list(valid))
+		while True:
+			entries = [
+				sync_entry(reference, serializer)
+				for reference, serializer in valid.items()
+				if reference not in synced
+			]
+			try:
+				bills = checkout_many(entries)
+			except CheckoutTimeout:
+				# Ninguna compra del lote se guardó: el quiosco puede reenviarlo.
+				return Response({'detail': "Intente de nuevo."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+			except IntegrityError:
+				# Otro lote guardó a la vez alguna de estas referencias: se descartan y se guardan las demás.
+				concurrent = synced_references([reference for reference, bill, orders, additions in entries])
+				if not concurrent:
+					raise
+				synced.update(concurrent)
+			else:
+				break
+
+		created = {}
+		for (reference, unsaved, orders, additions), bill in zip(entries, bills):
+			created[reference] = {
+				'status': 'created',
+				'bill': bill.id,
+				'total': str(bill.total),
+				'orders': [order.number for order in orders],
+			}
 
+		for result in results:
+			if 'status' in result:
+				continue
+			reference = result['reference']
+			if reference in created:
+				result.update(created.pop(reference))
+				synced[reference] = result['bill']
+			else:
+				result.update(status='duplicate', bill=synced.get(reference))
 
+		return Response({'results': results}, status=status.HTTP_200_OK)
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class SandwichesWebConfig(AppConfig):
     name = 'sandwichesweb'
+
+    def ready(self):
+        from .db import connect_database_hooks
+        from .middleware import install_timing_hooks
+        from .signals import connect_signals
+        connect_database_hooks()
+        install_timing_hooks()
+        connect_signals()
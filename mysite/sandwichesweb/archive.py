@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Archivo de las compras antiguas.
+
+Las compras con más de ``ARCHIVE_AFTER_DAYS`` días se mueven, con sus pedidos, adicionales, ofertas aplicadas,
+factura, detalles, cantidades y documento de factura, a ``ArchivedPurchase``: una fila por compra con un documento
+JSON. Así las tablas de las compras en curso no crecen sin límite y sus índices siguen cabiendo en memoria.
+
+Se archiva por lotes de ``ARCHIVE_BATCH_SIZE`` compras, cada lote en su propia transacción: un lote se copia y se
+borra junto, o no se mueve. Las ventas acumuladas (``rollups.py``) no se tocan, así los reportes no cambian.
+
+Las facturas archivadas se siguen encontrando por su id o por el cliente, con ``find_bill`` y ``client_bills``.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .billing import render_invoice
+from .conf import get_setting
+from .export import bill_document, prefetch_bill_rows
+from .models import *
+
+
+def order_document(order: Order, promotions: list) -> dict:
+	"""Pedido, con sus adicionales y ofertas aplicadas, como diccionario serializable en JSON.
+
+	:rtype: dict
+	"""
+	return {
+		'id': order.id,
+		'day': order.day.isoformat() if order.day else None,
+		'number': order.number,
+		'sub_total': str(order.sub_total),
+		'drink': order.drink_id,
+		'side_dish': order.side_dish_id,
+		'combo': order.combo_id,
+		'additions': [
+			{'sandwich': addition.sandwich_id, 'ingredient': addition.ingredient_id} for addition in order.additions
+		],
+		'promotions': promotions,
+	}
+
+
+def build_archives(purchases: list) -> list:
+	"""Genera, sin guardarlas, las compras archivadas, con cuatro consultas para todas las compras.
+
+	:param purchases: compras a archivar.
+	:return: lista de ``ArchivedPurchase``.
+	:rtype: list
+	"""
+	ids = [purchase.id for purchase in purchases]
+
+	orders = {purchase_id: [] for purchase_id in ids}
+	additions = Addition.objects.order_by('pk')
+	for order in Order.objects.filter(purchase_id__in=ids).prefetch_related(
+		Prefetch('order', queryset=additions, to_attr='additions')
+	).order_by('pk'):
+		orders[order.purchase_id].append(order)
+
+	promotions = {}
+	applications = PromApplication.objects.filter(order__purchase_id__in=ids).order_by('pk')
+	for order_id, promotion_id in applications.values_list('order_id', 'promotion_id'):
+		promotions.setdefault(order_id, []).append(promotion_id)
+
+	bills = list(Bill.objects.filter(purchase_id__in=ids).select_related('invoice'))
+	prefetch_bill_rows(bills)
+	bills = {bill.purchase_id: bill for bill in bills}
+
+	archives = []
+	for purchase in purchases:
+		bill = bills.get(purchase.id)
+		try:
+			invoice = bill.invoice.document if bill else ''
+		except Invoice.DoesNotExist:  # Factura anterior a los documentos de factura.
+			invoice = render_invoice(bill, orders[purchase.id], bill.details, bill.quantities).document
+
+		archives.append(ArchivedPurchase(
+			id=purchase.id,
+			date=purchase.date,
+			reference=purchase.reference,
+			bill_id=bill.id if bill else None,
+			ci_client=bill.ci_client if bill else None,
+			total=bill.total if bill else None,
+			document={
+				'id': purchase.id,
+				'date': timezone.localtime(purchase.date).isoformat(),
+				'reference': purchase.reference,
+				'orders': [order_document(order, promotions.get(order.id, [])) for order in orders[purchase.id]],
+				'bill': bill_document(bill) if bill else None,
+			},
+			invoice=invoice,
+		))
+
+	return archives
+
+
+def archive_batch(before, batch_size: int) -> int:
+	"""Archiva, en una sola transacción, hasta ``batch_size`` de las compras más antiguas anteriores a ``before``.
+
+	:return: el número de compras archivadas.
+	:rtype: int
+	"""
+	with transaction.atomic():
+		purchases = list(Purchase.objects.filter(date__lt=before).order_by('date', 'pk')[:batch_size])
+		if not purchases:
+			return 0
+
+		ArchivedPurchase.objects.bulk_create(build_archives(purchases))
+		# Borra en cascada los pedidos, adicionales, ofertas aplicadas, facturas, detalles, cantidades y documentos.
+		Purchase.objects.filter(pk__in=[purchase.id for purchase in purchases]).delete()
+
+	return len(purchases)
+
+
+def archive_purchases(days: int = None, batch_size: int = None, max_batches: int = None):
+	"""Archiva, por lotes, las compras con más de ``days`` días.
+
+	:param days: antigüedad mínima de las compras. Por defecto, ``ARCHIVE_AFTER_DAYS``.
+	:param batch_size: compras por lote. Por defecto, ``ARCHIVE_BATCH_SIZE``.
+	:param max_batches: máximo de lotes a archivar. Por defecto, todos.
+	:return: genera el número de compras archivadas en cada lote.
+	"""
+	days = get_setting('ARCHIVE_AFTER_DAYS') if days is None else days
+	batch_size = batch_size or get_setting('ARCHIVE_BATCH_SIZE')
+	before = timezone.now() - timedelta(days=days)
+
+	batches = 0
+	while max_batches is None or batches < max_batches:
+		archived = archive_batch(before, batch_size)
+		if not archived:
+			return
+		batches += 1
+		yield archived
+
+
+def find_bill(bill_id: int) -> dict:
+	"""Busca una factura por su id, entre las facturas en curso y las archivadas.
+
+	:return: la factura como diccionario (ver ``export.bill_document``), o None si no existe.
+	:rtype: dict
+	"""
+	bill = Bill.objects.filter(pk=bill_id).first()
+	if bill is not None:
+		prefetch_bill_rows([bill])
+		return bill_document(bill)
+
+	document = ArchivedPurchase.objects.filter(bill_id=bill_id).values_list('document', flat=True).first()
+	return document['bill'] if document else None
+
+
+def store_invoice(bill: Bill) -> str:
+	"""Genera y guarda el documento de una factura en curso que no lo tiene: las facturas anteriores a los documentos
+	de factura lo generan la primera vez que se ven.
+
+	:return: el documento.
+	:rtype: str
+	"""
+	prefetch_bill_rows([bill])
+	orders = list(Order.objects.filter(purchase_id=bill.purchase_id).order_by('pk'))
+	invoice = render_invoice(bill, orders, bill.details, bill.quantities)
+	try:
+		with transaction.atomic():
+			invoice.save(force_insert=True)
+	except IntegrityError:  # Otra petición lo guardó a la vez.
+		pass
+
+	return invoice.document
+
+
+def find_invoice(bill_id: int) -> str:
+	"""Documento de una factura, en curso o archivada, o None si no existe.
+
+	:rtype: str
+	"""
+	document = Invoice.objects.filter(pk=bill_id).values_list('document', flat=True).first()
+	if document is None:
+		bill = Bill.objects.filter(pk=bill_id).first()
+		if bill is not None:
+			return store_invoice(bill)
+		document = ArchivedPurchase.objects.filter(bill_id=bill_id).values_list('invoice', flat=True).first()
+	return document or None
+
+
+def client_bills(ci: int, limit: int = 50) -> list:
+	"""Facturas de un cliente, en curso y archivadas, de la más reciente a la más antigua.
+
+	Cada búsqueda usa el índice por cliente y fecha de su tabla (sw_bill_client_date_idx y
+	sw_archived_client_date_idx).
+
+	:param ci: cédula del cliente.
+	:param limit: máximo de facturas.
+	:rtype: list
+	"""
+	bills = list(Bill.objects.filter(ci_client=ci).order_by('-date')[:limit])
+	prefetch_bill_rows(bills)
+	documents = [bill_document(bill) for bill in bills]
+
+	if len(documents) < limit:
+		archived = ArchivedPurchase.objects.filter(
+			ci_client=ci
+		).order_by('-date').values_list('document', flat=True)[:limit - len(documents)]
+		documents.extend(document['bill'] for document in archived)
+
+	return documents
@@ -0,0 +1,18 @@
+from django.urls import path
+
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns
+
+# Las mismas rutas de urls.py, con las vistas asíncronas donde existen. Se usan con ASGI (ver mysite/asgi_urls.py).
+ASYNC_VIEWS = {
+	'index': async_views.index_view,
+	'order': async_views.order_view,
+	'selection': async_views.selection,
+	'client': async_views.client_view,
+}
+
+urlpatterns = [
+	path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name) if pattern.name in ASYNC_VIEWS
+	else pattern
+	for pattern in sync_urlpatterns
+]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Versiones asíncronas de las vistas del catálogo y del carrito, para servir con ASGI (ver
+``middleware.ASGIUrlconfMiddleware``).
+
+Las ofertas que ya están en caché se leen sin salir del ciclo de eventos. Todo lo que puede tocar la base de datos
+(reconstruir una caché, la sesión del carrito) corre en un grupo de hilos acotado, para que muchas conexiones
+simultáneas no se traduzcan en muchos hilos del sistema operativo. Las vistas retornan un ``TemplateResponse``:
+``middleware.TimingMiddleware`` genera la plantilla, que lee el menú y las versiones del catálogo para sus fragmentos
+en caché, en el mismo grupo de hilos.
+
+Con Django 3.1 esto no basta para atender más peticiones que con WSGI: los middleware síncronos (la sesión, el
+carrito, CSRF, la autenticación) corren con ``sync_to_async(thread_sensitive=True)``, es decir, todos en un mismo
+hilo, uno a la vez. ``bench_servers`` mide la diferencia.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.http import HttpResponseBadRequest, HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+
+from . import views
+from .cart import CartFull
+from .conf import get_setting
+from .menu import get_menu
+from .promotions import get_cached_promotion_index, get_promotion_index, local_moment
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+	global _executor
+
+	if _executor is None:
+		_executor = ThreadPoolExecutor(
+			max_workers=get_setting('ASYNC_ORM_WORKERS'),
+			thread_name_prefix='sandwichesweb-orm',
+		)
+
+	return _executor
+
+
+def _call_blocking(func, args, kwargs):
+	close_old_connections()
+	try:
+		return func(*args, **kwargs)
+	finally:
+		close_old_connections()
+
+
+async def run_blocking(func, *args, **kwargs):
+	"""Ejecuta una función bloqueante (por ejemplo, con consultas del ORM) en el grupo de hilos acotado.
+
+	Si todos los hilos están ocupados, la llamada espera su turno sin bloquear el ciclo de eventos.
+
+	:param func: función a ejecutar.
+	:return: lo que retorne la función.
+	"""
+	loop = asyncio.get_running_loop()
+	call = functools.partial(contextvars.copy_context().run, _call_blocking, func, args, kwargs)
+
+	return await loop.run_in_executor(get_executor(), call)
+
+
+async def index_view(request):
+	template = 'sandwichesweb/index.html'
+	
+	index = get_cached_promotion_index() or await run_blocking(get_promotion_index)
+	
+	context = {
+		'promotions_list': index.at(local_moment()),
+	}
+	
+	# La plantilla se genera fuera del ciclo de eventos (ver middleware.TimingMiddleware): la clave del fragmento de
+	# las ofertas incluye su versión, que puede leerse de la base de datos.
+	return TemplateResponse(request, template, context)
+
+
+async def order_view(request):
+	template = 'sandwichesweb/order.html'
+	
+	# El menú solo se lee si su fragmento de la plantilla no está en la caché, al generarla fuera del ciclo de eventos.
+	menu = SimpleLazyObject(get_menu)
+	
+	# Generando el pedido
+	try:
+		order = await run_blocking(request.cart.new_order)
+	except CartFull:
+		return HttpResponseRedirect(reverse('sandwichesweb:client', args=()))
+	
+	context = {
+		'menu': menu,
+		'order': order,
+	}
+	
+	return TemplateResponse(request, template, context)
+
+
+async def selection(request):
+	product_id = request.POST['product_id']
+	product_type = request.POST['product_type']
+	
+	try:
+		if product_type == 'sandwich':
+			await run_blocking(views.selecting_sandwich, request, product_id)
+	except CartFull:
+		return HttpResponseBadRequest("El carrito está lleno.")
+	
+	return HttpResponseRedirect(reverse('sandwichesweb:client', args=()))
+
+
+async def client_view(request):
+	template = 'sandwichesweb/client.html'
+	
+	return TemplateResponse(request, template, {})
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Utilidades comunes de los comandos de medición de rendimiento (``bench_*``).
+
+Las mediciones corren sobre una base de datos de prueba que se crea y se destruye en cada ejecución, así que nunca
+tocan los datos reales.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import time as day_time
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import *
+
+SANDWICH_SIZES = [('Individual', '5.00'), ('Doble', '8.50'), ('Triple', '11.00')]
+INGREDIENTS = [
+	('Queso', '1.00'), ('Jamón', '1.50'), ('Champiñones', '1.25'), ('Pimentón', '0.75'), ('Doble carne', '3.00'),
+	('Tomate', '0.50'), ('Pepperoni', '1.75'), ('Salami', '1.60'), ('Aceitunas', '0.80'),
+]
+DRINKS = [
+	('Coca-Cola', Drink.ListDrinkType.SODA, '1.50'), ('Pepsi', Drink.ListDrinkType.SODA, '1.50'),
+	('Jugo de naranja', Drink.ListDrinkType.JUICE, '2.00'), ('Jugo de fresa', Drink.ListDrinkType.JUICE, '2.00'),
+	('Café expreso', Drink.ListDrinkType.COFFEE, '1.00'), ('Agua', Drink.ListDrinkType.WATER, '1.00'),
+]
+SIDE_DISHES = [('Papas fritas', '2.50'), ('Aros de cebolla', '3.00')]
+COMBOS = [
+	('Chamito', 'Individual', 'Coca-Cola', 'Papas fritas', '8.00'),
+	('Familiar', 'Triple', 'Pepsi', 'Aros de cebolla', '15.00'),
+]
+
+
+@contextmanager
+def throwaway_database():
+	"""Crea una base de datos de prueba vacía, con todas las migraciones, y la destruye al terminar.
+
+	Con SQLite se usa un archivo temporal en lugar de una base de datos en memoria, que con varios hilos bloquea
+	tablas completas y no se parece al servidor real.
+	"""
+	test_settings = connection.settings_dict['TEST']
+	old_test_name = test_settings.get('NAME')
+	if connection.vendor == 'sqlite' and not old_test_name:
+		test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'sandwichesweb-bench-%d.sqlite3' % os.getpid())
+
+	setup_test_environment()
+	old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+	try:
+		yield
+	finally:
+		connection.creation.destroy_test_db(old_name, verbosity=0)
+		teardown_test_environment()
+		test_settings['NAME'] = old_test_name
+
+
+def seed_catalog() -> dict:
+	"""Crea un catálogo parecido al de la tienda: sándwiches, ingredientes, bebidas, acompañantes, combos y una oferta.
+
+	:return: diccionario con las listas de registros creados, por tipo.
+	:rtype: dict
+	"""
+	sandwiches = {size: Sandwich.objects.create(size=size, price=Decimal(price)) for size, price in SANDWICH_SIZES}
+	ingredients = [Ingredient.objects.create(name=name, price=Decimal(price)) for name, price in INGREDIENTS]
+	drinks = {
+		name: Drink.objects.create(name=name, drink_type=drink_type, price=Decimal(price))
+		for name, drink_type, price in DRINKS
+	}
+	side_dishes = {name: SideDish.objects.create(name=name, price=Decimal(price)) for name, price in SIDE_DISHES}
+
+	combos = []
+	for name, size, drink, side_dish, price in COMBOS:
+		combo = Combo.objects.create(name=name, price=Decimal(price))
+		ProductsInCombo.objects.create(combo=combo, sandwich=sandwiches[size])
+		ProductsInCombo.objects.create(combo=combo, drink=drinks[drink])
+		ProductsInCombo.objects.create(combo=combo, side_dish=side_dishes[side_dish])
+		combos.append(combo)
+
+	schedule = ScheduleProm.objects.create(
+		start_hour=day_time(0, 0), end_hour=day_time(0, 0),
+		monday=True, tuesday=True, wednesday=True, thursday=True, friday=True, saturday=True, sunday=True,
+	)
+	promotion = Promotion.objects.create(
+		name='Almuerzo', description='10% de descuento', discount=Decimal('0.10'), schedule=schedule
+	)
+
+	return {
+		'sandwiches': list(sandwiches.values()),
+		'ingredients': ingredients,
+		'drinks': list(drinks.values()),
+		'side_dishes': list(side_dishes.values()),
+		'combos': combos,
+		'promotions': [promotion],
+	}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+	"""Percentil de una lista ya ordenada, por el método del rango más cercano.
+	"""
+	if not sorted_values:
+		return 0.0
+
+	# El rango es ceil(fraction * n). Se redondea antes para que, por ejemplo, 0.07 * 100 = 7.000000000000001 dé 7.
+	rank = math.ceil(round(fraction * len(sorted_values), 9))
+	return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+	"""Resume las latencias (en segundos) de un conjunto de peticiones.
+
+	:param latencies: latencia de cada petición.
+	:param elapsed: tiempo total de la medición, para calcular las peticiones por segundo.
+	:return: cantidad, peticiones por segundo y latencias p50/p95/p99/máxima en milisegundos.
+	:rtype: dict
+	"""
+	values = sorted(latencies)
+	return {
+		'requests': len(values),
+		'rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+		'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+		'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+		'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+		'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+	}
+
+
+class ThreadSampler:
+	"""Registra la cantidad máxima de hilos vivos mientras está activo.
+
+	Uso: ``with ThreadSampler() as sampler: ...``, y luego ``sampler.peak``.
+	"""
+	def __init__(self, interval: float = 0.005):
+		self.interval = interval
+		self.peak = 0
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, daemon=True)
+
+	def _run(self):
+		while not self._stop.is_set():
+			self.peak = max(self.peak, threading.active_count())
+			time.sleep(self.interval)
+
+	def __enter__(self):
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self._stop.set()
+		self._thread.join()
+
+
+def write_results(path: str, results: dict):
+	"""Guarda los resultados de una medición en un archivo JSON.
+	"""
+	with open(path, 'w', encoding='utf-8') as file:
+		json.dump(results, file, indent=2, ensure_ascii=False, default=str)
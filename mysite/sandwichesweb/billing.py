@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Motor de facturación.
+
+Construye en memoria todos los detalles (``Detail``) y cantidades por tipo de producto (``QuantityOfProducts``)
+de una factura, y los guarda con inserciones masivas dentro de una sola transacción. El número de consultas es
+el mismo sin importar cuántos pedidos tenga la compra.
+
+El documento de la factura (``Invoice``) se genera en ese mismo momento, con los datos ya en memoria, y se guarda
+junto con los detalles: ver o reimprimir la factura solo lee ese documento. El documento es solo el contenido de la
+factura (``INVOICE_TEMPLATE``); la página que lo muestra (``INVOICE_PAGE_TEMPLATE``) se genera al verla, así los
+estilos y sus direcciones pueden cambiar sin cambiar los documentos guardados.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+
+from .models import *
+from .rollups import record_sales
+
+INVOICE_TEMPLATE = 'sandwichesweb/invoice_document.html'
+INVOICE_PAGE_TEMPLATE = 'sandwichesweb/invoice.html'
+
+# Orden en el que se guardan las cantidades por tipo de producto.
+PRODUCTS_ORDER = [
+	Product.ListProducts.SANDWICH,
+	Product.ListProducts.DRINK,
+	Product.ListProducts.SIDE_DISH,
+	Product.ListProducts.COMBO,
+]
+
+
+def orders_of_purchase(purchase_id) -> list:
+	"""Carga los pedidos de una compra, junto con sus productos y adicionales, en dos consultas.
+
+	:param purchase_id: id de la compra.
+	:return: lista de pedidos, con los adicionales precargados en ``order.additions``.
+	:rtype: list
+	"""
+	return orders_of_purchases([purchase_id])
+
+
+def orders_of_purchases(purchase_ids: list) -> list:
+	"""Carga los pedidos de varias compras, junto con sus productos y adicionales, en dos consultas.
+
+	:param purchase_ids: ids de las compras.
+	:return: lista de pedidos ordenados por id, con los adicionales precargados en ``order.additions``.
+	:rtype: list
+	"""
+	additions = Addition.objects.select_related('ingredient', 'sandwich').order_by('pk')
+	orders = Order.objects.filter(
+		purchase_id__in=purchase_ids
+	).select_related(
+		'drink', 'side_dish', 'combo'
+	).prefetch_related(
+		Prefetch('order', queryset=additions, to_attr='additions')
+	).order_by('pk')
+
+	return list(orders)
+
+
+def build_detail(bill: Bill, order: Order) -> Detail:
+	"""Genera, sin guardarlo, el detalle de factura de un pedido.
+
+	:param bill: factura a la que pertenece el detalle.
+	:param order: pedido con sus adicionales precargados.
+	:return: detalle de la factura, o None si el pedido quedó sin producto.
+	:rtype: Detail
+	"""
+	detail = Detail(bill=bill, price=order.sub_total)
+
+	if order.additions:
+		detail.product = Product.ListProducts.SANDWICH.label
+		detail.size = order.additions[0].sandwich.size
+		detail.ingredient_names = [ing.ingredient.name for ing in order.additions]
+	elif order.drink_id:
+		detail.product = Product.ListProducts.DRINK.label
+		detail.name = order.drink.name
+	elif order.side_dish_id:
+		detail.product = Product.ListProducts.SIDE_DISH.label
+		detail.name = order.side_dish.name
+	elif order.combo_id:
+		detail.product = Product.ListProducts.COMBO.label
+		detail.name = order.combo.name
+	else:
+		return None
+
+	return detail
+
+
+def render_invoice(bill: Bill, orders: list, details: list, quantities: list) -> Invoice:
+	"""Genera, sin guardarlo, el documento de la factura.
+
+	:param bill: factura ya guardada.
+	:param orders: pedidos de la compra, para mostrar sus números.
+	:param details: detalles de la factura.
+	:param quantities: cantidades por tipo de producto.
+	:rtype: Invoice
+	"""
+	context = {
+		'bill': bill,
+		'numbers': [order.number for order in orders if order.number is not None],
+		'details': details,
+		'quantities': quantities,
+	}
+	return Invoice(bill=bill, document=render_to_string(INVOICE_TEMPLATE, context))
+
+
+def billing(bill: Bill):
+	"""Genera los detalles y las cantidades de productos de la factura, y suma sus ventas a los acumulados.
+
+	:param bill: factura ya guardada, con su compra asignada.
+	"""
+	billing_many([bill])
+
+
+def billing_many(bills: list):
+	"""Genera los detalles, las cantidades de productos y los documentos de varias facturas, y suma sus ventas a los
+	acumulados.
+
+	El número de consultas es el mismo sin importar cuántas facturas y pedidos haya.
+
+	:param bills: facturas ya guardadas, con su compra asignada.
+	"""
+	orders_by_purchase = {bill.purchase_id: [] for bill in bills}
+	for order in orders_of_purchases(list(orders_by_purchase)):
+		orders_by_purchase[order.purchase_id].append(order)
+
+	all_details = []
+	all_quantities = []
+	invoices = []
+	sales = []
+	for bill in bills:
+		details = [build_detail(bill, order) for order in orders_by_purchase[bill.purchase_id]]
+		details = [detail for detail in details if detail is not None]
+
+		# Cantidad por tipo de producto
+		counter = Counter(detail.product for detail in details)
+		quantities = [
+			QuantityOfProducts(bill=bill, product=product.label, quantity=counter[product.label])
+			for product in PRODUCTS_ORDER
+			if counter[product.label]
+		]
+		all_details.extend(details)
+		all_quantities.extend(quantities)
+		invoices.append(render_invoice(bill, orders_by_purchase[bill.purchase_id], details, quantities))
+		sales.append((bill.date, details))
+
+	with transaction.atomic():
+		Detail.objects.bulk_create(all_details)
+		QuantityOfProducts.objects.bulk_create(all_quantities)
+		Invoice.objects.bulk_create(invoices)
+		record_sales(sales)
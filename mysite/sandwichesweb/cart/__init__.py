@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Carrito de compras por sesión.
+
+El almacenamiento se elige con ``SANDWICHESWEB_CART_STORAGE``:
+
+- ``sandwichesweb.cart.session.SessionCart``: en la sesión (por defecto).
+- ``sandwichesweb.cart.cookie.CookieCart``: en una cookie firmada.
+- ``sandwichesweb.cart.cache.CacheCart``: en la caché local, con la clave de la sesión.
+"""
+from django.utils.module_loading import import_string
+
+from ..conf import get_setting
+from .base import BaseCart, CartFull, lines_to_models
+
+
+def default_storage(request) -> BaseCart:
+	"""Crea el carrito de la petición con el almacenamiento configurado.
+	"""
+	return import_string(get_setting('CART_STORAGE'))(request)
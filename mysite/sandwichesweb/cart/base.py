@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+from decimal import Decimal
+
+from ..conf import get_setting
+from ..models import Addition, Order
+from ..pricing import price_lines
+
+
+class CartFull(Exception):
+	"""El carrito alcanzó el máximo de pedidos que puede guardar.
+	"""
+	pass
+
+
+def lines_to_models(lines: list, moment=None) -> tuple:
+	"""Construye, sin guardarlos, los pedidos y los adicionales de las líneas de un carrito.
+
+	El sub total de cada pedido se vuelve a calcular con las reglas de precios vigentes (ver ``pricing.py``). La
+	oferta aplicada a un pedido queda en ``order.promotion_id``, para registrarla al guardar la compra.
+
+	:param lines: líneas con el formato de ``BaseCart``.
+	:param moment: momento de la compra, para las ofertas. Por defecto, ahora.
+	:return: lista de pedidos (``Order``) y lista de adicionales (``Addition``).
+	:rtype: tuple
+	"""
+	orders = []
+	additions = []
+	for number, (line, priced) in enumerate(zip(lines, price_lines(lines, moment)), start=1):
+		order = Order(
+			number=line.get('number', number),
+			sub_total=priced.sub_total,
+			drink_id=line.get('drink_id'),
+			side_dish_id=line.get('side_dish_id'),
+			combo_id=line.get('combo_id'),
+		)
+		order.promotion_id = priced.promotion_id
+		orders.append(order)
+		for addition in line.get('additions', []):
+			additions.append(Addition(order=order, **addition))
+
+	return orders, additions
+
+
+class BaseCart:
+	"""Carrito de compras de un cliente.
+
+	El carrito se guarda como un diccionario serializable en JSON::
+
+		{
+			'expires': 1612300000.0,
+			'lines': [
+				{
+					'number': 1,
+					'sub_total': '6.00',
+					'drink_id': None,
+					'side_dish_id': None,
+					'combo_id': None,
+					'additions': [{'ingredient_id': 1, 'sandwich_id': 2}],
+				},
+			],
+		}
+
+	Cada línea corresponde a un pedido (``Order``). Las subclases deciden dónde se guarda el diccionario
+	implementando ``_load`` y ``_store``.
+	"""
+	def __init__(self, request):
+		self.request = request
+		self.ttl = get_setting('CART_TTL')
+		self.max_lines = get_setting('CART_MAX_LINES')
+		self.modified = False
+		self._data = None
+
+	# Métodos a implementar por las subclases
+	def _load(self):
+		"""Obtiene el diccionario guardado del carrito, o None si no existe.
+		"""
+		raise NotImplementedError('subclasses of BaseCart must provide a _load() method')
+
+	def _store(self, data, response):
+		"""Guarda el diccionario del carrito. Si ``data`` es None, el carrito debe eliminarse.
+		"""
+		raise NotImplementedError('subclasses of BaseCart must provide a _store() method')
+
+	def _check_size(self, data):
+		"""Verifica que el carrito quepa en el almacenamiento. Lanza ``CartFull`` si no cabe.
+		"""
+		pass
+
+	# Métodos
+	@staticmethod
+	def empty_line(number: int) -> dict:
+		return {
+			'number': number,
+			'sub_total': '0',
+			'drink_id': None,
+			'side_dish_id': None,
+			'combo_id': None,
+			'additions': [],
+		}
+
+	@staticmethod
+	def line_is_empty(line: dict) -> bool:
+		"""Indica si el pedido todavía no tiene ningún producto seleccionado.
+		"""
+		return not (line['additions'] or line['drink_id'] or line['side_dish_id'] or line['combo_id'])
+
+	@property
+	def data(self) -> dict:
+		if self._data is None:
+			data = self._load()
+			if not data or data.get('expires', 0) < time.time():
+				data = {'expires': 0, 'lines': []}
+			self._data = data
+
+		return self._data
+
+	@property
+	def lines(self) -> list:
+		return self.data['lines']
+
+	def __len__(self):
+		return len(self.lines)
+
+	def _touch(self):
+		self.data['expires'] = time.time() + self.ttl
+		self._check_size(self.data)
+		self.modified = True
+
+	def new_order(self, number: int = None) -> dict:
+		"""Inicia un nuevo pedido en el carrito.
+
+		Si el último pedido sigue vacío, se reutiliza, así recargar la página no agrega pedidos.
+
+		:param number: número del pedido en el carrito. Por defecto, su posición. El número para retirarlo se
+			asigna al pagar (ver ``numbering.py``).
+		:return: la línea del pedido.
+		:rtype: dict
+		"""
+		lines = self.lines
+		if lines and self.line_is_empty(lines[-1]):
+			lines[-1]['number'] = number or len(lines)
+		else:
+			if len(lines) >= self.max_lines:
+				raise CartFull()
+			lines.append(self.empty_line(number or len(lines) + 1))
+		self._touch()
+
+		return lines[-1]
+
+	def update_current(self, sub_total: Decimal, **fields) -> dict:
+		"""Asigna el producto seleccionado al pedido actual.
+
+		:param sub_total: sub total del pedido.
+		:param fields: ``drink_id``, ``side_dish_id``, ``combo_id`` o ``additions``.
+		:return: la línea del pedido.
+		:rtype: dict
+		"""
+		if not self.lines:
+			self.new_order()
+
+		line = self.lines[-1]
+		line.update(fields)
+		line['sub_total'] = str(sub_total)
+		self._touch()
+
+		return line
+
+	def with_lines(self, lines: list) -> list:
+		"""Líneas que tendría el carrito con varios pedidos completos agregados, sin modificarlo.
+
+		Un pedido vacío al final del carrito se reemplaza.
+
+		:param lines: campos de cada pedido: ``sub_total`` y ``drink_id``, ``side_dish_id``, ``combo_id`` o
+			``additions``.
+		:return: las líneas del carrito seguidas de las nuevas. Lanza ``CartFull`` si no caben.
+		:rtype: list
+		"""
+		current = self.lines
+		if current and self.line_is_empty(current[-1]):
+			current = current[:-1]
+		if len(current) + len(lines) > self.max_lines:
+			raise CartFull()
+
+		added = []
+		for number, fields in enumerate(lines, start=len(current) + 1):
+			line = self.empty_line(number)
+			line.update(fields)
+			line['sub_total'] = str(line['sub_total'])
+			added.append(line)
+
+		return current + added
+
+	def add_lines(self, lines: list) -> list:
+		"""Agrega varios pedidos completos al carrito, todos o ninguno (ver ``with_lines``).
+
+		:return: las líneas agregadas.
+		:rtype: list
+		"""
+		new_lines = self.with_lines(lines)
+
+		# Se verifica el tamaño antes de modificar el carrito, así si no cabe queda como estaba.
+		data = dict(self.data, lines=new_lines, expires=time.time() + self.ttl)
+		self._check_size(data)
+		self._data = data
+		self.modified = True
+
+		return new_lines[len(new_lines) - len(lines):]
+
+	def clear(self):
+		self._data = {'expires': 0, 'lines': []}
+		self.modified = True
+
+	def to_models(self, moment=None) -> tuple:
+		"""Construye, sin guardarlos, los pedidos y los adicionales del carrito.
+
+		:param moment: momento de la compra, para las ofertas (ver ``lines_to_models``).
+		:return: lista de pedidos (``Order``) y lista de adicionales (``Addition``).
+		:rtype: tuple
+		"""
+		return lines_to_models(self.lines, moment)
+
+	def update(self, response):
+		"""Guarda el carrito si cambió durante la petición.
+		"""
+		if self.modified:
+			self._store(self.data if self.lines else None, response)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.core.cache import caches
+
+from ..conf import get_setting
+from .base import BaseCart
+
+
+class CacheCart(BaseCart):
+	"""Carrito guardado en la caché, con la clave de la sesión del cliente.
+
+	La caché expira el carrito por sí misma, y su opción ``MAX_ENTRIES`` limita la cantidad de carritos
+	guardados (ver el alias ``carts`` en ``CACHES``).
+	"""
+	key_prefix = 'sandwichesweb:cart:'
+
+	def __init__(self, request):
+		super().__init__(request)
+		self.cache = caches[get_setting('CART_CACHE')]
+
+	def _cache_key(self, create=False):
+		session = self.request.session
+		if session.session_key is None:
+			if not create:
+				return None
+			session.save()
+
+		return self.key_prefix + session.session_key
+
+	def _load(self):
+		key = self._cache_key()
+		return self.cache.get(key) if key else None
+
+	def _store(self, data, response):
+		if data:
+			self.cache.set(self._cache_key(create=True), data, self.ttl)
+		else:
+			key = self._cache_key()
+			if key:
+				self.cache.delete(key)
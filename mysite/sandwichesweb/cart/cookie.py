@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.core import signing
+
+from ..conf import get_setting
+from .base import BaseCart, CartFull
+
+
+class CookieCart(BaseCart):
+	"""Carrito guardado en una cookie firmada.
+
+	No guarda nada en el servidor. La firma incluye la fecha, así que una cookie más vieja que el tiempo de
+	vida del carrito se descarta al leerla.
+	"""
+	salt = 'sandwichesweb.cart'
+
+	def __init__(self, request):
+		super().__init__(request)
+		self.cookie_name = get_setting('CART_COOKIE_NAME')
+		self.max_size = get_setting('CART_COOKIE_MAX_SIZE')
+		self._encoded = None
+
+	def _encode(self, data) -> str:
+		return signing.dumps(data, salt=self.salt, compress=True)
+
+	def _load(self):
+		value = self.request.COOKIES.get(self.cookie_name)
+		if not value:
+			return None
+
+		try:
+			return signing.loads(value, salt=self.salt, max_age=self.ttl)
+		except signing.BadSignature:  # Incluye SignatureExpired.
+			return None
+
+	def _check_size(self, data):
+		encoded = self._encode(data)
+		if len(encoded) > self.max_size:
+			raise CartFull()
+		self._encoded = encoded
+
+	def _store(self, data, response):
+		if data:
+			response.set_cookie(
+				self.cookie_name,
+				self._encoded or self._encode(data),
+				max_age=self.ttl,
+				secure=settings.SESSION_COOKIE_SECURE or None,
+				httponly=True,
+				samesite=settings.SESSION_COOKIE_SAMESITE,
+			)
+		elif self.cookie_name in self.request.COOKIES:
+			response.delete_cookie(self.cookie_name, samesite=settings.SESSION_COOKIE_SAMESITE)
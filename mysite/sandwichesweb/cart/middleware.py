@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.utils.deprecation import MiddlewareMixin
+
+from . import default_storage
+
+
+class CartMiddleware(MiddlewareMixin):
+	"""Asigna a cada petición su carrito de compras en ``request.cart`` y lo guarda al responder.
+
+	Debe ubicarse después de ``SessionMiddleware``.
+	"""
+	def process_request(self, request):
+		request.cart = default_storage(request)
+
+	def process_response(self, request, response):
+		# Una capa superior pudo responder sin pasar por process_request.
+		if hasattr(request, 'cart'):
+			request.cart.update(response)
+		return response
@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from .base import BaseCart
+
+
+class SessionCart(BaseCart):
+	"""Carrito guardado en la sesión del cliente.
+
+	Requiere ``django.contrib.sessions.middleware.SessionMiddleware``.
+	"""
+	session_key = '_sandwichesweb_cart'
+
+	def _load(self):
+		return self.request.session.get(self.session_key)
+
+	def _store(self, data, response):
+		if data:
+			self.request.session[self.session_key] = data
+		else:
+			self.request.session.pop(self.session_key, None)
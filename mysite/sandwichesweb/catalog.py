@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Importación y exportación del catálogo completo (sándwiches, bebidas, acompañantes, combos con sus productos e
+ingredientes) en JSON o CSV.
+
+El archivo describe el catálogo completo. Al importarlo se compara con las filas actuales, por nombre (por tamaño,
+en los sándwiches), y solo se aplican los cambios: inserciones, actualizaciones y desactivaciones
+(``is_activated = False``) masivas, todas en una sola transacción. Nunca se borran productos, porque las compras
+los referencian.
+
+Las operaciones masivas no envían señales (ver ``signals.py``): al terminar se recalculan los resúmenes de los
+combos y se cambian las versiones del menú y de los precios.
+
+Formato JSON::
+
+	{
+		"sandwich": [{"size": "Individual", "price": "5.00"}],
+		"drink": [{"name": "Pepsi", "drink_type": "Refresco", "price": "1.00"}],
+		"side_dish": [{"name": "Papas fritas", "price": "2.00"}],
+		"combo": [{"name": "Chamito", "price": "7.00", "products": [{"sandwich": "Individual"}, {"drink": "Pepsi"}]}],
+		"ingredient": [{"name": "Queso", "price": "1.00"}]
+	}
+
+Formato CSV, con las columnas ``kind,name,price,drink_type,combo``: una fila por producto o ingrediente, y una fila
+por producto de cada combo, con el nombre del combo en la columna ``combo`` y sin precio.
+"""
+import csv
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .checkout import assign_pks
+from .combos import COMPONENT_FIELDS, refresh_combos
+from .models import *
+from .prices import COMBO, DRINK, INGREDIENT, SANDWICH, SIDE_DISH, normalize_name
+from .versioning import bump_version
+
+CATALOG_FORMATS = ('json', 'csv')
+CSV_HEADER = ['kind', 'name', 'price', 'drink_type', 'combo']
+
+# Tipo de producto, su modelo, el campo por el que se identifica y los demás campos que se importan.
+CATALOG_MODELS = {
+	SANDWICH: (Sandwich, 'size', ['price']),
+	DRINK: (Drink, 'name', ['drink_type', 'price']),
+	SIDE_DISH: (SideDish, 'name', ['price']),
+	COMBO: (Combo, 'name', ['price']),
+	INGREDIENT: (Ingredient, 'name', ['price']),
+}
+# Tipos de producto que pueden formar parte de un combo: son también los campos de ProductsInCombo.
+COMPONENT_KINDS = [field for field, product, name_field in COMPONENT_FIELDS]
+
+
+class CatalogError(ValueError):
+	"""El archivo del catálogo no es válido.
+	"""
+
+
+def _price(value, kind: str, key: str) -> Decimal:
+	try:
+		price = Decimal(str(value))
+	except (InvalidOperation, TypeError):
+		raise CatalogError("Precio inválido para %s '%s': %r." % (kind, key, value))
+	if price < 0 or not price.is_finite():
+		raise CatalogError("Precio inválido para %s '%s': %r." % (kind, key, value))
+	return price.quantize(Decimal('0.01'))
+
+
+def validate_catalog(catalog: dict) -> dict:
+	"""Valida un catálogo leído de un archivo y normaliza sus valores.
+
+	:raises CatalogError: si falta un campo, un precio no es válido, un nombre se repite o un combo incluye un
+		producto que no está en el catálogo.
+	:rtype: dict
+	"""
+	result = {}
+	for kind, (model, key_field, fields) in CATALOG_MODELS.items():
+		items = []
+		keys = set()
+		for item in catalog.get(kind) or []:
+			key = ' '.join(str(item.get(key_field) or '').split())
+			if not key:
+				raise CatalogError("Falta el campo '%s' en un elemento de '%s'." % (key_field, kind))
+			if normalize_name(key) in keys:
+				raise CatalogError("%s '%s' está repetido." % (kind, key))
+			keys.add(normalize_name(key))
+
+			values = {key_field: key, 'price': _price(item.get('price'), kind, key)}
+			if 'drink_type' in fields:
+				values['drink_type'] = item.get('drink_type') or Drink.ListDrinkType.SODA.value
+				if values['drink_type'] not in Drink.ListDrinkType.values:
+					raise CatalogError("Tipo de bebida inválido para '%s': %r." % (key, values['drink_type']))
+			if kind == COMBO:
+				values['products'] = []
+				for product in item.get('products') or []:
+					if len(product) != 1 or next(iter(product)) not in COMPONENT_KINDS:
+						raise CatalogError("Producto inválido en el combo '%s': %r." % (key, product))
+					values['products'].append(next(iter(product.items())))
+			items.append(values)
+		result[kind] = items
+
+	for combo in result[COMBO]:
+		for kind, key in combo['products']:
+			key_field = CATALOG_MODELS[kind][1]
+			if normalize_name(str(key)) not in {normalize_name(item[key_field]) for item in result[kind]}:
+				raise CatalogError(
+					"El combo '%s' incluye %s '%s', que no está en el catálogo." % (combo['name'], kind, key)
+				)
+
+	return result
+
+
+def _sync_model(model, key_field: str, fields: list, items: list) -> tuple:
+	"""Aplica a un modelo las diferencias con los elementos del catálogo.
+
+	:return: los objetos del catálogo por nombre normalizado, y el resumen de los cambios.
+	:rtype: tuple
+	"""
+	rows = list(model.objects.order_by('-is_activated', 'pk'))
+	existing = {}
+	for row in rows:  # Si un nombre se repite, se usa la fila activa más antigua; las demás se desactivan.
+		existing.setdefault(normalize_name(getattr(row, key_field)), row)
+
+	created, updated, kept = [], [], {}
+	for item in items:
+		values = {field: item[field] for field in [key_field] + fields}
+		row = existing.get(normalize_name(item[key_field]))
+		if row is None:
+			row = model(**values)
+			created.append(row)
+		else:
+			changed = not row.is_activated
+			row.is_activated = True
+			for field, value in values.items():
+				if getattr(row, field) != value:
+					setattr(row, field, value)
+					changed = True
+			if changed:
+				updated.append(row)
+		kept[normalize_name(item[key_field])] = row
+
+	kept_pks = {row.pk for row in kept.values() if row.pk is not None}
+	deactivated = [row.pk for row in rows if row.is_activated and row.pk not in kept_pks]
+
+	last_pk = max((row.pk for row in rows), default=0)
+	model.objects.bulk_create(created)
+	assign_pks(created, model.objects.filter(pk__gt=last_pk))
+	model.objects.bulk_update(updated, [key_field, 'is_activated'] + fields, batch_size=500)
+	model.objects.filter(pk__in=deactivated).update(is_activated=False)
+
+	return kept, {'created': len(created), 'updated': len(updated), 'deactivated': len(deactivated)}
+
+
+def _link_key(link: ProductsInCombo) -> tuple:
+	return tuple(getattr(link, field + '_id') for field in COMPONENT_KINDS)
+
+
+def _sync_combo_products(combos: list, products: dict) -> dict:
+	"""Aplica las diferencias en los productos de los combos del catálogo (``ProductsInCombo``).
+
+	Cada producto de un combo es una fila con un solo producto. Un combo puede incluir varias veces el mismo
+	producto.
+
+	:param combos: combos del catálogo, con sus productos.
+	:param products: objetos del catálogo por tipo de producto y nombre normalizado.
+	:rtype: dict
+	"""
+	desired = {}
+	for combo in combos:
+		keys = desired.setdefault(products[COMBO][normalize_name(combo['name'])].pk, [])
+		for kind, key in combo['products']:
+			pk = products[kind][normalize_name(str(key))].pk
+			keys.append(tuple(pk if field == kind else None for field in COMPONENT_KINDS))
+
+	remaining = {combo_id: Counter(keys) for combo_id, keys in desired.items()}
+	reactivated, deactivated = [], []
+	for link in ProductsInCombo.objects.filter(combo_id__in=list(desired)).order_by('-is_activated', 'pk'):
+		pending = remaining[link.combo_id]
+		key = _link_key(link)
+		if pending[key] > 0:
+			pending[key] -= 1
+			if not link.is_activated:
+				reactivated.append(link.pk)
+		elif link.is_activated:
+			deactivated.append(link.pk)
+
+	created = []
+	for combo_id, keys in desired.items():
+		for key in keys:
+			if remaining[combo_id][key] > 0:
+				remaining[combo_id][key] -= 1
+				link = ProductsInCombo(combo_id=combo_id)
+				for field, pk in zip(COMPONENT_KINDS, key):
+					setattr(link, field + '_id', pk)
+				created.append(link)
+
+	ProductsInCombo.objects.bulk_create(created)
+	ProductsInCombo.objects.filter(pk__in=reactivated).update(is_activated=True)
+	ProductsInCombo.objects.filter(pk__in=deactivated).update(is_activated=False)
+
+	return {'created': len(created), 'updated': len(reactivated), 'deactivated': len(deactivated)}
+
+
+def import_catalog(catalog: dict, dry_run: bool = False) -> dict:
+	"""Aplica un catálogo completo, en una sola transacción.
+
+	:param catalog: catálogo leído de un archivo (ver ``read_catalog``).
+	:param dry_run: si es True, se calculan los cambios pero se deshacen.
+	:return: cantidad de filas creadas, actualizadas y desactivadas por tipo de producto, y de productos en combos
+		('combo_products').
+	:rtype: dict
+	"""
+	catalog = validate_catalog(catalog)
+
+	summary = {}
+	products = {}
+	with transaction.atomic():
+		for kind, (model, key_field, fields) in CATALOG_MODELS.items():
+			products[kind], summary[kind] = _sync_model(model, key_field, fields, catalog[kind])
+		summary['combo_products'] = _sync_combo_products(catalog[COMBO], products)
+
+		changed = any(sum(changes.values()) for changes in summary.values())
+		if dry_run:
+			transaction.set_rollback(True)
+		elif changed:
+			refresh_combos(bump=False)
+
+	if changed and not dry_run:
+		bump_version('menu')
+		bump_version('prices')
+
+	return summary
+
+
+def export_catalog() -> dict:
+	"""Catálogo activo, en el mismo formato que lee ``import_catalog``.
+
+	:rtype: dict
+	"""
+	catalog = {}
+	for kind, (model, key_field, fields) in CATALOG_MODELS.items():
+		catalog[kind] = [
+			dict({key_field: getattr(row, key_field)}, **{field: str(getattr(row, field)) for field in fields})
+			for row in model.active.order_by(key_field, 'pk')
+		]
+
+	combos = {combo['name']: combo for combo in catalog[COMBO]}
+	for combo in combos.values():
+		combo['products'] = []
+
+	links = ProductsInCombo.active.filter(
+		combo__is_activated=True
+	).select_related(
+		'combo', 'sandwich', 'drink', 'side_dish'
+	).order_by('pk')
+	for link in links:
+		for field, product, name_field in COMPONENT_FIELDS:
+			item = getattr(link, field)
+			if item is not None and item.is_activated and link.combo.name in combos:
+				combos[link.combo.name]['products'].append({field: getattr(item, name_field)})
+
+	return catalog
+
+
+def read_catalog(file, catalog_format: str) -> dict:
+	"""Lee un catálogo de un archivo de texto abierto, en formato 'json' o 'csv'.
+
+	:rtype: dict
+	"""
+	if catalog_format == 'json':
+		try:
+			return json.load(file)
+		except ValueError as error:
+			raise CatalogError("JSON inválido: %s" % error)
+
+	catalog = {kind: [] for kind in CATALOG_MODELS}
+	components = []
+	for row in csv.DictReader(file):
+		kind = (row.get('kind') or '').strip()
+		if kind not in CATALOG_MODELS:
+			raise CatalogError("Tipo de producto inválido: %r." % kind)
+		if (row.get('combo') or '').strip():
+			components.append((row['combo'].strip(), kind, row['name']))
+			continue
+
+		item = {CATALOG_MODELS[kind][1]: row.get('name'), 'price': row.get('price')}
+		if kind == DRINK:
+			item['drink_type'] = row.get('drink_type')
+		catalog[kind].append(item)
+
+	combos = {normalize_name(combo['name'] or ''): combo for combo in catalog[COMBO]}
+	for combo_name, kind, name in components:
+		if normalize_name(combo_name) not in combos:
+			raise CatalogError("El combo '%s' no está en el catálogo." % combo_name)
+		combos[normalize_name(combo_name)].setdefault('products', []).append({kind: name})
+
+	return catalog
+
+
+def write_catalog(catalog: dict, file, catalog_format: str):
+	"""Escribe un catálogo en un archivo de texto abierto, en formato 'json' o 'csv'.
+	"""
+	if catalog_format == 'json':
+		json.dump(catalog, file, ensure_ascii=False, indent=2)
+		return
+
+	writer = csv.writer(file)
+	writer.writerow(CSV_HEADER)
+	for kind, (model, key_field, fields) in CATALOG_MODELS.items():
+		for item in catalog[kind]:
+			writer.writerow([kind, item[key_field], item['price'], item.get('drink_type', ''), ''])
+	for combo in catalog[COMBO]:
+		for product in combo.get('products', []):
+			for kind, name in product.items():
+				writer.writerow([kind, name, '', '', combo['name']])
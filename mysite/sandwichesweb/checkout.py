@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Persistencia de la compra.
+
+Guarda la compra, sus pedidos, los adicionales de cada pedido y la factura como una sola unidad atómica,
+usando inserciones masivas en lugar de un ``save()`` por registro.
+
+SQLite admite un solo escritor a la vez. Con ``CheckoutWriter`` todas las compras pasan por un único hilo, en
+orden, y las compras que llegan mientras se guarda otra se agrupan en una sola transacción (un solo ``COMMIT``).
+Así las peticiones simultáneas no compiten por el bloqueo de escritura, y el costo del ``COMMIT`` se reparte.
+"""
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .billing import billing, billing_many
+from .conf import get_setting
+from .models import *
+from .numbering import assign_numbers
+
+
+def assign_pks(objs: list, queryset):
+	"""Asigna a los objetos recién insertados con ``bulk_create`` sus claves primarias.
+
+	Solo hace falta en los motores que no devuelven las filas insertadas (SQLite, en esta versión de Django).
+	Como la inserción ocurre dentro de la misma transacción, las claves se generan en el mismo orden en el que
+	se insertaron los objetos.
+
+	:param objs: objetos insertados, en el orden de inserción.
+	:param queryset: consulta que devuelve exactamente las filas insertadas.
+	"""
+	if connection.features.can_return_rows_from_bulk_insert:
+		return
+
+	pks = queryset.order_by('pk').values_list('pk', flat=True)
+	for obj, pk in zip(objs, pks):
+		obj.pk = pk
+		obj._state.adding = False
+		obj._state.db = queryset.db
+
+
+def promotion_applications(orders: list) -> list:
+	"""Genera, sin guardarlas, las ofertas aplicadas a los pedidos ya guardados (ver ``pricing.py``).
+
+	:rtype: list
+	"""
+	return [
+		PromApplication(order_id=order.pk, promotion_id=order.promotion_id)
+		for order in orders
+		if getattr(order, 'promotion_id', None)
+	]
+
+
+def save_purchase(bill: Bill, orders: list, additions: list) -> Bill:
+	"""Guarda la compra completa en una sola transacción.
+
+	:param bill: factura con los datos del cliente, todavía sin guardar.
+	:param orders: pedidos de la compra, sin guardar.
+	:param additions: adicionales de los pedidos, sin guardar. Cada uno apunta a su pedido en ``addition.order``.
+	:return: la factura guardada, con su compra y su total.
+	:rtype: Bill
+	"""
+	with transaction.atomic():
+		purchase = Purchase.objects.create(date=bill.date)
+
+		bill.total = 0
+		for order in orders:
+			bill.total += order.sub_total
+			order.purchase = purchase
+
+		Order.objects.bulk_create(orders)
+		assign_pks(orders, Order.objects.filter(purchase=purchase))
+
+		# Ahora que los pedidos tienen id, se enlazan los adicionales y las ofertas aplicadas.
+		for addition in additions:
+			addition.order_id = addition.order.pk
+		Addition.objects.bulk_create(additions)
+		PromApplication.objects.bulk_create(promotion_applications(orders))
+
+		bill.purchase = purchase
+		bill.save()
+
+	return bill
+
+
+def save_purchases(entries: list) -> list:
+	"""Guarda varias compras completas en una sola transacción, con una inserción masiva por modelo.
+
+	:param entries: lista de tuplas (referencia del quiosco, factura, pedidos, adicionales), sin guardar.
+	:return: las facturas guardadas, en el mismo orden.
+	:rtype: list
+	"""
+	with transaction.atomic():
+		# Sin las filas devueltas por la inserción, las nuevas compras son las de id mayor al último.
+		last_pk = 0
+		if not connection.features.can_return_rows_from_bulk_insert:
+			last_pk = Purchase.objects.aggregate(last=Max('pk'))['last'] or 0
+
+		purchases = [Purchase(reference=reference, date=bill.date) for reference, bill, orders, additions in entries]
+		Purchase.objects.bulk_create(purchases)
+		assign_pks(purchases, Purchase.objects.filter(pk__gt=last_pk))
+		purchase_range = {'purchase_id__gte': purchases[0].pk, 'purchase_id__lte': purchases[-1].pk}
+
+		all_orders = []
+		all_additions = []
+		bills = []
+		for purchase, (reference, bill, orders, additions) in zip(purchases, entries):
+			bill.total = 0
+			for order in orders:
+				bill.total += order.sub_total
+				order.purchase = purchase
+			bill.purchase = purchase
+			all_orders.extend(orders)
+			all_additions.extend(additions)
+			bills.append(bill)
+
+		Order.objects.bulk_create(all_orders)
+		assign_pks(all_orders, Order.objects.filter(**purchase_range))
+
+		for addition in all_additions:
+			addition.order_id = addition.order.pk
+		Addition.objects.bulk_create(all_additions)
+		PromApplication.objects.bulk_create(promotion_applications(all_orders))
+
+		Bill.objects.bulk_create(bills)
+		assign_pks(bills, Bill.objects.filter(**purchase_range))
+
+	return bills
+
+
+def save_and_bill_many(entries: list) -> list:
+	"""Guarda varias compras completas y genera sus facturas, en una sola transacción.
+
+	:return: las facturas guardadas.
+	:rtype: list
+	"""
+	with transaction.atomic():
+		bills = save_purchases(entries)
+		billing_many(bills)
+
+	return bills
+
+
+def save_and_bill(bill: Bill, orders: list, additions: list) -> Bill:
+	"""Guarda la compra completa y genera su factura, en una sola transacción.
+
+	:return: la factura guardada.
+	:rtype: Bill
+	"""
+	with transaction.atomic():
+		bill = save_purchase(bill, orders, additions)
+		billing(bill)
+
+	return bill
+
+
+class CheckoutTimeout(Exception):
+	"""La compra esperó en la cola de ``CheckoutWriter`` más de ``CHECKOUT_TIMEOUT`` segundos y se canceló sin
+	guardarse. Puede reintentarse.
+	"""
+	pass
+
+
+def _atomic_call(func, args, kwargs):
+	with transaction.atomic():
+		return func(*args, **kwargs)
+
+
+class CheckoutWriter:
+	"""Hilo único que guarda las compras en orden de llegada.
+
+	Toma de la cola todas las compras pendientes (hasta ``CHECKOUT_BATCH_SIZE``) y las guarda en una sola
+	transacción, cada una en su propio punto de guardado: si una falla, solo se deshace esa. Los resultados se
+	entregan después del ``COMMIT``, así quien espera siempre ve la compra ya guardada.
+
+	El punto de guardado de cada compra corre, igual que la compra, en el contexto de quien la encoló (ver
+	``submit``). Solo el inicio y el ``COMMIT`` del grupo no se suman a las mediciones de ninguna petición.
+	"""
+	def __init__(self):
+		self._queue = queue.Queue()
+		self._thread = threading.Thread(target=self._run, name='sandwichesweb-checkout', daemon=True)
+		self._thread.start()
+
+	def submit(self, func, *args, **kwargs) -> Future:
+		"""Encola una función que escribe en la base de datos.
+
+		La función corre en el contexto (``contextvars``) de quien la encola, para que sus consultas se sumen a
+		las mediciones de la petición (ver ``middleware.py``).
+
+		:return: un ``Future`` con el resultado de la función.
+		:rtype: Future
+		"""
+		future = Future()
+		self._queue.put((future, contextvars.copy_context(), func, args, kwargs))
+		return future
+
+	def run(self, func, *args, **kwargs):
+		"""Encola una función que escribe en la base de datos y espera su resultado.
+
+		Si la función no empezó a correr en ``CHECKOUT_TIMEOUT`` segundos, se cancela: nunca se guarda después de
+		que quien la encoló recibió el error. Si ya está corriendo, se espera a que termine.
+
+		:raises CheckoutTimeout: si la función se canceló sin correr.
+		:return: lo que retorne la función.
+		"""
+		future = self.submit(func, *args, **kwargs)
+		try:
+			return future.result(get_setting('CHECKOUT_TIMEOUT'))
+		except TimeoutError:
+			if future.cancel():
+				raise CheckoutTimeout()
+			return future.result()
+
+	def _next_batch(self) -> list:
+		batch = [self._queue.get()]
+		batch_size = get_setting('CHECKOUT_BATCH_SIZE')
+		while len(batch) < batch_size:
+			try:
+				batch.append(self._queue.get_nowait())
+			except queue.Empty:
+				break
+
+		return batch
+
+	def _run(self):
+		while True:
+			batch = self._next_batch()
+			close_old_connections()
+			done = []
+			try:
+				with transaction.atomic():
+					for future, context, func, args, kwargs in batch:
+						if not future.set_running_or_notify_cancel():
+							continue
+						try:
+							result = context.run(_atomic_call, func, args, kwargs)
+						except Exception as error:
+							future.set_exception(error)
+						else:
+							done.append((future, result))
+			except Exception as error:
+				# Falló el COMMIT: ninguna de las compras del grupo quedó guardada.
+				for future, result in done:
+					future.set_exception(error)
+			else:
+				for future, result in done:
+					future.set_result(result)
+			finally:
+				close_old_connections()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> CheckoutWriter:
+	global _writer
+
+	with _writer_lock:
+		if _writer is None:
+			_writer = CheckoutWriter()
+
+	return _writer
+
+
+def writer_enabled() -> bool:
+	"""Indica si las compras pasan por ``CheckoutWriter``.
+
+	Con ``CHECKOUT_WRITER = None`` se usa solo con SQLite en un archivo. Con una base de datos en memoria (las
+	pruebas) el hilo no vería los datos de la transacción de la prueba.
+	"""
+	enabled = get_setting('CHECKOUT_WRITER')
+	if enabled is None:
+		return connection.vendor == 'sqlite' and not connection.is_in_memory_db()
+
+	return enabled
+
+
+def checkout(bill: Bill, orders: list, additions: list) -> Bill:
+	"""Asigna los números de los pedidos, guarda la compra y genera su factura, a través de ``CheckoutWriter`` si
+	está activo.
+
+	:param bill: factura con los datos del cliente, todavía sin guardar.
+	:param orders: pedidos de la compra, sin guardar.
+	:param additions: adicionales de los pedidos, sin guardar.
+	:raises CheckoutTimeout: si la compra esperó demasiado en la cola del escritor. No se guardó.
+	:return: la factura guardada.
+	:rtype: Bill
+	"""
+	# Los números se reservan fuera de la transacción de la compra (ver numbering.reserve_block).
+	assign_numbers(orders)
+
+	if not writer_enabled():
+		return save_and_bill(bill, orders, additions)
+
+	return get_writer().run(save_and_bill, bill, orders, additions)
+
+
+def checkout_many(entries: list) -> list:
+	"""Como ``checkout``, para varias compras a la vez (por ejemplo, las que un quiosco guardó sin conexión).
+
+	:param entries: lista de tuplas (referencia del quiosco, factura, pedidos, adicionales), sin guardar. La fecha
+		de cada compra es la de su factura (``bill.date``), y sus pedidos reciben números de ese día.
+	:return: las facturas guardadas, en el mismo orden.
+	:rtype: list
+	"""
+	if not entries:
+		return []
+
+	by_day = {}
+	for reference, bill, orders, additions in entries:
+		by_day.setdefault(timezone.localdate(bill.date), []).extend(orders)
+	for day, orders in by_day.items():
+		assign_numbers(orders, day)
+
+	if not writer_enabled():
+		return save_and_bill_many(entries)
+
+	return get_writer().run(save_and_bill_many, entries)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Resumen de los combos (``ComboSummary``): sus productos, el precio de los productos por separado y el ahorro.
+
+Se recalcula solo cuando cambia un combo, uno de sus productos o su composición (ver ``signals.py``), después de
+que se confirma la transacción. El menú carga los resúmenes de todos los combos junto con los combos, en la misma
+consulta.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import *
+from .versioning import bump_version
+
+# Campo de ProductsInCombo, tipo de producto y campo con el nombre del producto.
+COMPONENT_FIELDS = [
+	('sandwich', Product.ListProducts.SANDWICH.label, 'size'),
+	('drink', Product.ListProducts.DRINK.label, 'name'),
+	('side_dish', Product.ListProducts.SIDE_DISH.label, 'name'),
+]
+
+
+def build_summaries(combos: list) -> list:
+	"""Calcula, sin guardarlos, los resúmenes de los combos, con una consulta para todos sus productos.
+
+	Los productos desactivados no se incluyen: no cuentan para el precio por separado ni para el ahorro.
+
+	:param combos: combos a resumir.
+	:return: lista de ``ComboSummary``.
+	:rtype: list
+	"""
+	links = ProductsInCombo.active.filter(
+		combo__in=combos
+	).select_related(
+		'sandwich', 'drink', 'side_dish'
+	).order_by('pk')
+
+	components = defaultdict(list)
+	for link in links:
+		for field, product, name_field in COMPONENT_FIELDS:
+			item = getattr(link, field)
+			if item is not None and item.is_activated:
+				components[link.combo_id].append({
+					'product': product,
+					'id': item.id,
+					'name': getattr(item, name_field),
+					'price': str(item.price),
+				})
+
+	summaries = []
+	for combo in combos:
+		parts_total = sum((Decimal(item['price']) for item in components[combo.id]), Decimal(0))
+		summaries.append(ComboSummary(
+			combo=combo,
+			components=components[combo.id],
+			parts_total=parts_total,
+			savings=max(parts_total - combo.price, Decimal(0)),
+		))
+
+	return summaries
+
+
+def refresh_combos(combo_ids=None, bump: bool = True):
+	"""Recalcula y guarda los resúmenes de los combos indicados, o de todos.
+
+	:param combo_ids: ids de los combos. Si es None, se recalculan todos.
+	:param bump: si se cambia la versión del menú, para que se vuelva a construir con los nuevos resúmenes.
+	"""
+	combos = Combo.objects.all()
+	if combo_ids is not None:
+		combos = combos.filter(pk__in=set(combo_ids))
+	combos = list(combos)
+
+	with transaction.atomic():
+		summaries = ComboSummary.objects.all()
+		if combo_ids is not None:
+			summaries = summaries.filter(combo_id__in=set(combo_ids))
+		summaries.delete()
+		ComboSummary.objects.bulk_create(build_summaries(combos))
+
+	if bump:
+		bump_version('menu')
+
+
+def schedule_refresh(combo_ids):
+	"""Recalcula los resúmenes de los combos cuando se confirme la transacción en curso.
+	"""
+	combo_ids = [pk for pk in combo_ids if pk is not None]
+	if combo_ids:
+		transaction.on_commit(lambda: refresh_combos(combo_ids))
+
+
+def combos_with_product(field: str, product_id) -> list:
+	"""Ids de los combos que incluyen un producto.
+
+	:param field: 'sandwich', 'drink' o 'side_dish'.
+	"""
+	return list(
+		ProductsInCombo.objects.filter(**{field + '_id': product_id}).values_list('combo_id', flat=True).distinct()
+	)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Configuración de la aplicación.
+
+Cada valor puede sobrescribirse en ``settings.py`` con el prefijo ``SANDWICHESWEB_``. Se leen en cada llamada
+para que ``override_settings`` funcione en las pruebas.
+"""
+from django.conf import settings
+
+DEFAULTS = {
+	# Carrito de compras
+	'CART_STORAGE': 'sandwichesweb.cart.session.SessionCart',
+	'CART_TTL': 60 * 60,  # Segundos sin cambios antes de que el carrito expire.
+	'CART_MAX_LINES': 50,  # Máximo de pedidos por carrito.
+	'CART_CACHE': 'carts',  # Alias de la caché usada por CacheCart.
+	'CART_COOKIE_NAME': 'sandwichesweb_cart',
+	'CART_COOKIE_MAX_SIZE': 4000,  # Bytes. Los navegadores suelen rechazar cookies de más de 4096 bytes.
+
+	# Base de datos (ver db.py)
+	'SQLITE_PRAGMAS': {  # PRAGMA que se aplican a cada conexión nueva de SQLite.
+		'journal_mode': 'WAL',
+		'synchronous': 'NORMAL',
+		'busy_timeout': 5000,  # Milisegundos de espera ante el bloqueo de escritura.
+	},
+
+	# Escritor de las compras (ver checkout.py)
+	'CHECKOUT_WRITER': None,  # True, False o None (solo con SQLite en un archivo).
+	'CHECKOUT_BATCH_SIZE': 50,  # Compras máximas por transacción.
+	'CHECKOUT_TIMEOUT': 30,  # Segundos máximos de espera de una compra en la cola.
+	'SYNC_MAX_PURCHASES': 500,  # Compras máximas por petición de sincronización de un quiosco.
+	'KIOSK_TOKENS': {},  # Nombre de cada quiosco y el token con el que sincroniza sus compras (ver api/permissions.py).
+
+	# Archivo de las compras antiguas (ver archive.py)
+	'ARCHIVE_AFTER_DAYS': 365,  # Días desde la compra antes de archivarla.
+	'ARCHIVE_BATCH_SIZE': 200,  # Compras por transacción.
+
+	# Números de pedido (ver numbering.py)
+	'ORDER_NUMBER_BLOCK': 20,  # Números que reserva cada proceso en cada consulta.
+
+	# Versiones de los datos del catálogo (ver versioning.py)
+	'VERSION_TTL': 1,  # Segundos que cada proceso usa las versiones leídas antes de volver a leerlas.
+
+	# Menú en caché
+	'MENU_TIMEOUT': 24 * 60 * 60,  # Segundos que se guarda cada versión del menú.
+	'MENU_LOCK_TIMEOUT': 5,  # Segundos máximos que puede tardar la reconstrucción del menú.
+
+	# Vistas asíncronas
+	'ASYNC_ORM_WORKERS': 4,  # Hilos para las consultas del ORM de las vistas asíncronas.
+	'ASGI_URLCONF': None,  # Módulo de rutas de las peticiones ASGI (ver middleware.ASGIUrlconfMiddleware).
+
+	# Métricas
+	'METRICS_ALLOWED_IPS': ('127.0.0.1', '::1'),  # Direcciones que pueden consultar sandwichesweb:metrics.
+
+	# Versiones reducidas de las fotos
+	'IMAGE_WORKERS': 2,  # Hilos que generan las versiones reducidas.
+	'IMAGE_SIZES': {  # Nombre del tamaño y ancho máximo en píxeles.
+		'thumb': 160,
+		'card': 480,
+	},
+}
+
+
+def get_setting(name: str):
+	"""Obtiene un valor de configuración de la aplicación.
+
+	:param name: nombre del valor, sin el prefijo ``SANDWICHESWEB_``.
+	:return: el valor definido en ``settings.py``, o el valor por defecto.
+	"""
+	return getattr(settings, 'SANDWICHESWEB_' + name, DEFAULTS[name])
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Ajustes de las conexiones a la base de datos.
+
+Con SQLite, cada conexión nueva activa el modo WAL (las lecturas no esperan a las escrituras, y viceversa), una
+sincronización menos estricta (``synchronous = NORMAL``, segura en modo WAL) y un tiempo de espera ante el bloqueo
+de escritura, en lugar de fallar de inmediato con "database is locked". Los valores se definen en
+``SANDWICHESWEB_SQLITE_PRAGMAS``.
+"""
+from django.db.backends.signals import connection_created
+
+from .conf import get_setting
+
+
+def configure_connection(sender, connection, **kwargs):
+	"""Aplica los ``PRAGMA`` de ``SQLITE_PRAGMAS`` a cada conexión nueva de SQLite.
+	"""
+	if connection.vendor != 'sqlite':
+		return
+
+	with connection.cursor() as cursor:
+		for name, value in get_setting('SQLITE_PRAGMAS').items():
+			if name == 'journal_mode' and connection.is_in_memory_db():
+				continue  # Las bases de datos en memoria no usan WAL.
+			cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+def connect_database_hooks():
+	connection_created.connect(configure_connection, dispatch_uid='sandwichesweb_configure_connection')
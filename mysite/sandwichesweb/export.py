@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Exportación de las facturas, con sus detalles y cantidades de productos, para contabilidad (CSV o JSON Lines).
+
+Las facturas se leen con ``iterator()`` por bloques de ``chunk_size``, en orden de fecha e id, y los detalles y las
+cantidades de cada bloque se cargan con dos consultas. Las facturas de las compras archivadas (ver ``archive.py``)
+se leen igual, de su documento, antes que las facturas en curso, que son más recientes. Cada línea se entrega apenas
+se genera, así la memoria usada es la misma sin importar cuántas facturas se exporten. La usan la vista ``export_bills_view`` (con una respuesta por partes) y el
+comando ``export_bills`` (que escribe directo a un archivo).
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from .billing import PRODUCTS_ORDER
+from .models import *
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 500
+
+CSV_HEADER = [
+	'factura', 'fecha', 'ci', 'primer_nombre', 'segundo_nombre', 'primer_apellido', 'segundo_apellido', 'total',
+	'producto', 'nombre', 'tamaño', 'ingredientes', 'precio',
+] + ['cantidad_' + product.label for product in PRODUCTS_ORDER]
+
+
+def _day_range(start, end) -> dict:
+	# Compara la fecha con dos momentos, en lugar de extraer el día de cada fila, así se usa el índice de la fecha.
+	return {
+		'date__gte': timezone.make_aware(datetime.combine(start, time.min)),
+		'date__lt': timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+	}
+
+
+def bills_between(start, end):
+	"""Facturas desde el día ``start`` hasta el día ``end``, inclusive, en la hora local (índice sw_bill_date_idx).
+	"""
+	return Bill.objects.filter(**_day_range(start, end))
+
+
+def archived_between(start, end):
+	"""Compras archivadas con factura desde el día ``start`` hasta el día ``end``, inclusive, en la hora local
+	(índice sw_archived_date_idx).
+	"""
+	return ArchivedPurchase.objects.filter(bill_id__isnull=False, **_day_range(start, end))
+
+
+def month_range(value: str) -> tuple:
+	"""Primer y último día de un mes con el formato AAAA-MM.
+
+	:rtype: tuple
+	"""
+	start = datetime.strptime(value, '%Y-%m').date()
+	end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+	return start, end
+
+
+def prefetch_bill_rows(bills: list):
+	"""Carga, con una consulta para cada uno, los detalles (``bill.details``) y las cantidades de productos
+	(``bill.quantities``) de las facturas.
+	"""
+	prefetch_related_objects(
+		bills,
+		Prefetch('detail_set', queryset=Detail.objects.order_by('pk'), to_attr='details'),
+		Prefetch('quantityofproducts_set', queryset=QuantityOfProducts.objects.order_by('pk'), to_attr='quantities'),
+	)
+
+
+def bill_chunks(queryset, chunk_size: int = CHUNK_SIZE):
+	"""Recorre las facturas por bloques ordenados por fecha e id, con sus detalles (``bill.details``) y cantidades de
+	productos (``bill.quantities``) precargados.
+
+	``iterator()`` no aplica ``prefetch_related``: se precargan los objetos de cada bloque con
+	``prefetch_bill_rows``.
+	"""
+	bills = queryset.order_by('date', 'pk').iterator(chunk_size=chunk_size)
+	while True:
+		chunk = list(islice(bills, chunk_size))
+		if not chunk:
+			return
+
+		prefetch_bill_rows(chunk)
+		yield chunk
+
+
+def bill_documents(queryset, archived=None, chunk_size: int = CHUNK_SIZE):
+	"""Genera, de a uno, los documentos (ver ``bill_document``) de las facturas archivadas de ``archived`` y luego
+	los de las facturas en curso de ``queryset``, en orden de fecha e id.
+	"""
+	if archived is not None:
+		documents = archived.order_by('date', 'pk').values_list('document', flat=True)
+		for document in documents.iterator(chunk_size=chunk_size):
+			yield document['bill']
+
+	for chunk in bill_chunks(queryset, chunk_size):
+		for bill in chunk:
+			yield bill_document(bill)
+
+
+def bill_document(bill: Bill) -> dict:
+	"""Factura, con sus detalles y cantidades, como diccionario serializable en JSON.
+
+	:rtype: dict
+	"""
+	return {
+		'id': bill.id,
+		'date': timezone.localtime(bill.date).isoformat(),
+		'total': str(bill.total),
+		'client': {
+			'ci': bill.ci_client,
+			'first_name': bill.first_name_client,
+			'middle_name': bill.middle_name_client,
+			'surname': bill.surname_client,
+			'second_surname': bill.second_surname_client,
+		},
+		'details': [
+			{
+				'product': detail.product,
+				'name': detail.name,
+				'size': detail.size,
+				'ingredients': detail.ingredient_names,
+				'price': str(detail.price),
+			}
+			for detail in bill.details
+		],
+		'quantities': {quantity.product: quantity.quantity for quantity in bill.quantities},
+	}
+
+
+def bill_rows(document: dict):
+	"""Filas CSV del documento de una factura: una por detalle, o una sola sin detalle si la factura no tiene
+	detalles.
+	"""
+	client = document['client']
+	head = [
+		document['id'], document['date'], client['ci'], client['first_name'], client['middle_name'],
+		client['surname'], client['second_surname'], document['total'],
+	]
+	tail = [document['quantities'].get(product.label, 0) for product in PRODUCTS_ORDER]
+
+	for detail in document['details']:
+		yield head + [
+			detail['product'], detail['name'] or '', detail['size'] or '', ", ".join(detail['ingredients']),
+			detail['price'],
+		] + tail
+	if not document['details']:
+		yield head + [''] * 5 + tail
+
+
+class _Line:
+	"""Archivo que retorna lo que se escribe en él, para generar las líneas CSV de a una.
+	"""
+	def write(self, value):
+		return value
+
+
+def export_lines(queryset, export_format: str = 'csv', chunk_size: int = CHUNK_SIZE, archived=None):
+	"""Genera las líneas del archivo exportado, de a una.
+
+	:param queryset: facturas en curso a exportar.
+	:param export_format: 'csv' o 'jsonl'.
+	:param chunk_size: facturas leídas por bloque.
+	:param archived: compras archivadas cuyas facturas también se exportan (ver ``archived_between``).
+	"""
+	if export_format not in EXPORT_FORMATS:
+		raise ValueError(export_format)
+
+	documents = bill_documents(queryset, archived, chunk_size)
+	if export_format == 'csv':
+		writer = csv.writer(_Line())
+		yield writer.writerow(CSV_HEADER)
+		for document in documents:
+			for row in bill_rows(document):
+				yield writer.writerow(row)
+	else:
+		for document in documents:
+			yield json.dumps(document, ensure_ascii=False) + '\n'
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Versiones reducidas de las fotos de los productos.
+
+Cuando se guarda un producto con foto, se generan con Pillow una miniatura y una versión para las tarjetas del menú,
+cada una en el formato original (JPEG, o PNG si la foto tiene transparencia) y en WebP. La generación corre en un
+grupo de hilos, después de que se confirma la transacción, así no retrasa la petición del administrador.
+
+Los archivos se guardan en ``uploads/derivatives/`` con el hash del contenido de la foto en el nombre, así que
+nunca cambian y pueden guardarse en caché por tiempo indefinido. El hash queda en ``Product.photo_hash``.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image
+
+from .conf import get_setting
+from .versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'uploads/derivatives'
+
+Image.init()
+WEBP_SUPPORTED = 'WEBP' in Image.SAVE
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+	global _executor
+
+	if _executor is None:
+		_executor = ThreadPoolExecutor(
+			max_workers=get_setting('IMAGE_WORKERS'),
+			thread_name_prefix='sandwichesweb-images',
+		)
+
+	return _executor
+
+
+def content_hash(name: str) -> str:
+	"""Calcula el hash del contenido de un archivo guardado.
+
+	:param name: nombre del archivo en el almacenamiento.
+	:return: los primeros 16 caracteres del SHA-256 del contenido.
+	:rtype: str
+	"""
+	digest = hashlib.sha256()
+	with default_storage.open(name, 'rb') as file:
+		for chunk in file.chunks():
+			digest.update(chunk)
+
+	return digest.hexdigest()[:16]
+
+
+def fallback_format(image: Image.Image) -> str:
+	"""Formato para los navegadores sin WebP: PNG si la imagen tiene transparencia, JPEG si no.
+	"""
+	return 'png' if image.mode in ('RGBA', 'LA', 'P') else 'jpeg'
+
+
+def derivative_name(photo_hash: str, size: str, extension: str) -> str:
+	"""Nombre de una versión reducida en el almacenamiento.
+
+	:param photo_hash: hash del contenido de la foto original.
+	:param size: nombre del tamaño ('thumb', 'card').
+	:param extension: 'jpeg', 'png' o 'webp'.
+	:rtype: str
+	"""
+	return '%s/%s/%s-%s.%s' % (DERIVATIVES_DIR, photo_hash[:2], photo_hash, size, extension)
+
+
+def derivatives(photo_hash: str, extension: str) -> list:
+	"""Lista las versiones reducidas de una foto.
+
+	:param photo_hash: hash del contenido de la foto original.
+	:param extension: formato para los navegadores sin WebP ('jpeg' o 'png').
+	:return: tuplas (tamaño, ancho, nombre, nombre WebP o None), de menor a mayor.
+	:rtype: list
+	"""
+	return [
+		(
+			size,
+			width,
+			derivative_name(photo_hash, size, extension),
+			derivative_name(photo_hash, size, 'webp') if WEBP_SUPPORTED else None,
+		)
+		for size, width in sorted(get_setting('IMAGE_SIZES').items(), key=lambda item: item[1])
+	]
+
+
+def save_image(image: Image.Image, name: str, image_format: str):
+	if default_storage.exists(name):
+		return
+
+	buffer = BytesIO()
+	if image_format == 'jpeg':
+		image.convert('RGB').save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+	elif image_format == 'png':
+		image.save(buffer, 'PNG', optimize=True)
+	else:
+		image.save(buffer, 'WEBP', quality=80, method=4)
+	saved = default_storage.save(name, ContentFile(buffer.getvalue()))
+	if saved != name:
+		# Otro hilo generó la misma versión al mismo tiempo; el contenido es idéntico.
+		default_storage.delete(saved)
+
+
+def generate_derivatives(name: str) -> tuple:
+	"""Genera las versiones reducidas de una foto, si no existen todavía.
+
+	:param name: nombre de la foto original en el almacenamiento.
+	:return: hash del contenido de la foto y formato para los navegadores sin WebP.
+	:rtype: tuple
+	"""
+	photo_hash = content_hash(name)
+
+	with default_storage.open(name, 'rb') as file:
+		original = Image.open(file)
+		original.load()
+
+	extension = fallback_format(original)
+	for size, width, derivative, webp in derivatives(photo_hash, extension):
+		if default_storage.exists(derivative) and (webp is None or default_storage.exists(webp)):
+			continue
+
+		image = original.copy()
+		image.thumbnail((width, width * 4), Image.LANCZOS)
+		save_image(image, derivative, extension)
+		if webp:
+			save_image(image, webp, 'webp')
+
+	return photo_hash, extension
+
+
+def process_photo(model, pk, name: str):
+	"""Genera las versiones reducidas de la foto de un producto y guarda su hash.
+
+	Se ejecuta en el grupo de hilos.
+	"""
+	try:
+		photo_hash, extension = generate_derivatives(name)
+		value = '%s.%s' % (photo_hash, extension)
+		updated = model.objects.filter(pk=pk, photo=name).exclude(photo_hash=value).update(photo_hash=value)
+		if updated:
+			# update() no envía señales.
+			bump_version('menu')
+	except Exception:
+		logger.exception('No se pudieron generar las versiones reducidas de %s', name)
+	finally:
+		connections.close_all()
+
+
+def schedule_photo(instance):
+	"""Programa la generación de las versiones reducidas de la foto de un producto.
+	"""
+	if not instance.photo:
+		return
+
+	model, pk, name = type(instance), instance.pk, instance.photo.name
+	transaction.on_commit(lambda: get_executor().submit(process_photo, model, pk, name))
+
+
+def photo_derivatives(product) -> list:
+	"""Lista las versiones reducidas ya generadas de la foto de un producto.
+
+	:param product: producto con ``photo_hash``.
+	:return: el mismo formato de ``derivatives``, o una lista vacía si todavía no se han generado.
+	:rtype: list
+	"""
+	if not product.photo_hash:
+		return []
+
+	photo_hash, extension = os.path.splitext(product.photo_hash)
+	return derivatives(photo_hash, extension[1:])
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from ...archive import archive_purchases
+from ...conf import get_setting
+
+
+class Command(BaseCommand):
+	help = (
+		"Mueve las compras antiguas, con sus pedidos y facturas, a las compras archivadas (ArchivedPurchase), por "
+		"lotes, cada uno en su propia transacción."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			'--days', type=int, default=get_setting('ARCHIVE_AFTER_DAYS'),
+			help="Antigüedad mínima, en días, de las compras a archivar."
+		)
+		parser.add_argument(
+			'--batch-size', type=int, default=get_setting('ARCHIVE_BATCH_SIZE'), help="Compras por lote."
+		)
+		parser.add_argument('--max-batches', type=int, help="Máximo de lotes a archivar. Por defecto, todos.")
+
+	def handle(self, *args, **options):
+		total = 0
+		for archived in archive_purchases(options['days'], options['batch_size'], options['max_batches']):
+			total += archived
+			self.stdout.write("%d compras archivadas" % total)
+
+		self.stdout.write(self.style.SUCCESS("Archivo terminado: %d compras archivadas." % total))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Prefetch
+
+from ...models import *
+from ...rollups import record_sales
+
+
+class Command(BaseCommand):
+	help = (
+		"Reconstruye las ventas acumuladas por hora y por día (HourlySales, DailySales) a partir de todas las "
+		"facturas, las archivadas y las en curso, por lotes. No debe ejecutarse a la vez que archive_purchases."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type=int, default=500, help="Facturas por lote.")
+
+	def handle(self, *args, **options):
+		batch_size = options['batch_size']
+
+		# Se borran los acumulados y se toma la última factura en la misma transacción: las facturas posteriores
+		# ya se suman solas al guardarse.
+		with transaction.atomic():
+			HourlySales.objects.all().delete()
+			DailySales.objects.all().delete()
+			last_pk = Bill.objects.aggregate(last=Max('pk'))['last'] or 0
+
+		archived = self.backfill_archived(batch_size)
+
+		details = Detail.objects.only('product', 'name', 'size', 'price', 'bill_id')
+		processed = 0
+		start_pk = 0
+		while start_pk < last_pk:
+			bills = list(
+				Bill.objects.filter(pk__gt=start_pk, pk__lte=last_pk).order_by('pk').only('pk', 'date').prefetch_related(
+					Prefetch('detail_set', queryset=details, to_attr='details')
+				)[:batch_size]
+			)
+			if not bills:
+				break
+
+			with transaction.atomic():
+				record_sales([(bill.date, bill.details) for bill in bills])
+
+			processed += len(bills)
+			start_pk = bills[-1].pk
+			self.stdout.write("%d facturas procesadas (hasta la %d)" % (processed, start_pk))
+
+		self.stdout.write(self.style.SUCCESS(
+			"Acumulados reconstruidos con %d facturas archivadas y %d en curso." % (archived, processed)
+		))
+
+	def backfill_archived(self, batch_size: int) -> int:
+		"""Suma las ventas de las facturas archivadas (ver archive.py), desde su documento.
+
+		:return: cantidad de facturas archivadas procesadas.
+		:rtype: int
+		"""
+		processed = 0
+		start_pk = 0
+		while True:
+			documents = list(
+				ArchivedPurchase.objects.filter(pk__gt=start_pk, bill_id__isnull=False).order_by('pk')
+				.values_list('pk', 'document')[:batch_size]
+			)
+			if not documents:
+				return processed
+
+			bills = []
+			for _, document in documents:
+				bill = document['bill']
+				details = [
+					Detail(
+						product=detail['product'], name=detail['name'], size=detail['size'],
+						price=Decimal(detail['price']),
+					)
+					for detail in bill['details']
+				]
+				bills.append((datetime.fromisoformat(bill['date']), details))
+
+			with transaction.atomic():
+				record_sales(bills)
+
+			processed += len(documents)
+			start_pk = documents[-1][0]
+			self.stdout.write("%d facturas archivadas procesadas" % processed)
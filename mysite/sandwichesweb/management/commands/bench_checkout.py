@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import override_settings
+
+from ...bench import seed_catalog, summarize, throwaway_database, write_results
+from ...checkout import checkout
+from ...menu import build_menu
+from ...models import *
+
+
+class Command(BaseCommand):
+	help = (
+		"Mide las compras por segundo con distintos niveles de concurrencia, guardando cada compra en su propio hilo "
+		"(inline) o a través del escritor único de compras (writer), y la latencia de las lecturas que ocurren al "
+		"mismo tiempo. Corre sobre una base de datos desechable."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--checkouts', type=int, default=300, help="Compras por medición.")
+		parser.add_argument(
+			'--concurrency', default='1,5,20,50',
+			help="Niveles de concurrencia, separados por comas."
+		)
+		parser.add_argument('--items', type=int, default=3, help="Pedidos por compra.")
+		parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+
+	def handle(self, *args, **options):
+		levels = [int(level) for level in options['concurrency'].split(',')]
+
+		results = {'checkouts': options['checkouts'], 'items': options['items'], 'modes': {}}
+		with throwaway_database():
+			catalog = seed_catalog()
+			for mode in ('inline', 'writer'):
+				with override_settings(SANDWICHESWEB_CHECKOUT_WRITER=(mode == 'writer')):
+					results['modes'][mode] = {
+						str(level): self.run(catalog, options['checkouts'], level, options['items'])
+						for level in levels
+					}
+
+		for mode, runs in results['modes'].items():
+			self.stdout.write(self.style.MIGRATE_HEADING(mode))
+			for level, result in runs.items():
+				self.stdout.write(
+					"  %3s simultáneas %8.1f compras/s  p95 %8.2f ms  errores %3d  lecturas p95 %7.2f ms" % (
+						level, result['checkout']['rps'], result['checkout']['p95_ms'], result['errors'],
+						result['reads']['p95_ms'],
+					)
+				)
+
+		if options['output']:
+			write_results(options['output'], results)
+			self.stdout.write(self.style.SUCCESS("Resultados guardados en %s" % options['output']))
+
+	def run(self, catalog: dict, total: int, concurrency: int, items: int) -> dict:
+		lock = threading.Lock()
+		latencies = []
+		errors = [0]
+
+		def purchase(number):
+			rng = random.Random(number)
+			orders, additions = [], []
+			for line in range(items):
+				order = Order(number=line + 1, sub_total=0)
+				sandwich = rng.choice(catalog['sandwiches'])
+				order.sub_total += sandwich.price
+				for ingredient in rng.sample(catalog['ingredients'], 2):
+					order.sub_total += ingredient.price
+					additions.append(Addition(order=order, sandwich=sandwich, ingredient=ingredient))
+				orders.append(order)
+			orders[-1].drink = rng.choice(catalog['drinks'])
+			bill = Bill(ci_client=number, first_name_client='Cliente', surname_client=str(number))
+
+			start = time.perf_counter()
+			try:
+				checkout(bill, orders, additions)
+			except OperationalError:
+				with lock:
+					errors[0] += 1
+				return
+			finally:
+				connection.close()  # Como al terminar una petición.
+			with lock:
+				latencies.append(time.perf_counter() - start)
+
+		# Un lector que consulta el menú sin caché mientras se guardan las compras.
+		reads = []
+		stop = threading.Event()
+
+		def reader():
+			while not stop.is_set():
+				start = time.perf_counter()
+				build_menu()
+				reads.append(time.perf_counter() - start)
+			connection.close()
+
+		reader_thread = threading.Thread(target=reader)
+		reader_thread.start()
+		start = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			list(executor.map(purchase, range(total)))
+		elapsed = time.perf_counter() - start
+		stop.set()
+		reader_thread.join()
+
+		return {
+			'checkout': summarize(latencies, elapsed),
+			'errors': errors[0],
+			'reads': summarize(reads, elapsed),
+		}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from ...bench import seed_catalog, summarize, throwaway_database, write_results
+
+# Cantidad de consultas en el encabezado Server-Timing (ver middleware.py).
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+# Métricas que se comparan con la medición de referencia. Un aumento mayor que la tolerancia es una regresión.
+COMPARED_METRICS = ['p95_ms', 'queries_per_request']
+
+
+class Command(BaseCommand):
+	help = (
+		"Simula clientes simultáneos que recorren el flujo completo de compra (order → selection → client → genbill) "
+		"sobre una base de datos desechable, y reporta por ruta las latencias p50/p95/p99, las peticiones por segundo "
+		"y las consultas SQL por petición."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--customers', type=int, default=200, help="Clientes simulados.")
+		parser.add_argument('--concurrency', type=int, default=20, help="Clientes comprando al mismo tiempo.")
+		parser.add_argument('--items', type=int, default=3, help="Pedidos por cliente.")
+		parser.add_argument('--seed', type=int, default=0, help="Semilla para elegir los productos.")
+		parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+		parser.add_argument('--baseline', help="Resultados JSON de una medición anterior, para detectar regresiones.")
+		parser.add_argument(
+			'--tolerance', type=float, default=0.20,
+			help="Aumento relativo permitido respecto a la referencia (0.20 = 20%%)."
+		)
+
+	def handle(self, *args, **options):
+		with throwaway_database():
+			catalog = seed_catalog()
+			results = self.run(catalog, options)
+
+		self.report(results)
+
+		if options['output']:
+			write_results(options['output'], results)
+			self.stdout.write(self.style.SUCCESS("Resultados guardados en %s" % options['output']))
+
+		if options['baseline']:
+			self.compare(results, options['baseline'], options['tolerance'])
+
+	def run(self, catalog: dict, options: dict) -> dict:
+		urls = {
+			'order': reverse('sandwichesweb:order'),
+			'selection': reverse('sandwichesweb:selection'),
+			'client': reverse('sandwichesweb:client'),
+			'genbill': reverse('sandwichesweb:genbill'),
+		}
+		sandwich_ids = [sandwich.id for sandwich in catalog['sandwiches']]
+
+		lock = threading.Lock()
+		latencies = defaultdict(list)
+		queries = defaultdict(int)
+
+		def timed(name, method, *args, **kwargs):
+			start = time.perf_counter()
+			response = method(*args, **kwargs)
+			elapsed = time.perf_counter() - start
+
+			if response.status_code >= 400:
+				raise CommandError("%s respondió %s" % (name, response.status_code))
+			# Las consultas que midió TimingMiddleware, incluidas las del hilo escritor de las compras.
+			count = int(QUERIES_RE.search(response['Server-Timing']).group(1))
+			with lock:
+				latencies[name].append(elapsed)
+				queries[name] += count
+
+		def customer(number):
+			rng = random.Random(options['seed'] + number)
+			client = Client()
+			for _ in range(options['items']):
+				timed('order', client.get, urls['order'])
+				timed('selection', client.post, urls['selection'], {
+					'product_id': rng.choice(sandwich_ids),
+					'product_type': 'sandwich',
+					'decision': 1,
+				})
+			timed('client', client.get, urls['client'])
+			timed('genbill', client.post, urls['genbill'], {
+				'ci': 10000000 + number,
+				'first_name': 'Cliente',
+				'middle_name': '',
+				'surname': str(number),
+				'second_surname': '',
+			})
+
+		# Un cliente antes de medir, para cargar las cachés.
+		customer(-1)
+		latencies.clear()
+		queries.clear()
+
+		start = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+			list(executor.map(customer, range(options['customers'])))
+		elapsed = time.perf_counter() - start
+
+		endpoints = {}
+		for name in urls:
+			summary = summarize(latencies[name], elapsed)
+			summary['queries_per_request'] = round(queries[name] / max(1, len(latencies[name])), 2)
+			endpoints[name] = summary
+
+		return {
+			'customers': options['customers'],
+			'concurrency': options['concurrency'],
+			'items': options['items'],
+			'elapsed_s': round(elapsed, 3),
+			'endpoints': endpoints,
+		}
+
+	def report(self, results: dict):
+		self.stdout.write(self.style.MIGRATE_HEADING(
+			"%d clientes, %d simultáneos, %d pedidos por cliente, %.2f s" % (
+				results['customers'], results['concurrency'], results['items'], results['elapsed_s'],
+			)
+		))
+		for name, summary in results['endpoints'].items():
+			self.stdout.write(
+				"  %-10s %8.1f req/s  p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  %6.2f consultas/petición" % (
+					name, summary['rps'], summary['p50_ms'], summary['p95_ms'], summary['p99_ms'],
+					summary['queries_per_request'],
+				)
+			)
+
+	def compare(self, results: dict, baseline_path: str, tolerance: float):
+		with open(baseline_path, encoding='utf-8') as file:
+			baseline = json.load(file)
+
+		regressions = []
+		for name, summary in results['endpoints'].items():
+			previous = baseline.get('endpoints', {}).get(name)
+			if not previous:
+				continue
+			for metric in COMPARED_METRICS:
+				before, after = previous.get(metric, 0), summary[metric]
+				if before and after > before * (1 + tolerance):
+					regressions.append("%s %s: %s → %s" % (name, metric, before, after))
+
+		if regressions:
+			raise CommandError("Regresiones respecto a %s:\n  %s" % (baseline_path, '\n  '.join(regressions)))
+		self.stdout.write(self.style.SUCCESS("Sin regresiones respecto a %s" % baseline_path))
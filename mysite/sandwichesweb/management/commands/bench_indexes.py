@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from ...bench import summarize, throwaway_database, write_results
+from ...billing import orders_of_purchase
+from ...models import *
+
+# Modelos con índices propios (``Meta.indexes``), que se eliminan para medir sin ellos.
+INDEXED_MODELS = [Sandwich, Drink, SideDish, Combo, Ingredient, Addition, Order, Bill, QuantityOfProducts, Detail]
+# Proporción de productos activos en el catálogo sintético: el resto son productos históricos desactivados.
+ACTIVE_RATIO = 0.05
+# Pedidos de cada compra sintética.
+KINDS = [
+	('sandwich', Product.ListProducts.SANDWICH.label),
+	('drink', Product.ListProducts.DRINK.label),
+	('side_dish', Product.ListProducts.SIDE_DISH.label),
+]
+
+
+class Command(BaseCommand):
+	help = (
+		"Mide las consultas más frecuentes (menú, ingredientes, pedidos de una compra, detalles y cantidades de una "
+		"factura, facturas de un cliente) sobre un conjunto grande de datos sintéticos, con y sin los índices de los "
+		"modelos, en una base de datos desechable."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--products', type=int, default=20000, help="Registros por modelo del catálogo.")
+		parser.add_argument('--purchases', type=int, default=20000, help="Compras con factura.")
+		parser.add_argument('--repeat', type=int, default=50, help="Repeticiones de cada consulta.")
+		parser.add_argument('--seed', type=int, default=0, help="Semilla de los datos y de las consultas.")
+		parser.add_argument('--explain', action='store_true', help="Muestra el plan de cada consulta.")
+		parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+
+	def handle(self, *args, **options):
+		rng = random.Random(options['seed'])
+
+		with throwaway_database():
+			self.seed(rng, options['products'], options['purchases'])
+			queries = self.queries(rng, options['purchases'])
+
+			indexed = self.measure(queries, options['repeat'], options['explain'], "con índices")
+			self.drop_indexes()
+			plain = self.measure(queries, options['repeat'], options['explain'], "sin índices")
+
+		results = {
+			'products': options['products'],
+			'purchases': options['purchases'],
+			'repeat': options['repeat'],
+			'queries': {
+				name: {'indexed': indexed[name], 'plain': plain[name]} for name in queries
+			},
+		}
+
+		self.stdout.write(self.style.MIGRATE_HEADING(
+			"%d productos por modelo, %d compras, %d repeticiones (p50)" % (
+				options['products'], options['purchases'], options['repeat'],
+			)
+		))
+		for name, result in results['queries'].items():
+			before, after = result['plain']['p50_ms'], result['indexed']['p50_ms']
+			self.stdout.write("  %-12s sin índices %9.3f ms  con índices %9.3f ms  %7.1fx" % (
+				name, before, after, before / after if after else 0.0,
+			))
+
+		if options['output']:
+			write_results(options['output'], results)
+			self.stdout.write(self.style.SUCCESS("Resultados guardados en %s" % options['output']))
+
+	def seed(self, rng: random.Random, products: int, purchases: int):
+		"""Crea el catálogo y las compras con inserciones masivas, asignando los id de antemano.
+		"""
+		self.stdout.write("Creando los datos sintéticos...")
+
+		def is_active():
+			return rng.random() < ACTIVE_RATIO
+
+		def price():
+			return Decimal(rng.randint(50, 2000)) / 100
+
+		def bulk(model, objs):
+			model.objects.bulk_create(objs, batch_size=500)
+
+		bulk(Sandwich, [
+			Sandwich(id=i, size='Tamaño %06d' % rng.randrange(products), price=price(), is_activated=is_active())
+			for i in range(1, products + 1)
+		])
+		for model in (Drink, SideDish, Combo, Ingredient):
+			bulk(model, [
+				model(id=i, name='%s %06d' % (model.__name__, rng.randrange(products)), price=price(), is_activated=is_active())
+				for i in range(1, products + 1)
+			])
+
+		now = timezone.now()
+		clients = max(1, purchases // 4)
+		bulk(Purchase, [Purchase(id=i) for i in range(1, purchases + 1)])
+		bulk(Bill, [
+			Bill(
+				id=i, purchase_id=i, total=0, ci_client=rng.randint(1, clients), first_name_client='Cliente',
+				surname_client=str(i), date=now - timedelta(minutes=i),
+			)
+			for i in range(1, purchases + 1)
+		])
+
+		orders, additions, details, quantities = [], [], [], []
+		for purchase in range(1, purchases + 1):
+			for kind, label in KINDS:
+				order = Order(id=len(orders) + 1, purchase_id=purchase, sub_total=price())
+				if kind == 'sandwich':
+					for _ in range(2):
+						additions.append(Addition(
+							id=len(additions) + 1, order_id=order.id,
+							sandwich_id=rng.randint(1, products), ingredient_id=rng.randint(1, products),
+						))
+				else:
+					setattr(order, kind + '_id', rng.randint(1, products))
+				orders.append(order)
+				details.append(Detail(id=len(details) + 1, bill_id=purchase, product=label, price=order.sub_total))
+				quantities.append(QuantityOfProducts(id=len(quantities) + 1, bill_id=purchase, product=label, quantity=1))
+
+		for model, objs in ((Order, orders), (Addition, additions), (Detail, details), (QuantityOfProducts, quantities)):
+			bulk(model, objs)
+
+		if connection.vendor in ('sqlite', 'postgresql'):
+			with connection.cursor() as cursor:
+				cursor.execute('ANALYZE')
+
+	def queries(self, rng: random.Random, purchases: int) -> dict:
+		"""Consultas a medir. Cada una recibe el número de repetición y elige sus parámetros al azar.
+		"""
+		bills = [rng.randint(1, purchases) for _ in range(1000)]
+		clients = list(Bill.objects.filter(pk__in=bills[:100]).values_list('ci_client', flat=True))
+
+		return {
+			'menu': lambda i: [
+				list(Sandwich.active.order_by('size')),
+				list(Drink.active.order_by('name')),
+				list(SideDish.active.order_by('name')),
+				list(Combo.active.order_by('name')),
+			],
+			'ingredients': lambda i: list(Ingredient.active.order_by('name')),
+			'orders': lambda i: orders_of_purchase(bills[i % len(bills)]),
+			'details': lambda i: list(Detail.objects.filter(bill_id=bills[i % len(bills)])),
+			'quantities': lambda i: list(QuantityOfProducts.objects.filter(bill_id=bills[i % len(bills)])),
+			'client_bills': lambda i: list(
+				Bill.objects.filter(ci_client=clients[i % len(clients)]).order_by('-date')[:20]
+			),
+		}
+
+	def measure(self, queries: dict, repeat: int, explain: bool, label: str) -> dict:
+		results = {}
+		for name, query in queries.items():
+			query(0)  # Una vez antes de medir, para cargar las páginas de la base de datos.
+			latencies = []
+			start = time.perf_counter()
+			for i in range(repeat):
+				query_start = time.perf_counter()
+				query(i)
+				latencies.append(time.perf_counter() - query_start)
+			results[name] = summarize(latencies, time.perf_counter() - start)
+
+		if explain:
+			self.explain(queries, label)
+
+		return results
+
+	def explain(self, queries: dict, label: str):
+		self.stdout.write(self.style.MIGRATE_HEADING("Planes (%s)" % label))
+		for name, query in queries.items():
+			plans = []
+
+			def capture(execute, sql, params, many, context):
+				if sql.lstrip().upper().startswith('SELECT'):
+					with connection.cursor() as cursor:
+						cursor.execute('EXPLAIN ' + ('QUERY PLAN ' if connection.vendor == 'sqlite' else '') + sql, params)
+						plans.append(' | '.join(str(row[-1]) for row in cursor.fetchall()))
+				return execute(sql, params, many, context)
+
+			with connection.execute_wrapper(capture):
+				query(0)
+			for plan in plans:
+				self.stdout.write("  %-12s %s" % (name, plan))
+
+	def drop_indexes(self):
+		with connection.schema_editor() as editor:
+			for model in INDEXED_MODELS:
+				for index in model._meta.indexes:
+					editor.remove_index(model, index)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import override_settings
+from django.utils.functional import SimpleLazyObject
+
+from ...bench import seed_catalog, summarize, throwaway_database, write_results
+from ...menu import get_menu
+from ...models import *
+from ...promotions import applicable_promotions
+
+LOADERS = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+
+# Modo, si se usa el cargador de plantillas con caché y si se guardan los fragmentos ({% cache %}).
+MODES = [
+	('before', False, False),
+	('cached_loader', True, False),
+	('after', True, True),
+]
+
+
+def template_engine(cached_loader: bool) -> DjangoTemplates:
+	loaders = [('django.template.loaders.cached.Loader', LOADERS)] if cached_loader else LOADERS
+	return DjangoTemplates({
+		'NAME': 'bench_render',
+		'DIRS': [],
+		'APP_DIRS': False,
+		'OPTIONS': {'loaders': loaders},
+	})
+
+
+def fragments_cache(enabled: bool) -> dict:
+	backend = 'locmem.LocMemCache' if enabled else 'dummy.DummyCache'
+	return {'BACKEND': 'django.core.cache.backends.' + backend, 'LOCATION': 'bench_render'}
+
+
+class Command(BaseCommand):
+	help = (
+		"Mide el tiempo de generación de las páginas del menú (order.html) y de las ofertas (index.html): sin caché "
+		"(before), solo con el cargador de plantillas con caché (cached_loader) y además con los fragmentos en "
+		"caché según la versión del catálogo (after). Corre sobre una base de datos desechable."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--renders', type=int, default=500, help="Páginas generadas por medición.")
+		parser.add_argument('--products', type=int, default=40, help="Bebidas adicionales en el menú.")
+		parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+
+	def handle(self, *args, **options):
+		results = {'renders': options['renders'], 'products': options['products'], 'modes': {}}
+		with throwaway_database():
+			seed_catalog()
+			for number in range(options['products']):
+				Drink.objects.create(name='Bebida %d' % number, price=Decimal('1.25'))
+
+			# Los mismos contextos de views.order_view y views.index_view.
+			contexts = {
+				'sandwichesweb/order.html': lambda number: {
+					'csrf_token': 'bench', 'menu': SimpleLazyObject(get_menu), 'order': {'number': number},
+				},
+				'sandwichesweb/index.html': lambda number: {
+					'csrf_token': 'bench', 'promotions_list': applicable_promotions(),
+				},
+			}
+			for mode, cached_loader, fragments in MODES:
+				caches = dict(settings.CACHES, template_fragments=fragments_cache(fragments))
+				with override_settings(CACHES=caches):
+					engine = template_engine(cached_loader)
+					results['modes'][mode] = {
+						name: self.run(engine, name, context, options['renders']) for name, context in contexts.items()
+					}
+
+		for mode, pages in results['modes'].items():
+			self.stdout.write(self.style.MIGRATE_HEADING(mode))
+			for name, result in pages.items():
+				self.stdout.write(
+					"  %-26s p50 %7.3f ms  p95 %7.3f ms  %8.1f páginas/s"
+					% (name, result['p50_ms'], result['p95_ms'], result['rps'])
+				)
+
+		if options['output']:
+			write_results(options['output'], results)
+			self.stdout.write(self.style.SUCCESS("Resultados guardados en %s" % options['output']))
+
+	@staticmethod
+	def run(engine, name: str, context, renders: int) -> dict:
+		latencies = []
+		begin = time.perf_counter()
+		for number in range(renders):
+			start = time.perf_counter()
+			engine.get_template(name).render(context(number))
+			latencies.append(time.perf_counter() - start)
+
+		return summarize(latencies, time.perf_counter() - begin)
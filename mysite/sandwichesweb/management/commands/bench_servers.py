@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+from ...bench import ThreadSampler, seed_catalog, summarize, throwaway_database, write_results
+
+ENDPOINTS = [
+	('index', '/sandwichesweb/'),
+	('order', '/sandwichesweb/order/'),
+	('client', '/sandwichesweb/client/'),
+]
+
+
+class Command(BaseCommand):
+	help = (
+		"Compara el rendimiento de las vistas síncronas (WSGI, un hilo por conexión) con el de las vistas asíncronas "
+		"(ASGI, un solo ciclo de eventos) bajo conexiones simultáneas. Las peticiones se hacen dentro del proceso, "
+		"con los clientes de prueba de Django, sobre una base de datos desechable."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--requests', type=int, default=500, help="Peticiones por ruta y por modo.")
+		parser.add_argument('--concurrency', type=int, default=50, help="Conexiones simultáneas.")
+		parser.add_argument('--output', help="Archivo JSON donde guardar los resultados.")
+
+	def handle(self, *args, **options):
+		total = options['requests']
+		concurrency = options['concurrency']
+
+		with throwaway_database():
+			seed_catalog()
+			results = {
+				'requests': total,
+				'concurrency': concurrency,
+				'wsgi': self.run_wsgi(total, concurrency),
+			}
+			results['asgi'] = self.run_asgi(total, concurrency)
+
+		for mode in ('wsgi', 'asgi'):
+			self.stdout.write(self.style.MIGRATE_HEADING(mode.upper()))
+			for name, summary in results[mode].items():
+				self.stdout.write(
+					"  %-8s %8.1f req/s  p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  hilos %3d" % (
+						name, summary['rps'], summary['p50_ms'], summary['p95_ms'], summary['p99_ms'],
+						summary['peak_threads'],
+					)
+				)
+
+		if options['output']:
+			write_results(options['output'], results)
+			self.stdout.write(self.style.SUCCESS("Resultados guardados en %s" % options['output']))
+
+	def run_wsgi(self, total: int, concurrency: int) -> dict:
+		local = threading.local()
+
+		def request(path):
+			if not hasattr(local, 'client'):
+				local.client = Client()
+			start = time.perf_counter()
+			local.client.get(path)
+			return time.perf_counter() - start
+
+		results = {}
+		for name, path in ENDPOINTS:
+			Client().get(path)  # Calienta las cachés.
+			with ThreadSampler() as sampler, ThreadPoolExecutor(max_workers=concurrency) as executor:
+				start = time.perf_counter()
+				latencies = list(executor.map(request, [path] * total))
+				elapsed = time.perf_counter() - start
+			results[name] = dict(summarize(latencies, elapsed), peak_threads=sampler.peak)
+
+		return results
+
+	def run_asgi(self, total: int, concurrency: int) -> dict:
+		async def worker(path, count, latencies):
+			client = AsyncClient()
+			for _ in range(count):
+				start = time.perf_counter()
+				await client.get(path)
+				latencies.append(time.perf_counter() - start)
+
+		async def run(path):
+			await AsyncClient().get(path)  # Calienta las cachés.
+			latencies = []
+			counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+			start = time.perf_counter()
+			await asyncio.gather(*(worker(path, count, latencies) for count in counts if count))
+			return latencies, time.perf_counter() - start
+
+		results = {}
+		for name, path in ENDPOINTS:
+			with ThreadSampler() as sampler:
+				latencies, elapsed = asyncio.run(run(path))
+			results[name] = dict(summarize(latencies, elapsed), peak_threads=sampler.peak)
+
+		return results
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from ...images import generate_derivatives
+from ...models import *
+from ...versioning import bump_version
+
+
+class Command(BaseCommand):
+	help = "Genera las versiones reducidas de las fotos de todos los productos que todavía no las tienen."
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			'--all', action='store_true',
+			help="Revisa también los productos que ya tienen versiones reducidas."
+		)
+
+	def handle(self, *args, **options):
+		generated = 0
+		for model in [Sandwich, Drink, SideDish, Combo]:
+			queryset = model.objects.exclude(photo='').exclude(photo__isnull=True)
+			if not options['all']:
+				queryset = queryset.filter(photo_hash='')
+
+			for pk, name in queryset.values_list('pk', 'photo'):
+				try:
+					photo_hash, extension = generate_derivatives(name)
+				except (OSError, ValueError) as error:
+					self.stderr.write("%s: %s" % (name, error))
+					continue
+				model.objects.filter(pk=pk).update(photo_hash='%s.%s' % (photo_hash, extension))
+				generated += 1
+				self.stdout.write(name)
+
+		if generated:
+			bump_version('menu')
+		self.stdout.write(self.style.SUCCESS("%d fotos procesadas." % generated))
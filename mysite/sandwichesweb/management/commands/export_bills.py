@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from ...export import CHUNK_SIZE, EXPORT_FORMATS, archived_between, bills_between, export_lines, month_range
+
+
+class Command(BaseCommand):
+	help = (
+		"Exporta las facturas de un mes, o entre dos fechas, con sus detalles y cantidades de productos, en CSV o "
+		"JSON Lines, incluidas las de las compras archivadas. Escribe cada línea apenas se genera."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--month', help="Mes a exportar (AAAA-MM). Por defecto, el mes en curso.")
+		parser.add_argument('--from', dest='start', help="Primer día a exportar (AAAA-MM-DD).")
+		parser.add_argument('--to', dest='end', help="Último día a exportar (AAAA-MM-DD). Por defecto, hoy.")
+		parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+		parser.add_argument('--output', help="Archivo de salida. Por defecto, la salida estándar.")
+		parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Facturas leídas por bloque.")
+
+	def handle(self, *args, **options):
+		try:
+			if options['start'] or options['end']:
+				end = parse_date(options['end']) if options['end'] else timezone.localdate()
+				start = parse_date(options['start']) if options['start'] else end.replace(day=1)
+				if start is None or end is None:
+					raise ValueError()
+			else:
+				start, end = month_range(options['month'] or timezone.localdate().strftime('%Y-%m'))
+		except ValueError:
+			raise CommandError("Fecha inválida.")
+
+		lines = export_lines(
+			bills_between(start, end), options['format'], options['chunk_size'], archived_between(start, end)
+		)
+		if not options['output']:
+			for line in lines:
+				self.stdout.write(line, ending='')
+			return
+
+		count = 0
+		with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+			for line in lines:
+				output.write(line)
+				count += 1
+		self.stdout.write(self.style.SUCCESS(
+			"%d líneas escritas en %s (%s a %s)." % (count, options['output'], start, end)
+		))
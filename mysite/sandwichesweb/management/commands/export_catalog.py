@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalog import CATALOG_FORMATS, export_catalog, write_catalog
+
+
+class Command(BaseCommand):
+	help = "Exporta el catálogo activo a un archivo JSON o CSV, en el formato que lee import_catalog."
+
+	def add_arguments(self, parser):
+		parser.add_argument('path', help="Archivo de salida.")
+		parser.add_argument('--format', choices=CATALOG_FORMATS, help="Por defecto, según la extensión del archivo.")
+
+	def handle(self, *args, **options):
+		catalog_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+		if catalog_format not in CATALOG_FORMATS:
+			raise CommandError("Formato desconocido: use --format (%s)." % ", ".join(CATALOG_FORMATS))
+
+		catalog = export_catalog()
+		with open(options['path'], 'w', encoding='utf-8', newline='') as file:
+			write_catalog(catalog, file, catalog_format)
+
+		self.stdout.write(self.style.SUCCESS("Catálogo exportado en %s." % options['path']))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalog import CATALOG_FORMATS, CatalogError, import_catalog, read_catalog
+
+
+class Command(BaseCommand):
+	help = (
+		"Importa el catálogo completo desde un archivo JSON o CSV. Aplica solo las diferencias con el catálogo "
+		"actual, en una sola transacción, y desactiva lo que no esté en el archivo."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('path', help="Archivo del catálogo.")
+		parser.add_argument('--format', choices=CATALOG_FORMATS, help="Por defecto, según la extensión del archivo.")
+		parser.add_argument('--dry-run', action='store_true', help="Muestra los cambios sin aplicarlos.")
+
+	def handle(self, *args, **options):
+		catalog_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+		if catalog_format not in CATALOG_FORMATS:
+			raise CommandError("Formato desconocido: use --format (%s)." % ", ".join(CATALOG_FORMATS))
+
+		start = time.perf_counter()
+		try:
+			with open(options['path'], encoding='utf-8', newline='') as file:
+				summary = import_catalog(read_catalog(file, catalog_format), dry_run=options['dry_run'])
+		except (OSError, CatalogError) as error:
+			raise CommandError(str(error))
+		elapsed = time.perf_counter() - start
+
+		for kind, changes in summary.items():
+			self.stdout.write(
+				"%-15s %4d nuevos, %4d actualizados, %4d desactivados"
+				% (kind, changes['created'], changes['updated'], changes['deactivated'])
+			)
+
+		action = "comparado (sin aplicar los cambios)" if options['dry_run'] else "importado"
+		self.stdout.write(self.style.SUCCESS("Catálogo %s en %.3f s." % (action, elapsed)))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Menú de la tienda.
+
+El menú (sándwiches, bebidas, acompañantes y combos activos) se construye una sola vez y se guarda en la caché bajo
+la versión 'menu', que cambia cuando se guarda o elimina alguno de sus productos (ver ``signals.py``). Mientras la
+versión no cambie, mostrar el menú no consulta la base de datos.
+"""
+import time
+
+from django.core.cache import cache
+
+from .conf import get_setting
+from .models import *
+from .versioning import get_version
+
+MENU = 'menu'
+LATEST_KEY = 'sandwichesweb:menu:latest'
+LOCK_KEY = 'sandwichesweb:menu:lock'
+
+
+def build_menu() -> dict:
+	"""Consulta en la base de datos los productos activos del menú.
+
+	Los combos se cargan junto con su resumen (``ComboSummary``). Los resúmenes se guardan al cambiar un combo o sus
+	productos (ver ``combos.py``), nunca al mostrar el menú.
+
+	:return: diccionario con las listas 'sandwiches_list', 'drinks_list', 'side_dishes_list' y 'combo_list'.
+	:rtype: dict
+	"""
+	return {
+		'sandwiches_list': list(Sandwich.active.order_by('size')),
+		'drinks_list': list(Drink.active.order_by('name')),
+		'side_dishes_list': list(SideDish.active.order_by('name')),
+		'combo_list': list(Combo.active.select_related('summary').order_by('name')),
+	}
+
+
+def menu_key() -> str:
+	return 'sandwichesweb:menu:%s' % get_version(MENU)
+
+
+def get_menu() -> dict:
+	"""Obtiene el menú vigente desde la caché, construyéndolo si hace falta.
+
+	Si muchas peticiones encuentran la caché vacía a la vez, solo una reconstruye el menú. Las demás usan el menú
+	anterior si existe, o esperan a que la primera termine.
+
+	:return: el mismo diccionario de ``build_menu``.
+	:rtype: dict
+	"""
+	key = menu_key()
+
+	menu = cache.get(key)
+	if menu is not None:
+		return menu
+
+	timeout = get_setting('MENU_TIMEOUT')
+	lock_timeout = get_setting('MENU_LOCK_TIMEOUT')
+	if cache.add(LOCK_KEY, key, lock_timeout):
+		try:
+			menu = build_menu()
+			cache.set_many({key: menu, LATEST_KEY: menu}, timeout)
+		finally:
+			cache.delete(LOCK_KEY)
+		return menu
+
+	# Otra petición está reconstruyendo el menú.
+	stale = cache.get(LATEST_KEY)
+	if stale is not None:
+		return stale
+
+	deadline = time.monotonic() + lock_timeout
+	while time.monotonic() < deadline:
+		time.sleep(0.05)
+		menu = cache.get(key)
+		if menu is not None:
+			return menu
+
+	return build_menu()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Métricas de las peticiones, agrupadas por nombre de ruta.
+
+``TimingMiddleware`` (ver ``middleware.py``) mide cada petición y la registra aquí. Cada ruta tiene histogramas del
+tiempo de la vista, del tiempo en la base de datos, del tiempo de las plantillas y de la cantidad de consultas. Los
+datos se guardan en la memoria del proceso y se exponen en texto plano, en el formato de Prometheus, en la ruta
+``sandwichesweb:metrics``.
+"""
+import threading
+from bisect import bisect_left
+
+# Límites superiores de los intervalos, en milisegundos.
+TIME_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Límites superiores de los intervalos de cantidad de consultas.
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Nombre de la métrica, descripción y límites de sus intervalos.
+METRICS = {
+	'view_ms': ("Tiempo total de la petición, en milisegundos.", TIME_BUCKETS),
+	'db_ms': ("Tiempo en la base de datos, en milisegundos.", TIME_BUCKETS),
+	'template_ms': ("Tiempo de las plantillas, en milisegundos.", TIME_BUCKETS),
+	'queries': ("Consultas SQL por petición.", QUERY_BUCKETS),
+}
+
+
+class Histogram:
+	"""Histograma acumulativo con intervalos fijos.
+	"""
+	def __init__(self, buckets: tuple):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)  # El último intervalo es +Inf.
+		self.count = 0
+		self.sum = 0.0
+
+	def observe(self, value: float):
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.count += 1
+		self.sum += value
+
+
+class MetricsRegistry:
+	"""Histogramas de las peticiones, por nombre de ruta.
+	"""
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._routes = {}
+
+	def record(self, route: str, values: dict):
+		"""Registra las mediciones de una petición.
+
+		:param route: nombre de la ruta (por ejemplo, 'sandwichesweb:order').
+		:param values: valor de cada métrica de ``METRICS``.
+		"""
+		with self._lock:
+			histograms = self._routes.get(route)
+			if histograms is None:
+				histograms = {name: Histogram(buckets) for name, (_, buckets) in METRICS.items()}
+				self._routes[route] = histograms
+			for name, value in values.items():
+				histograms[name].observe(value)
+
+	def reset(self):
+		with self._lock:
+			self._routes = {}
+
+	def render(self) -> str:
+		"""Genera el texto de las métricas, en el formato de exposición de Prometheus.
+
+		:rtype: str
+		"""
+		lines = []
+		with self._lock:
+			routes = sorted(self._routes.items())
+			for name, (description, buckets) in METRICS.items():
+				metric = 'sandwichesweb_request_' + name
+				lines.append('# HELP %s %s' % (metric, description))
+				lines.append('# TYPE %s histogram' % metric)
+				for route, histograms in routes:
+					histogram = histograms[name]
+					cumulative = 0
+					for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+						cumulative += count
+						lines.append('%s_bucket{route="%s",le="%s"} %d' % (metric, route, bound, cumulative))
+					lines.append('%s_sum{route="%s"} %.3f' % (metric, route, histogram.sum))
+					lines.append('%s_count{route="%s"} %d' % (metric, route, histogram.count))
+
+		return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import asyncio
+import contextvars
+import time
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .async_views import run_blocking
+from .conf import get_setting
+from .metrics import registry
+
+# Mediciones de la petición en curso. Es una variable de contexto para que las consultas hechas en otros hilos
+# (por ejemplo, con async_views.run_blocking) se sumen a la petición que las originó.
+_current = contextvars.ContextVar('sandwichesweb_timings', default=None)
+
+
+class RequestTimings:
+	"""Tiempos acumulados durante una petición, en segundos.
+	"""
+	__slots__ = ('queries', 'db', 'template')
+
+	def __init__(self):
+		self.queries = 0
+		self.db = 0.0
+		self.template = 0.0
+
+
+def _timed_execute(execute, sql, params, many, context):
+	timings = _current.get()
+	if timings is None:
+		return execute(sql, params, many, context)
+
+	start = time.perf_counter()
+	try:
+		return execute(sql, params, many, context)
+	finally:
+		timings.db += time.perf_counter() - start
+		timings.queries += 1
+
+
+def _install_execute_wrapper(connection, **kwargs):
+	if _timed_execute not in connection.execute_wrappers:
+		connection.execute_wrappers.append(_timed_execute)
+
+
+def install_timing_hooks():
+	"""Conecta las mediciones de ``TimingMiddleware`` a las conexiones de la base de datos. Se llama una sola vez, en
+	``SandwichesWebConfig.ready``.
+
+	Fuera de una petición medida, las consultas no cambian.
+	"""
+	connection_created.connect(_install_execute_wrapper, dispatch_uid='sandwichesweb_timings')
+	for connection in connections.all():
+		_install_execute_wrapper(connection)
+
+
+class TimingMiddleware:
+	"""Mide cada petición: cantidad de consultas SQL, tiempo en la base de datos, tiempo de la plantilla de la
+	respuesta (si la vista retorna un ``TemplateResponse``) y tiempo total de la vista.
+
+	Agrega las mediciones a la respuesta en el encabezado ``Server-Timing`` y las registra en ``metrics.registry``,
+	agrupadas por el nombre de la ruta. Debe ser el primer middleware, para que el tiempo total incluya a los demás.
+
+	Funciona tanto con WSGI como con ASGI: con ASGI atiende la petición en el ciclo de eventos, sin pasar a un hilo.
+	En las respuestas por partes (``StreamingHttpResponse``), las consultas hechas al generar el contenido también
+	se cuentan, y la petición se registra cuando se termina de enviar.
+	"""
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		if asyncio.iscoroutinefunction(get_response):
+			# Marca la instancia como asíncrona, igual que ``MiddlewareMixin``.
+			self._is_coroutine = asyncio.coroutines._is_coroutine
+			self.process_template_response = self.aprocess_template_response
+
+	def __call__(self, request):
+		if asyncio.iscoroutinefunction(self.get_response):
+			return self.__acall__(request)
+
+		timings = RequestTimings()
+		token = _current.set(timings)
+		start = time.perf_counter()
+		try:
+			response = self.get_response(request)
+		finally:
+			_current.reset(token)
+
+		return self.finish(request, response, timings, start)
+
+	async def __acall__(self, request):
+		timings = RequestTimings()
+		token = _current.set(timings)
+		start = time.perf_counter()
+		try:
+			response = await self.get_response(request)
+		finally:
+			_current.reset(token)
+
+		return self.finish(request, response, timings, start)
+
+	def process_template_response(self, request, response):
+		return self.timed_render(response)
+
+	async def aprocess_template_response(self, request, response):
+		# Con ASGI, la plantilla se genera en el grupo de hilos de las vistas asíncronas, fuera del ciclo de eventos.
+		return await run_blocking(self.timed_render, response)
+
+	@staticmethod
+	def timed_render(response):
+		"""Genera la plantilla de un ``TemplateResponse`` midiendo el tiempo. Django ya no vuelve a generarla.
+		"""
+		timings = _current.get()
+		start = time.perf_counter()
+		try:
+			response.render()
+		finally:
+			if timings is not None:
+				timings.template += time.perf_counter() - start
+
+		return response
+
+	def finish(self, request, response, timings: RequestTimings, start: float):
+		"""Agrega el encabezado ``Server-Timing`` y registra la petición, o lo deja para cuando termine el contenido
+		de una respuesta por partes.
+		"""
+		match = request.resolver_match
+		route = match.view_name if match else '<unresolved>'
+
+		total = time.perf_counter() - start
+		response['Server-Timing'] = (
+			'db;dur=%.2f;desc="%d queries", tpl;dur=%.2f, view;dur=%.2f' % (
+				timings.db * 1000, timings.queries, timings.template * 1000, total * 1000,
+			)
+		)
+
+		if response.streaming:
+			response.streaming_content = self.timed_stream(response.streaming_content, route, timings, start)
+		else:
+			self.record(route, timings, total)
+
+		return response
+
+	@staticmethod
+	def timed_stream(content, route: str, timings: RequestTimings, start: float):
+		"""Genera el contenido de una respuesta por partes con las mediciones de la petición activas.
+		"""
+		parts = iter(content)
+		try:
+			while True:
+				token = _current.set(timings)
+				try:
+					part = next(parts)
+				except StopIteration:
+					return
+				finally:
+					_current.reset(token)
+				yield part
+		finally:
+			TimingMiddleware.record(route, timings, time.perf_counter() - start)
+
+	@staticmethod
+	def record(route: str, timings: RequestTimings, total: float):
+		registry.record(route, {
+			'view_ms': total * 1000,
+			'db_ms': timings.db * 1000,
+			'template_ms': timings.template * 1000,
+			'queries': timings.queries,
+		})
+
+
+class ASGIUrlconfMiddleware:
+	"""Resuelve las peticiones ASGI con el módulo de rutas ``SANDWICHESWEB_ASGI_URLCONF`` (por ejemplo,
+	``mysite.asgi_urls``, con las vistas asíncronas), y las WSGI con ``ROOT_URLCONF``.
+
+	Las dos configuraciones comparten las URL y los nombres, así que ``reverse`` da lo mismo en ambas.
+	"""
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		if asyncio.iscoroutinefunction(get_response):
+			self._is_coroutine = asyncio.coroutines._is_coroutine
+
+	def __call__(self, request):
+		if asyncio.iscoroutinefunction(self.get_response):
+			return self.__acall__(request)
+
+		return self.get_response(request)
+
+	async def __acall__(self, request):
+		urlconf = get_setting('ASGI_URLCONF')
+		if urlconf:
+			request.urlconf = urlconf
+
+		return await self.get_response(request)
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0004_detail_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='combo',
+            name='photo_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=24, verbose_name='hash de la foto'),
+        ),
+        migrations.AddField(
+            model_name='drink',
+            name='photo_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=24, verbose_name='hash de la foto'),
+        ),
+        migrations.AddField(
+            model_name='sandwich',
+            name='photo_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=24, verbose_name='hash de la foto'),
+        ),
+        migrations.AddField(
+            model_name='sidedish',
+            name='photo_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=24, verbose_name='hash de la foto'),
+        ),
+    ]
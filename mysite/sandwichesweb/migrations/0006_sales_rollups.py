@@ -0,0 +1,57 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0005_product_photo_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_activated', models.BooleanField(default=True)),
+                ('day', models.DateField(verbose_name='día')),
+                ('product', models.CharField(choices=[('Sándwich', 'Sándwich'), ('Bebida', 'Bebida'), ('Acompañante', 'Acompañante'), ('Combo', 'Combo')], max_length=30, verbose_name='tipo de producto')),
+                ('name', models.CharField(max_length=30, verbose_name='producto')),
+                ('quantity', models.IntegerField(default=0, verbose_name='cantidad vendida')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='total vendido')),
+            ],
+            options={
+                'verbose_name': 'Ventas por día',
+                'verbose_name_plural': 'Ventas por día',
+                'db_table': 'sw_daily_sales',
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_activated', models.BooleanField(default=True)),
+                ('period', models.DateTimeField(verbose_name='hora')),
+                ('product', models.CharField(choices=[('Sándwich', 'Sándwich'), ('Bebida', 'Bebida'), ('Acompañante', 'Acompañante'), ('Combo', 'Combo')], max_length=30, verbose_name='tipo de producto')),
+                ('name', models.CharField(max_length=30, verbose_name='producto')),
+                ('quantity', models.IntegerField(default=0, verbose_name='cantidad vendida')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='total vendido')),
+            ],
+            options={
+                'verbose_name': 'Ventas por hora',
+                'verbose_name_plural': 'Ventas por hora',
+                'db_table': 'sw_hourly_sales',
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlysales',
+            constraint=models.UniqueConstraint(fields=('period', 'product', 'name'), name='sw_hourly_sales_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('day', 'product', 'name'), name='sw_daily_sales_unique'),
+        ),
+    ]
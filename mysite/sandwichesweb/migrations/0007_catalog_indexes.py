@@ -0,0 +1,74 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0006_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='addition',
+            name='order',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'is_activated': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order', related_query_name='order', to='sandwichesweb.order'),
+        ),
+        migrations.AlterField(
+            model_name='detail',
+            name='bill',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'is_activated': True}, on_delete=django.db.models.deletion.CASCADE, to='sandwichesweb.bill'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='purchase',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'is_activated': True}, null=True, on_delete=django.db.models.deletion.CASCADE, to='sandwichesweb.purchase'),
+        ),
+        migrations.AlterField(
+            model_name='quantityofproducts',
+            name='bill',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'is_activated': True}, on_delete=django.db.models.deletion.CASCADE, to='sandwichesweb.bill'),
+        ),
+        migrations.AddIndex(
+            model_name='addition',
+            index=models.Index(fields=['order', 'id'], name='sw_addition_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['ci_client', 'date'], name='sw_bill_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='combo',
+            index=models.Index(condition=models.Q(is_activated=True), fields=['name'], name='sw_combo_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['bill', 'product'], name='sw_detail_bill_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drink',
+            index=models.Index(condition=models.Q(is_activated=True), fields=['name'], name='sw_drink_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(condition=models.Q(is_activated=True), fields=['name'], name='sw_ingredient_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['purchase', 'id'], name='sw_order_purchase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quantityofproducts',
+            index=models.Index(fields=['bill', 'product'], name='sw_quantity_bill_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sandwich',
+            index=models.Index(condition=models.Q(is_activated=True), fields=['size'], name='sw_sandwich_active_size_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sidedish',
+            index=models.Index(condition=models.Q(is_activated=True), fields=['name'], name='sw_side_dish_active_name_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0007_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_activated', models.BooleanField(default=True)),
+                ('day', models.DateField(unique=True, verbose_name='día')),
+                ('last_number', models.IntegerField(default=0, verbose_name='último número reservado')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de números de pedido',
+                'verbose_name_plural': 'Secuencias de números de pedido',
+                'db_table': 'sw_order_number_sequence',
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='day',
+            field=models.DateField(editable=False, null=True, verbose_name='día del número del pedido'),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('day', 'number'), name='sw_order_day_number_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0008_order_numbers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='reference',
+            field=models.CharField(editable=False, max_length=40, null=True, unique=True, verbose_name='referencia del quiosco'),
+        ),
+    ]
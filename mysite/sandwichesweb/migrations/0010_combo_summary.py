@@ -0,0 +1,73 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:42
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Campo de ProductsInCombo, tipo de producto y campo con el nombre del producto (ver combos.COMPONENT_FIELDS).
+COMPONENT_FIELDS = [
+    ('sandwich', 'Sándwich', 'size'),
+    ('drink', 'Bebida', 'name'),
+    ('side_dish', 'Acompañante', 'name'),
+]
+
+
+def backfill_summaries(apps, schema_editor):
+    """Guarda los resúmenes de los combos existentes, igual que combos.build_summaries."""
+    Combo = apps.get_model('sandwichesweb', 'Combo')
+    ComboSummary = apps.get_model('sandwichesweb', 'ComboSummary')
+    ProductsInCombo = apps.get_model('sandwichesweb', 'ProductsInCombo')
+
+    components = defaultdict(list)
+    links = ProductsInCombo.objects.filter(is_activated=True).select_related('sandwich', 'drink', 'side_dish')
+    for link in links.order_by('pk'):
+        for field, product, name_field in COMPONENT_FIELDS:
+            item = getattr(link, field)
+            if item is not None and item.is_activated:
+                components[link.combo_id].append({
+                    'product': product,
+                    'id': item.id,
+                    'name': getattr(item, name_field),
+                    'price': str(item.price),
+                })
+
+    summaries = []
+    for combo in Combo.objects.all():
+        parts_total = sum((Decimal(item['price']) for item in components[combo.id]), Decimal(0))
+        summaries.append(ComboSummary(
+            combo=combo,
+            components=components[combo.id],
+            parts_total=parts_total,
+            savings=max(parts_total - combo.price, Decimal(0)),
+        ))
+    ComboSummary.objects.bulk_create(summaries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0009_purchase_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComboSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_activated', models.BooleanField(default=True)),
+                ('components', models.JSONField(default=list, verbose_name='productos del combo')),
+                ('parts_total', models.DecimalField(decimal_places=2, default=0, max_digits=9, verbose_name='precio de los productos por separado')),
+                ('savings', models.DecimalField(decimal_places=2, default=0, max_digits=9, verbose_name='ahorro del combo')),
+                ('combo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='sandwichesweb.combo')),
+            ],
+            options={
+                'verbose_name': 'Resumen de combo',
+                'verbose_name_plural': 'Resúmenes de combos',
+                'db_table': 'sw_combo_summary',
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
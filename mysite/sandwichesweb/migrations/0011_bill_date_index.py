@@ -0,0 +1,17 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0010_combo_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['date'], name='sw_bill_date_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def split_ingredients(text, known_names=()):
+    """Separa un texto del tipo " Queso, Jamón y Tomate" en la lista de nombres.
+
+    El texto no distingue el " y " que une los dos últimos nombres del que forma parte de un nombre ("Sal y pimienta"):
+    el último nombre se busca primero entre ``known_names``. Un nombre con comas, o que ya no esté en la tabla de
+    ingredientes, se separa igual que los demás.
+    """
+    text = (text or '').strip()
+    if not text:
+        return []
+    for name in known_names:
+        if text == name:
+            return [name]
+        if text.endswith(' y ' + name):
+            head = text[:-len(' y ' + name)]
+            return [part.strip() for part in head.split(',')] + [name]
+    head, sep, last = text.rpartition(' y ')
+    if not sep:
+        return [text]
+    return [part.strip() for part in head.split(',')] + [last.strip()]
+
+
+def join_ingredients(names):
+    if not names:
+        return None
+    if len(names) == 1:
+        return ' ' + names[0]
+    return ' ' + ', '.join(names[:-1]) + ' y ' + names[-1]
+
+
+def in_batches(queryset):
+    """Recorre la consulta sin cargar toda la tabla, en listas de ``BATCH_SIZE`` registros."""
+    batch = []
+    for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def text_to_names(apps, schema_editor):
+    Detail = apps.get_model('sandwichesweb', 'Detail')
+    Ingredient = apps.get_model('sandwichesweb', 'Ingredient')
+    # Los más largos primero, por si un nombre termina con otro.
+    known_names = sorted(
+        Ingredient.objects.filter(name__contains=' y ').values_list('name', flat=True), key=len, reverse=True
+    )
+    for details in in_batches(Detail.objects.exclude(ingredients=None).only('id', 'ingredients')):
+        for detail in details:
+            detail.ingredient_names = split_ingredients(detail.ingredients, known_names)
+        Detail.objects.bulk_update(details, ['ingredient_names'])
+
+
+def names_to_text(apps, schema_editor):
+    Detail = apps.get_model('sandwichesweb', 'Detail')
+    for details in in_batches(Detail.objects.only('id', 'ingredient_names')):
+        for detail in details:
+            detail.ingredients = join_ingredients(detail.ingredient_names)
+        Detail.objects.bulk_update(details, ['ingredients'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0011_bill_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('is_activated', models.BooleanField(default=True)),
+                ('document', models.TextField(verbose_name='documento de la factura')),
+                ('bill', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='invoice', serialize=False, to='sandwichesweb.bill')),
+            ],
+            options={
+                'verbose_name': 'Documento de factura',
+                'verbose_name_plural': 'Documentos de factura',
+                'db_table': 'sw_invoice',
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='detail',
+            name='ingredient_names',
+            field=models.JSONField(blank=True, default=list, verbose_name='ingredientes del sándwich'),
+        ),
+        migrations.RunPython(text_to_names, names_to_text),
+        migrations.RemoveField(
+            model_name='detail',
+            name='ingredients',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.5 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0012_structured_ingredients_invoice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchase',
+            fields=[
+                ('is_activated', models.BooleanField(default=True)),
+                ('id', models.IntegerField(primary_key=True, serialize=False, verbose_name='id de la compra')),
+                ('date', models.DateTimeField(verbose_name='fecha y hora de compra')),
+                ('reference', models.CharField(max_length=40, null=True, unique=True, verbose_name='referencia del quiosco')),
+                ('bill_id', models.IntegerField(null=True, unique=True, verbose_name='id de la factura')),
+                ('ci_client', models.IntegerField(null=True, verbose_name='cédula del cliente')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=9, null=True, verbose_name='total de la factura')),
+                ('document', models.JSONField(verbose_name='compra archivada')),
+                ('invoice', models.TextField(blank=True, verbose_name='documento de la factura')),
+            ],
+            options={
+                'verbose_name': 'Compra archivada',
+                'verbose_name_plural': 'Compras archivadas',
+                'db_table': 'sw_archived_purchase',
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['date'], name='sw_purchase_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchase',
+            index=models.Index(fields=['ci_client', 'date'], name='sw_archived_client_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.5 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0013_purchase_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_activated', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=40, unique=True, verbose_name='conjunto de datos')),
+                ('version', models.BigIntegerField(verbose_name='versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de datos',
+                'verbose_name_plural': 'Versiones de datos',
+                'db_table': 'sw_data_version',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.5 on 2026-10-18 17:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0014_data_versions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='fecha y hora de compra'),
+        ),
+        migrations.AlterField(
+            model_name='purchase',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='fecha y hora de compra'),
+        ),
+    ]
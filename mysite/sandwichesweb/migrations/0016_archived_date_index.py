@@ -0,0 +1,17 @@
+# Generated by Django 3.1.5 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sandwichesweb', '0015_kiosk_purchase_dates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedpurchase',
+            index=models.Index(fields=['date'], name='sw_archived_date_idx'),
+        ),
+    ]
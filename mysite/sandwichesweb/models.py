@@ -3,6 +3,31 @@
 from datetime import date
 
 from django.db import models
+from django.utils import timezone
+
+
+def ingredients_text(names: list) -> str:
+	"""Une los nombres de los ingredientes de un sándwich en un solo texto.
+
+	:param names: nombres de los ingredientes.
+	:return: texto del tipo " Queso, Jamón y Tomate".
+	:rtype: str
+	"""
+	if not names:
+		return ""
+	if len(names) == 1:
+		return " " + names[0]
+
+	return " " + ", ".join(names[:-1]) + " y " + names[-1]
+
+
+class ActiveManager(models.Manager):
+	"""Manejador que solo retorna los registros activos (``is_activated = True``).
+	
+	Las tablas del catálogo tienen índices parciales sobre los registros activos, que este filtro aprovecha.
+	"""
+	def get_queryset(self):
+		return super().get_queryset().filter(is_activated=True)
 
 
 class BaseEntity(models.Model):
@@ -17,6 +42,10 @@ class BaseEntity(models.Model):
 	# Indica si el registro está activo para ser usado en el sistema. Es una forma para no eliminar el registro en
 	# su totalidad.
 	is_activated = models.BooleanField(default=True)
+	
+	# Manejadores. ``objects`` se declara primero para que siga siendo el manejador por defecto.
+	objects = models.Manager()
+	active = ActiveManager()
 
 
 # class Client(BaseEntity):
@@ -77,11 +106,22 @@ class Purchase(BaseEntity):
 		db_table = 'sw_purchase'
 		verbose_name = 'Compra'
 		verbose_name_plural = 'Compras'
+		indexes = [  # Compras más antiguas que el horizonte de archivo (ver archive.py).
+			models.Index(fields=['date'], name='sw_purchase_date_idx'),
+		]
 	
 	# Atributos
-	date = models.DateTimeField(
+	date = models.DateTimeField(  # Las compras sincronizadas por un quiosco conservan su fecha (ver api.views).
 		"fecha y hora de compra",
-		auto_now_add=True
+		default=timezone.now,
+		editable=False
+	)
+	reference = models.CharField(  # Identificador que asigna el quiosco a una compra hecha sin conexión.
+		"referencia del quiosco",
+		max_length=40,
+		null=True,
+		unique=True,
+		editable=False
 	)
 	# total = models.DecimalField(
 	# 	"total de la compra",
@@ -130,6 +170,13 @@ class Product(BaseEntity):
 		upload_to='uploads/',
 		null=True
 	)
+	photo_hash = models.CharField(  # Hash del contenido de la foto y formato de sus versiones reducidas (ver images.py).
+		"hash de la foto",
+		max_length=24,
+		blank=True,
+		default='',
+		editable=False
+	)
 	
 	# Métodos
 
@@ -142,6 +189,9 @@ class Sandwich(Product):
 		db_table = 'sw_sandwich'
 		verbose_name = 'Sándwich'
 		verbose_name_plural = 'Sándwiches'
+		indexes = [  # Productos activos, en el orden en que se muestran.
+			models.Index(fields=['size'], condition=models.Q(is_activated=True), name='sw_sandwich_active_size_idx'),
+		]
 	
 	# Atributos
 	size = models.CharField(
@@ -180,6 +230,9 @@ class Drink(Product):
 		db_table = 'sw_drink'
 		verbose_name = 'Bebida'
 		verbose_name_plural = 'Bebidas'
+		indexes = [  # Productos activos, en el orden en que se muestran.
+			models.Index(fields=['name'], condition=models.Q(is_activated=True), name='sw_drink_active_name_idx'),
+		]
 	
 	class ListDrinkType(models.TextChoices):
 		SODA = 'Refresco', 'Refresco',
@@ -227,6 +280,9 @@ class SideDish(Product):
 		db_table = 'sw_side_dish'
 		verbose_name = 'Acompañante'
 		verbose_name_plural = 'Acompañantes'
+		indexes = [  # Productos activos, en el orden en que se muestran.
+			models.Index(fields=['name'], condition=models.Q(is_activated=True), name='sw_side_dish_active_name_idx'),
+		]
 	
 	# Atributos
 	name = models.CharField(
@@ -256,6 +312,9 @@ class Combo(Product):
 		db_table = 'sw_combo'
 		verbose_name = 'Combo'
 		verbose_name_plural = 'Combos'
+		indexes = [  # Productos activos, en el orden en que se muestran.
+			models.Index(fields=['name'], condition=models.Q(is_activated=True), name='sw_combo_active_name_idx'),
+		]
 	
 	# Atributos
 	name = models.CharField(
@@ -373,6 +432,9 @@ class Ingredient(BaseEntity):
 		db_table = 'SW_INGREDIENT'.lower()
 		verbose_name = 'Ingrediente'
 		verbose_name_plural = 'Ingredientes'
+		indexes = [  # Ingredientes activos, por nombre.
+			models.Index(fields=['name'], condition=models.Q(is_activated=True), name='sw_ingredient_active_name_idx'),
+		]
 	
 	# Atributos
 	name = models.CharField(
@@ -400,6 +462,9 @@ class Addition(BaseEntity):
 		db_table = 'SW_ADDITION'.lower()
 		verbose_name = 'Adicional'
 		verbose_name_plural = 'Adicionales'
+		indexes = [  # Adicionales de los pedidos, en orden (ver billing.py).
+			models.Index(fields=['order', 'id'], name='sw_addition_order_idx'),
+		]
 	
 	# Atributos
 	
@@ -426,6 +491,7 @@ class Addition(BaseEntity):
 	order = models.ForeignKey(
 		'Order',
 		on_delete=models.CASCADE,
+		db_index=False,  # Lo cubre el índice sw_addition_order_idx.
 		limit_choices_to={
 			'is_activated': True
 		},
@@ -447,12 +513,23 @@ class Order(BaseEntity):
 		db_table = 'sw_order'
 		verbose_name = 'Pedido'
 		verbose_name_plural = 'Pedidos'
+		indexes = [  # Pedidos de una compra, en orden (ver billing.py).
+			models.Index(fields=['purchase', 'id'], name='sw_order_purchase_idx'),
+		]
+		constraints = [  # El número para retirar el pedido no se repite en el mismo día.
+			models.UniqueConstraint(fields=['day', 'number'], name='sw_order_day_number_unique'),
+		]
 	
 	# Atributos
-	number = models.IntegerField(
+	number = models.IntegerField(  # Número para retirar el pedido. Ver numbering.py.
 		"número del pedido",
 		default=1
 	)
+	day = models.DateField(  # Día al que corresponde el número del pedido.
+		"día del número del pedido",
+		null=True,
+		editable=False
+	)
 	# date = models.DateTimeField(
 	# 	"fecha y hora de compra",
 	# 	auto_now_add=True
@@ -468,6 +545,7 @@ class Order(BaseEntity):
 	purchase = models.ForeignKey(
 		'Purchase',
 		on_delete=models.CASCADE,
+		db_index=False,  # Lo cubre el índice sw_order_purchase_idx.
 		limit_choices_to={
 			'is_activated': True
 		},
@@ -618,12 +696,14 @@ class Promotion(BaseEntity):
 	def prom_is_applicable(self) -> bool:
 		"""Verifica si una oferta puede ser todavía aplicable.
 
-		:return: True, si aún no se ha pasado de la fecha final de la oferta.
+		Solo revisa las fechas. Para saber si aplica según el horario, ver ``promotions.applicable_promotions``.
+
+		:return: True, si la oferta ya empezó y aún no se ha pasado de la fecha final (si la tiene).
 					De lo contrario, False.
 		:rtype: bool
 		"""
 		today = date.today()
-		return today <= self.end_date
+		return self.start_date <= today and (self.end_date is None or today <= self.end_date)
 	
 	def __str__(self):
 		return self.name
@@ -675,11 +755,18 @@ class Bill(BaseEntity):
 		db_table = 'SW_BILL'.lower()
 		verbose_name = 'Factura'
 		verbose_name_plural = 'Facturas'
+		indexes = [
+			# Facturas de un cliente, por fecha.
+			models.Index(fields=['ci_client', 'date'], name='sw_bill_client_date_idx'),
+			# Facturas por fecha (filtro de la administración).
+			models.Index(fields=['date'], name='sw_bill_date_idx'),
+		]
 	
 	# Atributos
 	date = models.DateTimeField(
 		"fecha y hora de compra",
-		auto_now_add=True
+		default=timezone.now,
+		editable=False
 	)
 	total = models.DecimalField(
 		"total de la compra",
@@ -737,6 +824,9 @@ class QuantityOfProducts(BaseEntity):
 		db_table = 'SW_QUANTITY_OF_PRODUCTS'.lower()
 		verbose_name = 'Cantidad de productos comprados'
 		verbose_name_plural = verbose_name
+		indexes = [  # Cantidades de una factura.
+			models.Index(fields=['bill', 'product'], name='sw_quantity_bill_product_idx'),
+		]
 	
 	product = models.CharField(
 		"tipo de producto",
@@ -753,6 +843,7 @@ class QuantityOfProducts(BaseEntity):
 	bill = models.ForeignKey(
 		'Bill',
 		on_delete=models.CASCADE,
+		db_index=False,  # Lo cubre el índice sw_quantity_bill_product_idx.
 		limit_choices_to={
 			'is_activated': True
 		},
@@ -773,6 +864,9 @@ class Detail(BaseEntity):
 		db_table = 'SW_DETAIL'.lower()
 		verbose_name = 'Detalle de factura'
 		verbose_name_plural = 'Detalles de factura'
+		indexes = [  # Detalles de una factura.
+			models.Index(fields=['bill', 'product'], name='sw_detail_bill_product_idx'),
+		]
 	
 	# Atributos
 	product = models.CharField(
@@ -791,10 +885,10 @@ class Detail(BaseEntity):
 		max_length=30,
 		null=True
 	)
-	ingredients = models.CharField(
+	ingredient_names = models.JSONField(  # Nombres de los ingredientes del sándwich, al momento de la compra.
 		"ingredientes del sándwich",
-		max_length=100,
-		null=True
+		default=list,
+		blank=True
 	)
 	price = models.DecimalField(
 		"precio del producto",
@@ -806,6 +900,7 @@ class Detail(BaseEntity):
 	bill = models.ForeignKey(
 		'Bill',
 		on_delete=models.CASCADE,
+		db_index=False,  # Lo cubre el índice sw_detail_bill_product_idx.
 		limit_choices_to={
 			'is_activated': True
 		},
@@ -814,7 +909,285 @@ class Detail(BaseEntity):
 	)
 	
 	# Métodos
+	@property
+	def ingredients(self) -> str:
+		"""Ingredientes del sándwich como texto, del tipo " Queso, Jamón y Tomate".
+		
+		:rtype: str
+		"""
+		return ingredients_text(self.ingredient_names)
+	
 	def __str__(self):
 		return "Detalle " + str(self.id) + " de la factura " + str(self.bill_id) + \
-		       ", con " + self.product + ": " + self.size + self.ingredients + self.name
-	
\ No newline at end of file
+		       ", con " + self.product + ": " + (self.size or "") + self.ingredients + (self.name or "")
+	
+
+class HourlySales(BaseEntity):
+	"""Ventas acumuladas por hora, tipo de producto y producto.
+	
+	Se actualiza con cada factura (ver ``rollups.py``), así los reportes no tienen que recorrer todas las facturas.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_HOURLY_SALES'.lower()
+		verbose_name = 'Ventas por hora'
+		verbose_name_plural = verbose_name
+		constraints = [
+			models.UniqueConstraint(fields=['period', 'product', 'name'], name='sw_hourly_sales_unique'),
+		]
+	
+	# Atributos
+	period = models.DateTimeField(
+		"hora"
+	)
+	product = models.CharField(
+		"tipo de producto",
+		max_length=30,
+		choices=Product.ListProducts.choices
+	)
+	name = models.CharField(  # Nombre del producto, o tamaño si es un sándwich.
+		"producto",
+		max_length=30
+	)
+	quantity = models.IntegerField(
+		"cantidad vendida",
+		default=0
+	)
+	total = models.DecimalField(
+		"total vendido",
+		max_digits=12,
+		decimal_places=2,
+		default=0
+	)
+	
+	# Métodos
+	def __str__(self):
+		return str(self.period) + " | " + self.product + " " + self.name + ": " + str(self.quantity)
+
+
+class DailySales(BaseEntity):
+	"""Ventas acumuladas por día, tipo de producto y producto.
+	
+	Se actualiza con cada factura (ver ``rollups.py``), así los reportes no tienen que recorrer todas las facturas.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_DAILY_SALES'.lower()
+		verbose_name = 'Ventas por día'
+		verbose_name_plural = verbose_name
+		constraints = [
+			models.UniqueConstraint(fields=['day', 'product', 'name'], name='sw_daily_sales_unique'),
+		]
+	
+	# Atributos
+	day = models.DateField(
+		"día"
+	)
+	product = models.CharField(
+		"tipo de producto",
+		max_length=30,
+		choices=Product.ListProducts.choices
+	)
+	name = models.CharField(  # Nombre del producto, o tamaño si es un sándwich.
+		"producto",
+		max_length=30
+	)
+	quantity = models.IntegerField(
+		"cantidad vendida",
+		default=0
+	)
+	total = models.DecimalField(
+		"total vendido",
+		max_digits=12,
+		decimal_places=2,
+		default=0
+	)
+	
+	# Métodos
+	def __str__(self):
+		return str(self.day) + " | " + self.product + " " + self.name + ": " + str(self.quantity)
+
+
+class OrderNumberSequence(BaseEntity):
+	"""Último número de pedido reservado en cada día.
+	
+	Cada proceso reserva los números por bloques (ver ``numbering.py``), así la mayoría de los pedidos reciben su
+	número sin consultar la base de datos.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_ORDER_NUMBER_SEQUENCE'.lower()
+		verbose_name = 'Secuencia de números de pedido'
+		verbose_name_plural = 'Secuencias de números de pedido'
+	
+	# Atributos
+	day = models.DateField(
+		"día",
+		unique=True
+	)
+	last_number = models.IntegerField(
+		"último número reservado",
+		default=0
+	)
+	
+	# Métodos
+	def __str__(self):
+		return str(self.day) + ": " + str(self.last_number)
+
+
+class ComboSummary(BaseEntity):
+	"""Composición y precios de un combo, calculados de antemano.
+	
+	Se recalcula cuando cambia el combo o alguno de sus productos (ver ``combos.py``), así mostrar los combos del
+	menú no recorre ``ProductsInCombo``.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_COMBO_SUMMARY'.lower()
+		verbose_name = 'Resumen de combo'
+		verbose_name_plural = 'Resúmenes de combos'
+	
+	# Atributos
+	components = models.JSONField(  # [{'product': 'Bebida', 'id': 1, 'name': 'Pepsi', 'price': '1.50'}, ...]
+		"productos del combo",
+		default=list
+	)
+	parts_total = models.DecimalField(
+		"precio de los productos por separado",
+		max_digits=9,
+		decimal_places=2,
+		default=0
+	)
+	savings = models.DecimalField(
+		"ahorro del combo",
+		max_digits=9,
+		decimal_places=2,
+		default=0
+	)
+	
+	# Relaciones
+	combo = models.OneToOneField(
+		'Combo',
+		on_delete=models.CASCADE,
+		related_name='summary',
+	)
+	
+	# Métodos
+	def __str__(self):
+		return "Resumen del combo " + str(self.combo_id)
+
+
+class Invoice(BaseEntity):
+	"""Documento de la factura, generado una sola vez al pagar (ver ``billing.py``).
+	
+	Ver o reimprimir la factura lee solo esta fila, sin volver a consultar los detalles ni a generar el documento.
+	Solo se guarda el contenido de la factura: la página que lo rodea, con sus estilos, se genera al mostrarla.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_INVOICE'.lower()
+		verbose_name = 'Documento de factura'
+		verbose_name_plural = 'Documentos de factura'
+	
+	# Atributos
+	document = models.TextField(
+		"documento de la factura"
+	)
+	
+	# Relaciones
+	bill = models.OneToOneField(  # Es también la clave primaria: la factura se busca por su id.
+		'Bill',
+		on_delete=models.CASCADE,
+		primary_key=True,
+		related_name='invoice',
+	)
+	
+	# Métodos
+	def __str__(self):
+		return "Documento de la factura " + str(self.bill_id)
+
+
+class ArchivedPurchase(BaseEntity):
+	"""Compra archivada, con sus pedidos, su factura y el documento de la factura (ver ``archive.py``).
+	
+	Toda la compra se guarda en un solo documento JSON. Solo se copian a columnas, con índices, los datos por los
+	que se buscan las compras archivadas: el id de la factura, el cliente y la referencia del quiosco.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_ARCHIVED_PURCHASE'.lower()
+		verbose_name = 'Compra archivada'
+		verbose_name_plural = 'Compras archivadas'
+		indexes = [
+			# Facturas archivadas de un cliente, por fecha.
+			models.Index(fields=['ci_client', 'date'], name='sw_archived_client_date_idx'),
+			# Facturas archivadas de un período, para exportarlas (ver export.py).
+			models.Index(fields=['date'], name='sw_archived_date_idx'),
+		]
+	
+	# Atributos
+	id = models.IntegerField(  # El mismo id de la compra.
+		"id de la compra",
+		primary_key=True
+	)
+	date = models.DateTimeField(
+		"fecha y hora de compra"
+	)
+	reference = models.CharField(
+		"referencia del quiosco",
+		max_length=40,
+		null=True,
+		unique=True
+	)
+	bill_id = models.IntegerField(
+		"id de la factura",
+		null=True,
+		unique=True
+	)
+	ci_client = models.IntegerField(
+		"cédula del cliente",
+		null=True
+	)
+	total = models.DecimalField(
+		"total de la factura",
+		max_digits=9,
+		decimal_places=2,
+		null=True
+	)
+	document = models.JSONField(
+		"compra archivada"
+	)
+	invoice = models.TextField(
+		"documento de la factura",
+		blank=True
+	)
+	
+	# Métodos
+	def __str__(self):
+		return "Compra archivada " + str(self.id)
+
+
+class DataVersion(BaseEntity):
+	"""Versión de un conjunto de datos del catálogo (ver ``versioning.py``).
+	
+	Se guarda en la base de datos para que todos los procesos usen la misma versión.
+	"""
+	# Clases
+	class Meta(BaseEntity.Meta):
+		db_table = 'SW_DATA_VERSION'.lower()
+		verbose_name = 'Versión de datos'
+		verbose_name_plural = 'Versiones de datos'
+	
+	# Atributos
+	name = models.CharField(
+		"conjunto de datos",
+		max_length=40,
+		unique=True
+	)
+	version = models.BigIntegerField(
+		"versión"
+	)
+	
+	# Métodos
+	def __str__(self):
+		return self.name + ": " + str(self.version)
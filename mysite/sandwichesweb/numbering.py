@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Números para retirar los pedidos.
+
+Los números empiezan en 1 cada día y no se repiten en el mismo día. Cada proceso reserva en la base de datos un
+bloque de ``ORDER_NUMBER_BLOCK`` números (``OrderNumberSequence``) y los entrega desde la memoria, así solo uno de
+cada ``ORDER_NUMBER_BLOCK`` pedidos hace una consulta. Con varios procesos, cada uno entrega números de su propio
+bloque: los números son únicos y casi crecientes, y los que quedan sin usar en un bloque se pierden.
+"""
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import *
+
+
+def reserve_block(day, size: int) -> int:
+	"""Reserva en la base de datos los siguientes ``size`` números del día.
+
+	El ``UPDATE`` toma el bloqueo de la fila (o de la base de datos, con SQLite) antes de leer el nuevo valor, así
+	dos procesos nunca reciben el mismo bloque. Debe llamarse fuera de otra transacción: si la transacción externa
+	se deshiciera, el bloque quedaría entregado en memoria pero no reservado.
+
+	:return: el último número del bloque reservado.
+	:rtype: int
+	"""
+	with transaction.atomic():
+		sequences = OrderNumberSequence.objects.filter(day=day)
+		if not sequences.update(last_number=F('last_number') + size):
+			try:
+				with transaction.atomic():
+					OrderNumberSequence.objects.create(day=day, last_number=size)
+				return size
+			except IntegrityError:  # Otro proceso creó la secuencia del día al mismo tiempo.
+				sequences.update(last_number=F('last_number') + size)
+
+		return sequences.values_list('last_number', flat=True).get()
+
+
+class OrderNumberAllocator:
+	"""Entrega números de pedido desde un bloque reservado en memoria. Es seguro entre hilos.
+	"""
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._day = None
+		self._next = 0
+		self._last = 0
+
+	def allocate(self, count: int = 1) -> tuple:
+		"""Entrega ``count`` números de pedido del día en curso.
+
+		:return: el día y la lista de números.
+		:rtype: tuple
+		"""
+		day = timezone.localdate()
+		numbers = []
+		with self._lock:
+			if day != self._day:
+				self._day, self._next, self._last = day, 1, 0
+
+			while len(numbers) < count:
+				if self._next > self._last:
+					size = max(get_setting('ORDER_NUMBER_BLOCK'), count - len(numbers))
+					self._last = reserve_block(day, size)
+					self._next = self._last - size + 1
+
+				available = min(count - len(numbers), self._last - self._next + 1)
+				numbers.extend(range(self._next, self._next + available))
+				self._next += available
+
+		return day, numbers
+
+
+allocator = OrderNumberAllocator()
+
+
+def assign_numbers(orders: list, day=None):
+	"""Asigna a los pedidos de una compra sus números para retirarlos.
+
+	:param day: día de la compra. Por defecto, hoy. Los pedidos de otro día (compras sincronizadas por un quiosco)
+		reservan sus números directamente en la secuencia de ese día.
+	"""
+	if day is None or day == timezone.localdate():
+		day, numbers = allocator.allocate(len(orders))
+	else:
+		last = reserve_block(day, len(orders))
+		numbers = range(last - len(orders) + 1, last + 1)
+
+	for order, number in zip(orders, numbers):
+		order.day = day
+		order.number = number
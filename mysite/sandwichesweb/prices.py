@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Índice de precios en memoria.
+
+Guarda en memoria del proceso los ingredientes y productos activos, con sus precios como ``Decimal``, para que
+seleccionar un producto o calcular el precio de un pedido no consulte la base de datos. El índice se carga la
+primera vez que se usa y se vuelve a cargar cuando cambia la versión 'prices' (ver ``signals.py``).
+"""
+from collections import namedtuple
+
+from .models import *
+from .versioning import VersionedValue
+
+PRICES = 'prices'
+
+SANDWICH = 'sandwich'
+DRINK = 'drink'
+SIDE_DISH = 'side_dish'
+COMBO = 'combo'
+INGREDIENT = 'ingredient'
+
+# Tipo de producto (el mismo valor de 'product_type' en los formularios) y su modelo.
+PRODUCT_MODELS = {
+	SANDWICH: Sandwich,
+	DRINK: Drink,
+	SIDE_DISH: SideDish,
+	COMBO: Combo,
+}
+
+PriceEntry = namedtuple('PriceEntry', ['kind', 'id', 'name', 'price'])
+
+
+def normalize_name(name: str) -> str:
+	"""Normaliza un nombre para buscarlo sin importar mayúsculas ni espacios de más.
+
+	:param name: nombre a normalizar.
+	:return: nombre normalizado.
+	:rtype: str
+	"""
+	return ' '.join(name.split()).casefold()
+
+
+class PriceIndex:
+	"""Ingredientes y productos activos, con sus precios, indexados por id y por nombre normalizado.
+
+	El nombre de un sándwich es su tamaño.
+	"""
+	def __init__(self, version: int, entries: list):
+		self.version = version
+		self.by_id = {}
+		self.by_name = {}
+		for entry in entries:
+			self.by_id[entry.kind, entry.id] = entry
+			self.by_name[entry.kind, normalize_name(entry.name)] = entry
+
+	@classmethod
+	def load(cls, version: int):
+		"""Carga el índice desde la base de datos, con una consulta por modelo.
+		"""
+		entries = []
+		for kind, model in PRODUCT_MODELS.items():
+			name_field = 'size' if model is Sandwich else 'name'
+			rows = model.active.values_list('id', name_field, 'price')
+			entries.extend(PriceEntry(kind, pk, name, price) for pk, name, price in rows)
+
+		rows = Ingredient.active.values_list('id', 'name', 'price')
+		entries.extend(PriceEntry(INGREDIENT, pk, name, price) for pk, name, price in rows)
+
+		return cls(version, entries)
+
+	def get(self, kind: str, pk) -> PriceEntry:
+		"""Busca un producto o ingrediente activo por su id.
+
+		:param kind: tipo de producto ('sandwich', 'drink', 'side_dish', 'combo' o 'ingredient').
+		:param pk: id del registro.
+		:return: la entrada del índice, o None si no existe o no está activo.
+		:rtype: PriceEntry
+		"""
+		try:
+			return self.by_id.get((kind, int(pk)))
+		except (TypeError, ValueError):
+			return None
+
+	def get_by_name(self, kind: str, name: str) -> PriceEntry:
+		"""Busca un producto o ingrediente activo por su nombre.
+
+		:param kind: tipo de producto.
+		:param name: nombre, sin importar mayúsculas ni espacios de más.
+		:return: la entrada del índice, o None si no existe o no está activo.
+		:rtype: PriceEntry
+		"""
+		return self.by_name.get((kind, normalize_name(name)))
+
+
+_index = VersionedValue(PRICES, PriceIndex.load)
+
+
+def get_price_index() -> PriceIndex:
+	"""Obtiene el índice de precios vigente, cargándolo si cambió la versión.
+
+	:rtype: PriceIndex
+	"""
+	return _index.get()
+
+
+def get_cached_price_index() -> PriceIndex:
+	"""Obtiene el índice de precios solo si ya está cargado y vigente, sin consultar la base de datos.
+
+	:return: el índice, o None.
+	:rtype: PriceIndex
+	"""
+	return _index.get_if_current()
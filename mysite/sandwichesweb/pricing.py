@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Motor de precios de los pedidos.
+
+Compila los precios de los productos, de los ingredientes adicionales y de los combos (``prices.py``) y las ofertas
+(``promotions.py``) en un conjunto de reglas inmutable (``PricingRules``), que se guarda en la memoria del proceso
+y se vuelve a compilar solo cuando cambia la versión 'prices' o 'promotions'. Con las reglas compiladas, calcular
+el precio de un carrito completo no consulta la base de datos.
+
+Reglas:
+
+- Un sándwich cuesta el precio de su tamaño más el de cada ingrediente agregado.
+- Una bebida, un acompañante o un combo cuestan su precio.
+- El descuento de una oferta (``Promotion.discount``) es una fracción del precio (0.15 es un 15 %). Entre las
+  ofertas aplicables al momento de la compra, se aplica a cada pedido la de mayor descuento, y se registra en
+  ``PromApplication`` al guardar la compra (ver ``checkout.py``).
+- Los montos se redondean a céntimos, con ``ROUND_HALF_UP``.
+"""
+import threading
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from .prices import COMBO, DRINK, INGREDIENT, SANDWICH, SIDE_DISH, get_price_index
+from .promotions import get_promotion_index, local_moment
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+PricedLine = namedtuple('PricedLine', ['base', 'discount', 'sub_total', 'promotion_id'])
+
+# Campo de la línea del carrito y tipo de producto, para los pedidos sin ingredientes.
+LINE_PRODUCTS = [('combo_id', COMBO), ('drink_id', DRINK), ('side_dish_id', SIDE_DISH)]
+
+
+class PricingRules:
+	"""Precios y ofertas compilados para una versión de los precios y otra de las ofertas. Es inmutable.
+
+	:param prices: índice de precios (``prices.PriceIndex``).
+	:param promotions: índice de ofertas (``promotions.PromotionIndex``).
+	"""
+	__slots__ = ('version', '_products', '_promotions')
+
+	def __init__(self, prices, promotions):
+		self.version = (prices.version, promotions.version)
+		# Precio por (tipo de producto, id), solo de lo que está activo.
+		self._products = {key: entry.price for key, entry in prices.by_id.items()}
+		self._promotions = promotions
+
+	def __setattr__(self, name, value):
+		if hasattr(self, '_promotions'):
+			raise AttributeError("PricingRules es inmutable.")
+		super().__setattr__(name, value)
+
+	def price_of(self, kind: str, pk) -> Decimal:
+		"""Precio de un producto o ingrediente activo, o None si no existe o no está activo.
+
+		:rtype: Decimal
+		"""
+		return self._products.get((kind, pk))
+
+	def base_price(self, line: dict) -> Decimal:
+		"""Precio de un pedido, sin ofertas.
+
+		:param line: línea del carrito (ver ``cart.BaseCart``).
+		:return: el precio, o None si algún producto o ingrediente ya no está activo.
+		:rtype: Decimal
+		"""
+		additions = line.get('additions')
+		if additions:
+			price = self._products.get((SANDWICH, additions[0]['sandwich_id']))
+			for addition in additions:
+				ingredient = self._products.get((INGREDIENT, addition['ingredient_id']))
+				if price is None or ingredient is None:
+					return None
+				price += ingredient
+			return price
+
+		for field, kind in LINE_PRODUCTS:
+			if line.get(field):
+				return self._products.get((kind, line[field]))
+
+		return ZERO
+
+	def best_promotion(self, moment):
+		"""Oferta de mayor descuento aplicable en un momento (hora local), o None.
+		"""
+		promotions = self._promotions.at(moment)
+		if not promotions:
+			return None
+
+		return max(promotions, key=lambda promotion: (promotion.discount, -promotion.id))
+
+	def price_lines(self, lines: list, moment=None) -> list:
+		"""Calcula, en una sola pasada, el precio de cada pedido de un carrito.
+
+		Los pedidos con productos que ya no están activos conservan el sub total con el que se agregaron al carrito,
+		sin ofertas.
+
+		:param lines: líneas del carrito.
+		:param moment: momento de la compra. Por defecto, ahora.
+		:return: un ``PricedLine`` por línea, en el mismo orden.
+		:rtype: list
+		"""
+		promotion = self.best_promotion(local_moment(moment))
+		discount = promotion.discount if promotion is not None else ZERO
+
+		priced = []
+		for line in lines:
+			base = self.base_price(line)
+			if base is None:
+				base = Decimal(line['sub_total']).quantize(CENT, ROUND_HALF_UP)
+				priced.append(PricedLine(base, ZERO, base, None))
+			elif base and discount:
+				amount = (base * discount).quantize(CENT, ROUND_HALF_UP)
+				priced.append(PricedLine(base, amount, base - amount, promotion.id))
+			else:
+				priced.append(PricedLine(base, ZERO, base, None))
+
+		return priced
+
+
+_lock = threading.Lock()
+_rules = None
+
+
+def get_pricing_rules() -> PricingRules:
+	"""Obtiene las reglas de precios vigentes, compilándolas si cambió la versión de los precios o de las ofertas.
+
+	:rtype: PricingRules
+	"""
+	global _rules
+	prices, promotions = get_price_index(), get_promotion_index()
+
+	rules = _rules
+	if rules is not None and rules.version == (prices.version, promotions.version):
+		return rules
+
+	with _lock:
+		if _rules is None or _rules.version != (prices.version, promotions.version):
+			_rules = PricingRules(prices, promotions)
+		return _rules
+
+
+def price_lines(lines: list, moment=None) -> list:
+	"""Calcula el precio de cada pedido de un carrito con las reglas vigentes (ver ``PricingRules.price_lines``).
+
+	:rtype: list
+	"""
+	return get_pricing_rules().price_lines(lines, moment)
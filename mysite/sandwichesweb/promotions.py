@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Ofertas aplicables según la fecha, el día de la semana y la hora.
+
+Las ofertas activas y sus horarios se compilan en un índice que se guarda en la memoria del proceso y se vuelve a
+compilar solo cuando cambia la versión 'promotions' (ver ``signals.py``):
+
+- Los días de la semana de cada horario se guardan como una máscara de bits (lunes = bit 0, domingo = bit 6).
+- Para cada día de la semana se guarda una lista ordenada de minutos del día donde cambia el conjunto de ofertas
+  vigentes, y el conjunto de ofertas de cada tramo. Buscar las ofertas de un momento es una búsqueda binaria.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from .models import *
+from .versioning import VersionedValue
+
+PROMOTIONS = 'promotions'
+
+MINUTES_PER_DAY = 24 * 60
+
+WEEKDAY_FIELDS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+CompiledPromotion = namedtuple('CompiledPromotion', [
+	'id', 'name', 'description', 'discount', 'start_date', 'end_date', 'weekdays', 'start_minute', 'end_minute',
+])
+
+
+def weekday_mask(schedule: ScheduleProm) -> int:
+	"""Convierte los días del horario en una máscara de bits.
+
+	:param schedule: horario de la oferta.
+	:return: máscara de bits; el bit ``n`` corresponde a ``date.weekday() == n``.
+	:rtype: int
+	"""
+	mask = 0
+	for bit, field in enumerate(WEEKDAY_FIELDS):
+		if getattr(schedule, field):
+			mask |= 1 << bit
+
+	return mask
+
+
+def to_minute(value) -> int:
+	return value.hour * 60 + value.minute
+
+
+class PromotionIndex:
+	"""Índice de las ofertas activas por día de la semana y tramo horario.
+	"""
+	def __init__(self, version: int, promotions: list):
+		self.version = version
+		self.promotions = promotions
+
+		# Intervalos [inicio, fin) en minutos, por día de la semana, con los días desde que empezó el horario.
+		intervals = [[] for _ in WEEKDAY_FIELDS]
+		for promotion in promotions:
+			start, end = promotion.start_minute, promotion.end_minute
+			for day in range(len(WEEKDAY_FIELDS)):
+				if not promotion.weekdays & (1 << day):
+					continue
+				if start < end:
+					intervals[day].append((start, end, promotion, 0))
+				elif start > end:
+					# El horario pasa la medianoche: termina al día siguiente, y pertenece al día en que empezó.
+					intervals[day].append((start, MINUTES_PER_DAY, promotion, 0))
+					intervals[(day + 1) % len(WEEKDAY_FIELDS)].append((0, end, promotion, 1))
+				else:
+					# Misma hora de inicio y fin: todo el día.
+					intervals[day].append((0, MINUTES_PER_DAY, promotion, 0))
+
+		self.boundaries = []
+		self.segments = []
+		for day_intervals in intervals:
+			boundaries = sorted({0} | {minute for start, end, _, _ in day_intervals for minute in (start, end)})
+			segments = [
+				tuple(
+					(promotion, timedelta(days=days_back)) for start, end, promotion, days_back in day_intervals
+					if start <= minute < end
+				)
+				for minute in boundaries
+			]
+			self.boundaries.append(boundaries)
+			self.segments.append(segments)
+
+	@classmethod
+	def load(cls, version: int):
+		"""Compila las ofertas activas con horario activo, en una sola consulta.
+		"""
+		queryset = Promotion.active.filter(
+			schedule__is_activated=True,
+		).select_related('schedule').order_by('pk')
+
+		promotions = [
+			CompiledPromotion(
+				id=promotion.id,
+				name=promotion.name,
+				description=promotion.description,
+				discount=promotion.discount,
+				start_date=promotion.start_date,
+				end_date=promotion.end_date,
+				weekdays=weekday_mask(promotion.schedule),
+				start_minute=to_minute(promotion.schedule.start_hour),
+				end_minute=to_minute(promotion.schedule.end_hour),
+			)
+			for promotion in queryset
+		]
+
+		return cls(version, promotions)
+
+	def at(self, moment: datetime) -> list:
+		"""Busca las ofertas aplicables en un momento dado.
+
+		:param moment: fecha y hora local.
+		:return: ofertas aplicables, ordenadas por id.
+		:rtype: list
+		"""
+		day = moment.weekday()
+		minute = to_minute(moment)
+		today = moment.date()
+
+		boundaries = self.boundaries[day]
+		candidates = self.segments[day][bisect_right(boundaries, minute) - 1]
+
+		# Las fechas de la oferta se comparan con el día en que empezó el horario, que puede ser el anterior.
+		return [
+			promotion for promotion, days_back in candidates
+			if promotion.start_date <= today - days_back
+			and (promotion.end_date is None or today - days_back <= promotion.end_date)
+		]
+
+
+_index = VersionedValue(PROMOTIONS, PromotionIndex.load)
+
+
+def get_promotion_index() -> PromotionIndex:
+	"""Obtiene el índice de ofertas vigente, compilándolo si cambió la versión.
+
+	:rtype: PromotionIndex
+	"""
+	return _index.get()
+
+
+def get_cached_promotion_index() -> PromotionIndex:
+	"""Obtiene el índice de ofertas solo si ya está compilado y vigente, sin consultar la base de datos.
+
+	:return: el índice, o None.
+	:rtype: PromotionIndex
+	"""
+	return _index.get_if_current()
+
+
+def local_moment(moment: datetime = None) -> datetime:
+	"""Convierte un momento a la hora local. Si no se indica, usa la hora actual.
+	"""
+	if moment is None:
+		return timezone.localtime()
+	if timezone.is_aware(moment):
+		return timezone.localtime(moment)
+
+	return moment
+
+
+def applicable_promotions(moment: datetime = None) -> list:
+	"""Busca las ofertas aplicables ahora, o en el momento indicado.
+
+	:param moment: fecha y hora. Si no se indica, se usa la hora actual. Si tiene zona horaria, se convierte a la
+		hora local.
+	:return: ofertas aplicables (``CompiledPromotion``).
+	:rtype: list
+	"""
+	return get_promotion_index().at(local_moment(moment))
+
+
+def promotions_key(promotions: list) -> str:
+	"""Identifica un conjunto de ofertas aplicables por sus ids ordenados, para las claves de caché y los ``ETag``.
+
+	Junto con la versión 'promotions', distingue los momentos en que aplican ofertas distintas.
+	"""
+	return ','.join(str(promotion_id) for promotion_id in sorted(promotion.id for promotion in promotions))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Ventas acumuladas por hora y por día (``HourlySales`` y ``DailySales``).
+
+Cada factura suma sus detalles a los acumulados con una sola sentencia ``INSERT ... ON CONFLICT DO UPDATE`` por
+tabla, sin importar cuántos detalles tenga. Los reportes leen los acumulados, así su costo no crece con el
+historial de ventas. El comando ``backfill_sales_rollups`` reconstruye los acumulados desde las facturas.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import *
+
+
+def detail_name(detail: Detail) -> str:
+	"""Nombre del producto de un detalle de factura: el tamaño si es un sándwich, o el nombre en otro caso.
+	"""
+	return (detail.size if detail.product == Product.ListProducts.SANDWICH.label else detail.name) or ''
+
+
+def periods(moment) -> tuple:
+	"""Hora y día, en la hora local, a los que corresponde un momento.
+
+	:rtype: tuple
+	"""
+	local = timezone.localtime(moment) if timezone.is_aware(moment) else moment
+	return local.replace(minute=0, second=0, microsecond=0), local.date()
+
+
+def aggregate(bills: list) -> tuple:
+	"""Suma la cantidad y el total de los detalles de las facturas, por hora y por día.
+
+	:param bills: lista de tuplas (fecha de la factura, detalles de la factura).
+	:return: diccionarios {(periodo, tipo de producto, producto): [cantidad, total]} por hora y por día.
+	:rtype: tuple
+	"""
+	hourly = defaultdict(lambda: [0, Decimal(0)])
+	daily = defaultdict(lambda: [0, Decimal(0)])
+	for bill_date, details in bills:
+		hour, day = periods(bill_date)
+		for detail in details:
+			name = detail_name(detail)
+			for totals in (hourly[hour, detail.product, name], daily[day, detail.product, name]):
+				totals[0] += 1
+				totals[1] += detail.price
+
+	return hourly, daily
+
+
+def upsert(model, period_field: str, rows: dict):
+	"""Suma las cantidades y los totales a los acumulados, creando las filas que no existan.
+
+	:param model: ``HourlySales`` o ``DailySales``.
+	:param period_field: 'period' o 'day'.
+	:param rows: {(periodo, tipo de producto, producto): [cantidad, total]}.
+	"""
+	if not rows:
+		return
+
+	quote = connection.ops.quote_name
+	table = quote(model._meta.db_table)
+	period_column = quote(period_field)
+	period_db_field = model._meta.get_field(period_field)
+	total_field = model._meta.get_field('total')
+
+	columns = [quote('is_activated'), period_column, quote('product'), quote('name'), quote('quantity'), quote('total')]
+	sql = (
+		'INSERT INTO {table} ({columns}) VALUES {{values}} '
+		'ON CONFLICT ({period}, {product}, {name}) DO UPDATE SET '
+		'{quantity} = {table}.{quantity} + excluded.{quantity}, '
+		'{total} = {table}.{total} + excluded.{total}'
+	).format(
+		table=table,
+		columns=', '.join(columns),
+		period=period_column,
+		product=quote('product'),
+		name=quote('name'),
+		quantity=quote('quantity'),
+		total=quote('total'),
+	)
+
+	# SQLite limita la cantidad de parámetros por sentencia.
+	batch_size = max(1, (connection.features.max_query_params or 6000) // len(columns))
+	items = list(rows.items())
+	with connection.cursor() as cursor:
+		for start in range(0, len(items), batch_size):
+			batch = items[start:start + batch_size]
+			params = []
+			for (period, product, name), (quantity, total) in batch:
+				params.extend([
+					True,
+					period_db_field.get_db_prep_value(period, connection),
+					product,
+					name,
+					quantity,
+					total_field.get_db_prep_value(total, connection),
+				])
+			values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(batch))
+			cursor.execute(sql.format(values=values), params)
+
+
+def record_sales(bills: list):
+	"""Suma las ventas de las facturas a los acumulados por hora y por día.
+
+	Debe llamarse dentro de la misma transacción en la que se guardan los detalles.
+
+	:param bills: lista de tuplas (fecha de la factura, detalles de la factura).
+	"""
+	hourly, daily = aggregate(bills)
+	upsert(HourlySales, 'period', hourly)
+	upsert(DailySales, 'day', daily)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Invalidación de los datos en caché cuando cambian los modelos del catálogo.
+
+Los receptores se conectan en ``SandwichesWebConfig.ready``. Las versiones cambian después de que se confirma la
+transacción del cambio (ver ``versioning.schedule_bump``). Las operaciones masivas (``bulk_create``, ``update``,
+etc.) no envían señales, así que quien las use debe llamar a ``bump_version`` por su cuenta.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .combos import combos_with_product, schedule_refresh
+from .images import schedule_photo
+from .models import *
+from .versioning import schedule_bump
+
+MENU_MODELS = [Sandwich, Drink, SideDish, Combo, ProductsInCombo]
+PRICES_MODELS = [Sandwich, Drink, SideDish, Combo, Ingredient]
+PROMOTIONS_MODELS = [Promotion, ScheduleProm]
+PHOTO_MODELS = [Sandwich, Drink, SideDish, Combo]
+# Productos que pueden formar parte de un combo, y su campo en ProductsInCombo.
+COMBO_COMPONENT_MODELS = {Sandwich: 'sandwich', Drink: 'drink', SideDish: 'side_dish'}
+
+
+def menu_changed(sender, **kwargs):
+	schedule_bump('menu')
+
+
+def prices_changed(sender, **kwargs):
+	schedule_bump('prices')
+
+
+def promotions_changed(sender, **kwargs):
+	schedule_bump('promotions')
+
+
+def photo_saved(sender, instance, raw=False, **kwargs):
+	if not raw:
+		schedule_photo(instance)
+
+
+def combo_changed(sender, instance, raw=False, **kwargs):
+	if not raw:
+		schedule_refresh([instance.pk])
+
+
+def combo_link_changed(sender, instance, raw=False, **kwargs):
+	if not raw:
+		schedule_refresh([instance.combo_id])
+
+
+def combo_component_changed(sender, instance, raw=False, **kwargs):
+	if not raw:
+		schedule_refresh(combos_with_product(COMBO_COMPONENT_MODELS[sender], instance.pk))
+
+
+def connect_signals():
+	for model in MENU_MODELS:
+		post_save.connect(menu_changed, sender=model, dispatch_uid='menu_changed_save')
+		post_delete.connect(menu_changed, sender=model, dispatch_uid='menu_changed_delete')
+	for model in PRICES_MODELS:
+		post_save.connect(prices_changed, sender=model, dispatch_uid='prices_changed_save')
+		post_delete.connect(prices_changed, sender=model, dispatch_uid='prices_changed_delete')
+	for model in PROMOTIONS_MODELS:
+		post_save.connect(promotions_changed, sender=model, dispatch_uid='promotions_changed_save')
+		post_delete.connect(promotions_changed, sender=model, dispatch_uid='promotions_changed_delete')
+	for model in PHOTO_MODELS:
+		post_save.connect(photo_saved, sender=model, dispatch_uid='photo_saved')
+	post_save.connect(combo_changed, sender=Combo, dispatch_uid='combo_changed')
+	post_save.connect(combo_link_changed, sender=ProductsInCombo, dispatch_uid='combo_link_changed_save')
+	post_delete.connect(combo_link_changed, sender=ProductsInCombo, dispatch_uid='combo_link_changed_delete')
+	for model in COMBO_COMPONENT_MODELS:
+		post_save.connect(combo_component_changed, sender=model, dispatch_uid='combo_component_changed')
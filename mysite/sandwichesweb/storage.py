@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+# Extensiones que vale la pena comprimir. Las imágenes JPEG y PNG ya vienen comprimidas.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map', '.ico')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+	"""Archivos estáticos con el hash del contenido en el nombre y versiones ``.gz`` ya comprimidas.
+
+	``collectstatic`` genera, para cada archivo, una copia con el hash en el nombre (``styles.3f2a9c1b.css``) y el
+	manifiesto ``staticfiles.json``. Después, escribe al lado de cada copia comprimible un ``.gz`` para que el
+	servidor web lo envíe tal cual (por ejemplo, con ``gzip_static on`` en nginx), sin comprimir en cada petición.
+
+	Las plantillas obtienen los nombres con hash del manifiesto, que se carga una sola vez al iniciar el proceso.
+	Como los nombres cambian con el contenido, el servidor web puede enviarlos con caché de un año.
+	"""
+	def post_process(self, *args, **kwargs):
+		yield from super().post_process(*args, **kwargs)
+
+		if kwargs.get('dry_run'):
+			return
+
+		for name in set(self.hashed_files.values()):
+			if name.endswith(COMPRESSIBLE_EXTENSIONS):
+				self.compress(name)
+
+	def compress(self, name: str):
+		"""Guarda la versión ``.gz`` de un archivo, si resulta más pequeña que el original.
+		"""
+		with self.open(name) as original:
+			content = original.read()
+
+		# mtime=0 para que el mismo contenido genere siempre el mismo archivo.
+		compressed = gzip.compress(content, compresslevel=9, mtime=0)
+		if len(compressed) >= len(content):
+			return
+
+		gz_name = name + '.gz'
+		if self.exists(gz_name):
+			self.delete(gz_name)
+		self._save(gz_name, ContentFile(compressed))
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django import template
+
+from .. import promotions
+from ..versioning import get_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def catalog_version(*names) -> str:
+	"""Versión de uno o varios conjuntos de datos del catálogo (ver ``versioning.py``), para usarla en la clave de un
+	fragmento en caché. La versión cambia cuando se guardan sus modelos, así los fragmentos viejos dejan de usarse.
+
+	Uso: ``{% catalog_version 'menu' as menu_version %}{% cache 86400 order_menu menu_version %}``
+	"""
+	return '-'.join(str(get_version(name)) for name in names)
+
+
+@register.simple_tag
+def promotions_key(promotions_list) -> str:
+	"""Ids ordenados de las ofertas aplicables (ver ``promotions.promotions_key``), para la clave de su fragmento.
+
+	Uso: ``{% promotions_key promotions_list as promotion_ids %}{% cache 86400 promotion_cards promotion_ids %}``
+	"""
+	return promotions.promotions_key(promotions_list)
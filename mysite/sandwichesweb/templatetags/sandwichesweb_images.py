@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from ..images import photo_derivatives
+
+register = template.Library()
+
+
+@register.simple_tag
+def product_image(product, alt='', sizes='(max-width: 768px) 100vw, 33vw'):
+	"""Genera la etiqueta <picture> de la foto de un producto, con ``srcset`` de sus versiones reducidas.
+
+	Uso: ``{% product_image sandwich alt=sandwich.size %}``
+
+	Si las versiones reducidas todavía no se han generado, usa la foto original.
+	"""
+	if not product.photo:
+		return ''
+
+	versions = photo_derivatives(product)
+	if not versions:
+		return format_html('<img src="{}" alt="{}" loading="lazy">', product.photo.url, alt)
+
+	srcset = ', '.join('%s %sw' % (default_storage.url(name), width) for _, width, name, _ in versions)
+	webp_srcset = ', '.join(
+		'%s %sw' % (default_storage.url(webp), width) for _, width, _, webp in versions if webp
+	)
+	largest = default_storage.url(versions[-1][2])
+
+	source = format_html('<source type="image/webp" srcset="{}" sizes="{}">', webp_srcset, sizes) if webp_srcset else ''
+	return format_html(
+		'<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy"></picture>',
+		source, largest, srcset, sizes, alt
+	)
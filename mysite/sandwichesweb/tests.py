@@ -1,3 +1,964 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from . import versioning
+from .admin import estimated_count
+from .api import views as api_views
+from .archive import archive_purchases, client_bills, find_bill, find_invoice
+from .bench import percentile, summarize
+from .billing import billing
+from .cart import lines_to_models
+from .catalog import export_catalog, import_catalog, read_catalog, write_catalog
+from .checkout import CheckoutTimeout, CheckoutWriter, checkout, save_purchase, save_purchases
+from .combos import refresh_combos
+from .export import export_lines
+from .images import process_photo
+from .metrics import registry
+from .middleware import RequestTimings, _current
+from .models import *
+from .numbering import OrderNumberAllocator
+from .prices import INGREDIENT, SANDWICH, get_price_index
+from .pricing import PricedLine, get_pricing_rules, price_lines
+from .promotions import CompiledPromotion, PromotionIndex
+from .versioning import bump_version, get_cached_version, get_version
+
+
+class CatalogTestCase(TestCase):
+	"""``TestCase`` para las pruebas que confirman cambios del catálogo con ``run_on_commit``. Al deshacer cada prueba
+	(y los datos de la clase) el proceso olvida las versiones que recordó, que ya no están en la base de datos.
+	"""
+	def tearDown(self):
+		versioning._remember({}, float('-inf'))
+		super().tearDown()
+
+	@classmethod
+	def tearDownClass(cls):
+		versioning._remember({}, float('-inf'))
+		super().tearDownClass()
+
+
+@contextmanager
+def run_on_commit():
+	"""Ejecuta, al salir del bloque, las funciones de ``transaction.on_commit`` registradas dentro de él, y las que
+	estas registren. ``TestCase`` nunca confirma su transacción, así que de otro modo no se ejecutarían.
+	"""
+	start = len(connection.run_on_commit)
+	yield
+	while len(connection.run_on_commit) > start:
+		callbacks = connection.run_on_commit[start:]
+		del connection.run_on_commit[start:]
+		for savepoints, callback in callbacks:
+			callback()
+
+
+class BillingTests(TestCase):
+	"""Pruebas del motor de facturación.
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		cls.sandwich = Sandwich.objects.create(size='Individual', price=Decimal('5.00'))
+		cls.cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+		cls.ham = Ingredient.objects.create(name='Jamón', price=Decimal('1.50'))
+		cls.drink = Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+		cls.side_dish = SideDish.objects.create(name='Papas fritas', price=Decimal('2.00'))
+		cls.combo = Combo.objects.create(name='Chamito', price=Decimal('7.00'))
+
+	def make_bill(self, lines: int) -> Bill:
+		"""Crea una compra con ``lines`` pedidos de cada tipo de producto.
+		"""
+		purchase = Purchase.objects.create()
+		for _ in range(lines):
+			order = Order.objects.create(purchase=purchase, sub_total=Decimal('7.50'))
+			Addition.objects.create(order=order, sandwich=self.sandwich, ingredient=self.cheese)
+			Addition.objects.create(order=order, sandwich=self.sandwich, ingredient=self.ham)
+			Order.objects.create(purchase=purchase, drink=self.drink, sub_total=Decimal('1.00'))
+			Order.objects.create(purchase=purchase, side_dish=self.side_dish, sub_total=Decimal('2.00'))
+			Order.objects.create(purchase=purchase, combo=self.combo, sub_total=Decimal('7.00'))
+
+		return Bill.objects.create(purchase=purchase, total=0, ci_client=1, first_name_client='A', surname_client='B')
+
+	def test_details_and_quantities(self):
+		bill = self.make_bill(2)
+		billing(bill)
+
+		quantities = dict(QuantityOfProducts.objects.filter(bill=bill).values_list('product', 'quantity'))
+		self.assertEqual(quantities, {
+			Product.ListProducts.SANDWICH.label: 2,
+			Product.ListProducts.DRINK.label: 2,
+			Product.ListProducts.SIDE_DISH.label: 2,
+			Product.ListProducts.COMBO.label: 2,
+		})
+
+		sandwich_detail = Detail.objects.filter(bill=bill, product=Product.ListProducts.SANDWICH.label).first()
+		self.assertEqual(sandwich_detail.size, 'Individual')
+		self.assertEqual(sandwich_detail.ingredients, ' Queso y Jamón')
+		self.assertEqual(Detail.objects.filter(bill=bill).count(), 8)
+		self.assertIn('Individual con Queso y Jamón', Invoice.objects.get(bill=bill).document)
+
+	def test_invoice_of_bill_without_document(self):
+		bill = self.make_bill(1)
+		billing(bill)
+		Invoice.objects.filter(bill=bill).delete()  # Como las facturas anteriores a los documentos.
+
+		self.assertIn('Individual con Queso y Jamón', find_invoice(bill.pk))
+		self.assertTrue(Invoice.objects.filter(bill=bill).exists())
+
+		self.client.force_login(User.objects.create_user('staff', is_staff=True))
+		response = self.client.get('/sandwichesweb/bill/%d/' % bill.pk)
+		self.assertContains(response, '<title>SandwichesWeb - Factura %d</title>' % bill.pk)
+		self.assertContains(response, 'Individual con Queso y Jamón')
+		self.assertNotIn('<title>', Invoice.objects.get(bill=bill).document)
+
+	def test_query_count_does_not_depend_on_lines(self):
+		# 2 lecturas (pedidos y adicionales), 3 inserciones masivas (detalles, cantidades y documento), 2 acumulados
+		# de ventas y el savepoint de la transacción.
+		for lines in (1, 25):
+			bill = self.make_bill(lines)
+			with self.assertNumQueries(9):
+				billing(bill)
+
+	def test_sales_rollups(self):
+		for _ in range(2):
+			billing(self.make_bill(3))
+
+		daily = DailySales.objects.get(product=Product.ListProducts.DRINK.label, name='Pepsi')
+		self.assertEqual(daily.quantity, 6)
+		self.assertEqual(daily.total, Decimal('6.00'))
+		self.assertEqual(HourlySales.objects.get(name='Individual').quantity, 6)
+
+		self.client.force_login(User.objects.create_user('staff', is_staff=True))
+		sales = self.client.get('/sandwichesweb/reports/sales/hourly/').json()['sales']
+		self.assertEqual({row['name']: row['quantity'] for row in sales}['Individual'], 6)
+
+	def test_backfill_keeps_archived_sales(self):
+		old, recent = self.make_bill(2), self.make_bill(1)
+		old.date = timezone.now() - timedelta(days=400)
+		Bill.objects.filter(pk=old.pk).update(date=old.date)
+		Purchase.objects.filter(pk=old.purchase_id).update(date=old.date)
+		for bill in (old, recent):
+			billing(bill)
+		list(archive_purchases(days=365))
+		self.assertFalse(Bill.objects.filter(pk=old.pk).exists())
+
+		def rollups():
+			return (
+				sorted(HourlySales.objects.values_list('period', 'product', 'name', 'quantity', 'total')),
+				sorted(DailySales.objects.values_list('day', 'product', 'name', 'quantity', 'total')),
+			)
+
+		before = rollups()
+		call_command('backfill_sales_rollups', batch_size=1, stdout=io.StringIO())
+		self.assertEqual(rollups(), before)
+		self.assertEqual(DailySales.objects.get(day=timezone.localdate(old.date), name='Pepsi').quantity, 2)
+
+	def test_export_reads_bills_by_chunks(self):
+		bills = [self.make_bill(2) for _ in range(3)]
+		for bill in bills:
+			billing(bill)
+
+		# Una sola lectura de las facturas, por partes, y por cada bloque de 2 facturas sus detalles y cantidades.
+		with self.assertNumQueries(5):
+			documents = [json.loads(line) for line in export_lines(Bill.objects.all(), 'jsonl', chunk_size=2)]
+		self.assertEqual([document['id'] for document in documents], [bill.id for bill in bills])
+		self.assertEqual(documents[0]['details'][0]['ingredients'], ['Queso', 'Jamón'])
+		self.assertEqual(documents[0]['quantities'][Product.ListProducts.DRINK.label], 2)
+
+		lines = list(export_lines(Bill.objects.all(), 'csv'))
+		self.assertEqual(len(lines), 1 + 3 * 8)
+
+	def test_export_includes_archived_bills(self):
+		old, recent = self.make_bill(2), self.make_bill(1)
+		for bill in (old, recent):
+			billing(bill)
+		moment = timezone.make_aware(datetime(2025, 3, 10, 12, 0))
+		Purchase.objects.filter(pk=old.purchase_id).update(date=moment)
+		Bill.objects.filter(pk=old.pk).update(date=moment)
+		list(archive_purchases(days=365))
+
+		self.client.force_login(User.objects.create_user('staff', is_staff=True))
+		response = self.client.get('/sandwichesweb/reports/bills/export/', {'month': '2025-03', 'format': 'jsonl'})
+		documents = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+		self.assertEqual([document['id'] for document in documents], [old.pk])
+		self.assertEqual(documents[0]['details'][0]['ingredients'], ['Queso', 'Jamón'])
+
+		response = self.client.get('/sandwichesweb/reports/bills/export/', {'month': '2025-03'})
+		self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 1 + 8)
+
+	def test_archive_moves_old_purchases(self):
+		old, recent = self.make_bill(2), self.make_bill(1)
+		for bill in (old, recent):
+			billing(bill)
+		Purchase.objects.filter(pk=old.purchase_id).update(date=timezone.now() - timedelta(days=400))
+
+		self.assertEqual(list(archive_purchases(days=365, batch_size=1)), [1])
+		self.assertEqual(list(Bill.objects.values_list('pk', flat=True)), [recent.pk])
+		self.assertFalse(Order.objects.filter(purchase_id=old.purchase_id).exists())
+		self.assertFalse(Detail.objects.filter(bill_id=old.pk).exists())
+
+		archived = ArchivedPurchase.objects.get(pk=old.purchase_id)
+		self.assertEqual(len(archived.document['orders']), 8)
+		self.assertEqual(find_bill(old.pk)['details'][0]['ingredients'], ['Queso', 'Jamón'])
+		self.assertIn('Individual con Queso y Jamón', find_invoice(old.pk))
+		self.assertEqual([bill['id'] for bill in client_bills(1)], [recent.pk, old.pk])
+		self.assertEqual(estimated_count(Bill), 1)
+
+
+class CheckoutTests(TestCase):
+	"""Pruebas de la persistencia de la compra (``checkout.save_purchase`` y ``checkout.save_purchases``).
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		cls.sandwich = Sandwich.objects.create(size='Individual', price=Decimal('5.00'))
+		cls.cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+		cls.drink = Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+
+	def purchase(self, lines: int, ci=1) -> tuple:
+		"""Factura, pedidos y adicionales sin guardar, con ``lines`` sándwiches y ``lines`` bebidas.
+		"""
+		orders = []
+		additions = []
+		for _ in range(lines):
+			sandwich = Order(sub_total=Decimal('6.00'))
+			additions.append(Addition(order=sandwich, sandwich=self.sandwich, ingredient=self.cheese))
+			orders.extend([sandwich, Order(drink=self.drink, sub_total=Decimal('1.00'))])
+
+		return Bill(ci_client=ci, first_name_client='A', surname_client='B'), orders, additions
+
+	def assertNothingSaved(self):
+		for model in (Purchase, Order, Addition, Bill):
+			self.assertFalse(model.objects.exists(), model.__name__)
+
+	def test_query_count_does_not_depend_on_lines(self):
+		# Punto de guardado, compra, pedidos, ids de los pedidos (SQLite), adicionales, factura y fin del punto de
+		# guardado.
+		for lines in (1, 20):
+			with self.assertNumQueries(7):
+				bill = save_purchase(*self.purchase(lines))
+			self.assertEqual(bill.total, Decimal('7.00') * lines)
+
+	def test_batch_query_count_does_not_depend_on_purchases(self):
+		# Además, el último id de las compras y los ids de las compras y de las facturas (SQLite).
+		for count in (1, 10):
+			with self.assertNumQueries(10):
+				bills = save_purchases([('quiosco-%d-%d' % (count, n),) + self.purchase(2) for n in range(count)])
+			self.assertEqual(len({bill.purchase_id for bill in bills}), count)
+		self.assertEqual(Addition.objects.count(), 2 * 11)
+
+	def test_failure_rolls_back_the_purchase(self):
+		with self.assertRaises(IntegrityError):
+			save_purchase(*self.purchase(2, ci=None))  # La factura, lo último que se guarda, no es válida.
+		self.assertNothingSaved()
+
+	def test_failure_rolls_back_the_batch(self):
+		entries = [('quiosco-1',) + self.purchase(1), ('quiosco-2',) + self.purchase(1, ci=None)]
+		with self.assertRaises(IntegrityError):
+			save_purchases(entries)
+		self.assertNothingSaved()
+
+
+class CheckoutWriterTests(TransactionTestCase):
+	"""Pruebas del hilo escritor de las compras. Cada prueba detiene el hilo hasta encolar sus compras, así todas
+	quedan en el mismo grupo.
+	"""
+	def setUp(self):
+		self.writer = CheckoutWriter()
+		self.release = threading.Event()
+		self.writer.submit(self.release.wait, 5)
+
+	def tearDown(self):
+		self.release.set()
+
+	def test_queued_purchases_share_one_commit(self):
+		events = []
+
+		def save(reference):
+			Purchase.objects.create()
+			events.append('save ' + reference)
+			transaction.on_commit(lambda: events.append('commit ' + reference))
+			return reference
+
+		futures = [self.writer.submit(save, reference) for reference in 'abc']
+		self.release.set()
+
+		self.assertEqual([future.result(5) for future in futures], ['a', 'b', 'c'])
+		self.assertEqual(events, ['save a', 'save b', 'save c', 'commit a', 'commit b', 'commit c'])
+
+	def test_failed_purchase_rolls_back_alone(self):
+		def save(reference):
+			Purchase.objects.create()
+			if reference == 'b':
+				raise ValueError(reference)
+			return reference
+
+		futures = [self.writer.submit(save, reference) for reference in 'abc']
+		self.release.set()
+
+		self.assertEqual(futures[0].result(5), 'a')
+		with self.assertRaises(ValueError):
+			futures[1].result(5)
+		self.assertEqual(futures[2].result(5), 'c')
+		self.assertEqual(Purchase.objects.count(), 2)
+
+	def test_timeout_cancels_queued_purchase(self):
+		with override_settings(SANDWICHESWEB_CHECKOUT_TIMEOUT=0.05):
+			with self.assertRaises(CheckoutTimeout):
+				self.writer.run(Purchase.objects.create)
+
+		self.release.set()
+		purchase = self.writer.run(Purchase.objects.create)
+		self.assertEqual(list(Purchase.objects.all()), [purchase])
+
+	def test_queries_count_toward_the_request(self):
+		self.release.set()
+		timings = RequestTimings()
+		token = _current.set(timings)
+		try:
+			self.writer.run(Purchase.objects.create)
+		finally:
+			_current.reset(token)
+
+		self.assertEqual(timings.queries, 3)  # Punto de guardado, INSERT y liberación del punto de guardado.
+
+
+@override_settings(SANDWICHESWEB_ORDER_NUMBER_BLOCK=5)
+class OrderNumberTests(TestCase):
+	"""Pruebas de los números de pedido.
+	"""
+	def test_processes_never_repeat_numbers(self):
+		# Cada asignador simula un proceso distinto, con su propio bloque.
+		first, second = OrderNumberAllocator(), OrderNumberAllocator()
+		numbers = []
+		for _ in range(12):
+			numbers.extend(first.allocate(1)[1])
+			numbers.extend(second.allocate(2)[1])
+
+		self.assertEqual(len(numbers), len(set(numbers)))
+		# Solo quedan sin usar los números del bloque en curso de cada proceso.
+		self.assertLessEqual(max(numbers), len(numbers) + 2 * 5)
+
+	def test_blocks_avoid_queries(self):
+		allocator = OrderNumberAllocator()
+		self.assertEqual(allocator.allocate(1)[1], [1])
+		with self.assertNumQueries(0):
+			self.assertEqual(allocator.allocate(4)[1], [2, 3, 4, 5])
+		with self.assertNumQueries(4):  # Savepoint, UPDATE, SELECT y liberación del savepoint.
+			self.assertEqual(allocator.allocate(7)[1], list(range(6, 13)))
+
+
+class VersioningTests(CatalogTestCase):
+	"""Pruebas de las versiones del catálogo.
+	"""
+	def test_versions_are_shared_between_processes(self):
+		with override_settings(SANDWICHESWEB_VERSION_TTL=0):
+			version = get_version('menu')
+		with self.assertNumQueries(0):
+			self.assertEqual(get_cached_version('menu'), version)
+
+		# Otro proceso cambia la versión: se ve al volver a leer las versiones.
+		DataVersion.objects.filter(name='menu').update(version=version + 1000)
+		with override_settings(SANDWICHESWEB_VERSION_TTL=0):
+			self.assertIsNone(get_cached_version('menu'))
+			self.assertEqual(get_version('menu'), version + 1000)
+
+		# La nueva versión se recuerda solo después de confirmar la transacción.
+		with run_on_commit():
+			bumped = bump_version('menu')
+			self.assertGreater(bumped, version + 1000)
+			self.assertEqual(get_cached_version('menu'), version + 1000)
+		self.assertEqual(get_cached_version('menu'), bumped)
+
+	def test_catalog_changes_bump_after_commit(self):
+		with override_settings(SANDWICHESWEB_VERSION_TTL=0):
+			version = get_version('menu')
+
+		with run_on_commit():
+			Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+			self.assertEqual(DataVersion.objects.get(name='menu').version, version)
+		self.assertGreater(DataVersion.objects.get(name='menu').version, version)
+		self.assertGreater(get_version('menu'), version)
+
+
+class TimingMiddlewareTests(TestCase):
+	"""Pruebas de las mediciones de las peticiones.
+	"""
+	def test_streamed_queries_are_counted(self):
+		self.client.force_login(User.objects.create_user('staff', is_staff=True))
+		registry.reset()
+
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/sandwichesweb/reports/bills/export/')
+			b''.join(response.streaming_content)
+			response.close()
+
+		histogram = registry._routes['sandwichesweb:export_bills']['queries']
+		self.assertEqual(histogram.count, 1)
+		self.assertEqual(histogram.sum, len(queries))
+
+	def test_template_responses_are_timed(self):
+		registry.reset()
+		self.client.get('/sandwichesweb/client/')
+
+		histogram = registry._routes['sandwichesweb:client']['template_ms']
+		self.assertEqual(histogram.count, 1)
+		self.assertGreater(histogram.sum, 0)
+
+	async def test_async_requests_are_timed(self):
+		response = await AsyncClient().get('/sandwichesweb/client/')
+		self.assertIn('view;dur=', response['Server-Timing'])
+		self.assertNotIn('tpl;dur=0.00', response['Server-Timing'])
+
+
+class ApiTests(CatalogTestCase):
+	"""Pruebas de la API REST.
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		cls.sandwich = Sandwich.objects.create(size='Individual', price=Decimal('5.00'))
+		cls.cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+		cls.drink = Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+
+	def test_catalog_not_modified(self):
+		response = self.client.get('/sandwichesweb/api/sandwiches/')
+		self.assertEqual(response.json()['results'][0]['size'], 'Individual')
+
+		response = self.client.get('/sandwichesweb/api/sandwiches/', HTTP_IF_NONE_MATCH=response['ETag'])
+		self.assertEqual(response.status_code, 304)
+
+	def test_checkout_in_one_request(self):
+		response = self.client.post('/sandwichesweb/api/checkout/', {
+			'ci': 123,
+			'first_name': 'Ana',
+			'surname': 'Pérez',
+			'lines': [
+				{'product_type': 'sandwich', 'product_id': self.sandwich.id},
+				{'product_type': 'drink', 'product_id': self.drink.id},
+			],
+		}, content_type='application/json')
+
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.json()['total'], '7.00')
+		self.assertEqual(Order.objects.filter(purchase__bill__id=response.json()['id']).count(), 2)
+
+	def test_checkout_retry_after_timeout(self):
+		data = {
+			'ci': 123,
+			'first_name': 'Ana',
+			'surname': 'Pérez',
+			'lines': [{'product_type': 'sandwich', 'product_id': self.sandwich.id}],
+		}
+		with mock.patch('sandwichesweb.api.views.checkout', side_effect=CheckoutTimeout()):
+			response = self.client.post('/sandwichesweb/api/checkout/', data, content_type='application/json')
+		self.assertEqual(response.status_code, 503)
+		# Los pedidos de la petición fallida no quedan en el carrito.
+		self.assertEqual(self.client.get('/sandwichesweb/api/cart/').json()['lines'], [])
+
+		response = self.client.post('/sandwichesweb/api/checkout/', data, content_type='application/json')
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.json()['total'], '6.00')
+		self.assertEqual(Bill.objects.get().total, Decimal('6.00'))
+		self.assertEqual(Order.objects.count(), 1)
+
+	def sync(self, purchases, **extra):
+		extra.setdefault('HTTP_AUTHORIZATION', 'Token secreto')
+		with override_settings(SANDWICHESWEB_KIOSK_TOKENS={'quiosco-1': 'secreto'}):
+			return self.client.post(
+				'/sandwichesweb/api/sync/', {'purchases': purchases}, content_type='application/json', **extra
+			)
+
+	def offline_purchase(self, reference, moment=None, **data):
+		purchase = {
+			'reference': reference,
+			'date': (moment or timezone.now()).isoformat(),
+			'total': '1.00',
+			'ci': 1,
+			'first_name': 'Ana',
+			'surname': 'Pérez',
+			'lines': [{'product_type': 'drink', 'product_id': self.drink.id, 'sub_total': '1.00'}],
+		}
+		purchase.update(data)
+		return purchase
+
+	def test_sync_is_idempotent(self):
+		purchases = [self.offline_purchase('quiosco-1-%d' % number, ci=number) for number in range(3)]
+		purchases.append(self.offline_purchase('quiosco-1-x', lines=[]))
+		purchases.append(self.offline_purchase('quiosco-1-y', total='2.00'))
+
+		results = self.sync(purchases).json()['results']
+		self.assertEqual([result['status'] for result in results], ['created'] * 3 + ['invalid'] * 2)
+
+		results = self.sync(purchases[:3]).json()['results']
+		self.assertEqual([result['status'] for result in results], ['duplicate'] * 3)
+		self.assertEqual(Bill.objects.count(), 3)
+		self.assertEqual(Detail.objects.count(), 3)
+
+	def test_sync_requires_kiosk_token(self):
+		purchases = [self.offline_purchase('quiosco-1-0')]
+
+		self.assertEqual(self.sync(purchases, HTTP_AUTHORIZATION='').status_code, 403)
+		self.assertEqual(self.sync(purchases, HTTP_AUTHORIZATION='Token otro').status_code, 403)
+		self.assertFalse(Bill.objects.exists())
+
+	def test_sync_keeps_kiosk_date_and_totals(self):
+		moment = timezone.make_aware(datetime(2026, 10, 12, 13, 30))
+		purchase = self.offline_purchase('quiosco-1-0', moment, total='0.90', lines=[
+			{'product_type': 'drink', 'product_id': self.drink.id, 'sub_total': '0.90'},
+		])
+
+		result = self.sync([purchase]).json()['results'][0]
+
+		bill = Bill.objects.select_related('purchase').get(pk=result['bill'])
+		self.assertEqual((bill.date, bill.purchase.date), (moment, moment))
+		self.assertEqual(bill.total, Decimal('0.90'))
+		order = Order.objects.get(purchase=bill.purchase)
+		self.assertEqual((order.day, order.sub_total), (date(2026, 10, 12), Decimal('0.90')))
+
+	def test_sync_prices_each_purchase_at_its_moment(self):
+		with run_on_commit():
+			schedule = ScheduleProm.objects.create(start_hour='12:00', end_hour='14:00', monday=True)
+			promotion = Promotion.objects.create(
+				name='Almuerzo', discount=Decimal('0.10'), schedule=schedule, start_date=date(2026, 10, 1)
+			)
+		lunch = timezone.make_aware(datetime(2026, 10, 12, 13, 59))  # Lunes, dentro de la oferta.
+		afternoon = timezone.make_aware(datetime(2026, 10, 12, 14, 30))
+		purchases = [
+			self.offline_purchase('quiosco-1-0', lunch, total='0.90', lines=[
+				{'product_type': 'drink', 'product_id': self.drink.id, 'sub_total': '0.90'},
+			]),
+			self.offline_purchase('quiosco-1-1', afternoon),
+		]
+
+		results = self.sync(purchases).json()['results']
+
+		self.assertEqual([result['total'] for result in results], ['0.90', '1.00'])
+		applications = PromApplication.objects.values_list('order__purchase__reference', 'promotion_id')
+		self.assertEqual(list(applications), [('quiosco-1-0', promotion.id)])
+
+	def test_concurrent_sync_reports_duplicates(self):
+		self.sync([self.offline_purchase('quiosco-1-0')])
+		purchases = [self.offline_purchase('quiosco-1-0'), self.offline_purchase('quiosco-1-1')]
+
+		# Como si otro lote hubiera guardado 'quiosco-1-0' después de buscar las referencias ya sincronizadas.
+		real = api_views.synced_references
+		with mock.patch.object(api_views, 'synced_references', side_effect=[{}, real(['quiosco-1-0'])]):
+			results = self.sync(purchases).json()['results']
+
+		self.assertEqual([result['status'] for result in results], ['duplicate', 'created'])
+		self.assertEqual(Bill.objects.count(), 2)
+
+
+class ViewTests(TestCase):
+	"""Pruebas de las vistas del flujo de compra.
+	"""
+	client_data = {'ci': 1, 'first_name': 'Ana', 'middle_name': '', 'surname': 'Pérez', 'second_surname': ''}
+
+	def test_empty_orders_are_not_billed(self):
+		self.client.get('/sandwichesweb/order/')  # Deja un pedido vacío en el carrito.
+		response = self.client.post('/sandwichesweb/client/purchasedone/', self.client_data)
+
+		self.assertRedirects(response, '/sandwichesweb/order/')
+		self.assertFalse(Bill.objects.exists())
+		self.assertFalse(Order.objects.exists())
+
+	async def test_asgi_requests_use_async_views(self):
+		# response.resolver_match del cliente de pruebas se resuelve con ROOT_URLCONF: se observa la vista llamada.
+		with mock.patch('sandwichesweb.async_views.TemplateResponse', wraps=TemplateResponse) as async_response:
+			await AsyncClient().get('/sandwichesweb/client/')
+			self.assertEqual(async_response.call_count, 1)
+
+			await sync_to_async(self.client.get)('/sandwichesweb/client/')
+			self.assertEqual(async_response.call_count, 1)
+
+
+class MenuFragmentTests(CatalogTestCase):
+	"""Pruebas de los fragmentos en caché del menú (order.html), que se vuelve a generar cuando cambia la versión
+	'menu', y de las ofertas (index.html).
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		with run_on_commit():
+			cls.drink = Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+			fries = SideDish.objects.create(name='Papas', price=Decimal('0.75'))
+			cls.combo = Combo.objects.create(name='Chamito', price=Decimal('1.25'))
+			ProductsInCombo.objects.create(combo=cls.combo, drink=cls.drink)
+			ProductsInCombo.objects.create(combo=cls.combo, side_dish=fries)
+
+	def order_page(self):
+		return self.client.get('/sandwichesweb/order/')
+
+	def test_fragment_follows_price_change(self):
+		self.assertContains(self.order_page(), '<p>1.00</p>')
+
+		with run_on_commit():
+			self.drink.price = Decimal('1.25')
+			self.drink.save()
+		response = self.order_page()
+		self.assertContains(response, '<p>1.25</p>')
+		self.assertNotContains(response, '<p>1.00</p>')
+
+	def test_fragment_follows_photo_change(self):
+		self.assertNotContains(self.order_page(), 'uploads/pepsi')
+
+		drink = Drink.objects.get(pk=self.drink.pk)
+		with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+			photo = io.BytesIO()
+			Image.new('RGB', (800, 600), 'red').save(photo, 'JPEG')
+			# Las versiones reducidas se generan en el grupo de hilos, después del COMMIT: aquí se generan aparte.
+			with mock.patch('sandwichesweb.signals.schedule_photo'), run_on_commit():
+				drink.photo.save('pepsi.jpg', ContentFile(photo.getvalue()))
+			self.assertContains(self.order_page(), 'src="/media/uploads/pepsi')
+
+			# Lo que hace el grupo de hilos, sin cerrar la conexión de la prueba.
+			with mock.patch('sandwichesweb.images.connections'), run_on_commit():
+				process_photo(Drink, drink.pk, drink.photo.name)
+			self.assertContains(self.order_page(), '<picture>')
+
+	def test_promotion_cards_follow_applicable_promotions(self):
+		caches['template_fragments'].clear()
+		with run_on_commit():
+			schedule = ScheduleProm.objects.create(start_hour='12:00', end_hour='14:00', monday=True)
+			promotion = Promotion.objects.create(
+				name='Almuerzo', discount=Decimal('0.10'), schedule=schedule, start_date=date(2026, 10, 1)
+			)
+		lunch = datetime(2026, 10, 12, 13, 0)  # Lunes, dentro de la oferta.
+		afternoon = datetime(2026, 10, 12, 15, 0)
+
+		with mock.patch('sandwichesweb.promotions.local_moment', return_value=lunch):
+			self.assertContains(self.client.get('/sandwichesweb/'), 'Almuerzo')
+		key = make_template_fragment_key('promotion_cards', [get_version('promotions'), promotion.id])
+		self.assertIn('Almuerzo', caches['template_fragments'].get(key))
+
+		with mock.patch('sandwichesweb.promotions.local_moment', return_value=afternoon):
+			self.assertNotContains(self.client.get('/sandwichesweb/'), 'Almuerzo')
+
+	def test_fragment_follows_combo_summary(self):
+		self.assertContains(self.order_page(), 'Ahorras 0.50')
+
+		# update() no envía señales: solo el nuevo resumen del combo cambia la versión del menú.
+		Drink.objects.filter(pk=self.drink.pk).update(price=Decimal('2.00'))
+		with run_on_commit():
+			refresh_combos([self.combo.id])
+		self.assertContains(self.order_page(), 'Ahorras 1.50')
+
+
+class PromotionIndexTests(SimpleTestCase):
+	"""Pruebas del índice de ofertas en los límites de los horarios. El 19/10/2026 es lunes.
+	"""
+	@staticmethod
+	def promotion(pk, weekdays, start, end, start_date=date(2026, 10, 19), end_date=None):
+		return CompiledPromotion(
+			id=pk, name=str(pk), description='', discount=Decimal('0.10'), start_date=start_date, end_date=end_date,
+			weekdays=weekdays, start_minute=start * 60, end_minute=end * 60,
+		)
+
+	def assertApplies(self, index, moment, ids):
+		self.assertEqual([promotion.id for promotion in index.at(datetime(*moment))], ids, moment)
+
+	def test_schedule_past_midnight(self):
+		# Lunes de 22:00 a 02:00, hasta el lunes 26/10.
+		index = PromotionIndex(1, [self.promotion(1, 0b0000001, 22, 2, end_date=date(2026, 10, 26))])
+
+		self.assertApplies(index, (2026, 10, 19, 21, 59), [])
+		self.assertApplies(index, (2026, 10, 19, 22, 0), [1])
+		self.assertApplies(index, (2026, 10, 19, 23, 59), [1])
+		self.assertApplies(index, (2026, 10, 20, 0, 0), [1])
+		self.assertApplies(index, (2026, 10, 20, 1, 59), [1])
+		self.assertApplies(index, (2026, 10, 20, 2, 0), [])  # El minuto final no se incluye.
+		self.assertApplies(index, (2026, 10, 20, 22, 30), [])  # Martes.
+
+		# La madrugada del día siguiente a end_date pertenece al horario del último lunes.
+		self.assertApplies(index, (2026, 10, 27, 0, 30), [1])
+		self.assertApplies(index, (2026, 11, 2, 22, 30), [])
+		# La madrugada del primer día pertenece al lunes anterior a start_date.
+		self.assertApplies(index, (2026, 10, 13, 0, 30), [])
+
+	def test_sunday_wraps_to_monday(self):
+		index = PromotionIndex(1, [self.promotion(1, 0b1000000, 23, 1, start_date=date(2026, 10, 18))])
+
+		self.assertApplies(index, (2026, 10, 18, 22, 59), [])
+		self.assertApplies(index, (2026, 10, 18, 23, 0), [1])
+		self.assertApplies(index, (2026, 10, 19, 0, 0), [1])
+		self.assertApplies(index, (2026, 10, 19, 1, 0), [])
+		self.assertApplies(index, (2026, 10, 24, 23, 30), [])  # Sábado.
+
+	def test_same_start_and_end_is_all_day(self):
+		index = PromotionIndex(1, [
+			self.promotion(1, 0b0000100, 12, 12),  # Miércoles, todo el día.
+			self.promotion(2, 0b0000100, 10, 14),
+		])
+
+		self.assertApplies(index, (2026, 10, 21, 0, 0), [1])
+		self.assertApplies(index, (2026, 10, 21, 12, 0), [1, 2])
+		self.assertApplies(index, (2026, 10, 21, 23, 59), [1])
+		self.assertApplies(index, (2026, 10, 22, 0, 0), [])
+
+
+class PriceIndexTests(CatalogTestCase):
+	"""Pruebas del índice de precios en memoria.
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		with run_on_commit():
+			cls.sandwich = Sandwich.objects.create(size='Individual', price=Decimal('5.00'))
+			cls.cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+
+	def test_selection_without_queries(self):
+		get_pricing_rules()  # Carga los índices de precios y de ofertas.
+
+		with self.assertNumQueries(0):
+			prices = get_price_index()
+			sandwich = prices.get(SANDWICH, str(self.sandwich.id))
+			cheese = prices.get_by_name(INGREDIENT, '  QUESO ')
+			price = get_pricing_rules().base_price({
+				'additions': [{'ingredient_id': cheese.id, 'sandwich_id': sandwich.id}],
+			})
+		self.assertEqual(price, Decimal('6.00'))
+
+	def test_index_follows_prices_version(self):
+		index = get_price_index()
+
+		# update() no envía señales: el índice sigue igual hasta que cambia la versión 'prices'.
+		Ingredient.objects.filter(pk=self.cheese.pk).update(price=Decimal('1.50'))
+		self.assertIs(get_price_index(), index)
+		with run_on_commit():
+			bump_version('prices')
+		self.assertEqual(get_price_index().get(INGREDIENT, self.cheese.id).price, Decimal('1.50'))
+
+		with run_on_commit():
+			self.sandwich.is_activated = False
+			self.sandwich.save()
+		self.assertIsNone(get_price_index().get(SANDWICH, self.sandwich.id))
+
+
+class PricingTests(CatalogTestCase):
+	"""Pruebas del motor de precios.
+	"""
+	@classmethod
+	def setUpTestData(cls):
+		cls.sandwich = Sandwich.objects.create(size='Individual', price=Decimal('5.00'))
+		cls.cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+		cls.drink = Drink.objects.create(name='Pepsi', price=Decimal('1.00'))
+		with run_on_commit():
+			schedule = ScheduleProm.objects.create(  # Misma hora de inicio y fin: todo el día.
+				start_hour='00:00', end_hour='00:00', monday=True, tuesday=True, wednesday=True, thursday=True,
+				friday=True, saturday=True, sunday=True
+			)
+			start_date = timezone.localdate() - timedelta(days=1)
+			Promotion.objects.create(name='Poco', discount=Decimal('0.05'), schedule=schedule, start_date=start_date)
+			cls.promotion = Promotion.objects.create(
+				name='Mucho', discount=Decimal('0.10'), schedule=schedule, start_date=start_date
+			)
+
+	def test_cart_priced_with_best_promotion(self):
+		lines = [
+			{'sub_total': '0', 'additions': [{'ingredient_id': self.cheese.id, 'sandwich_id': self.sandwich.id}]},
+			{'sub_total': '0', 'drink_id': self.drink.id},
+		]
+		get_pricing_rules()
+		with self.assertNumQueries(0):
+			priced = price_lines(lines)
+		self.assertEqual(priced[0], PricedLine(Decimal('6.00'), Decimal('0.60'), Decimal('5.40'), self.promotion.id))
+		self.assertEqual(priced[1].sub_total, Decimal('0.90'))
+
+		orders, additions = lines_to_models(lines)
+		bill = checkout(Bill(ci_client=1, first_name_client='A', surname_client='B'), orders, additions)
+		self.assertEqual(bill.total, Decimal('6.30'))
+		self.assertEqual(PromApplication.objects.filter(promotion=self.promotion).count(), 2)
+
+
+class ComboSummaryTests(TransactionTestCase):
+	"""Pruebas de los resúmenes de los combos. Se recalculan después del ``COMMIT``, por eso no se usa ``TestCase``.
+	"""
+	def setUp(self):
+		self.combo = Combo.objects.create(name='Chamito', price=Decimal('7.00'))
+		self.drink = Drink.objects.create(name='Pepsi', price=Decimal('3.00'))
+		fries = SideDish.objects.create(name='Papas fritas', price=Decimal('2.00'), is_activated=False)
+		ProductsInCombo.objects.create(combo=self.combo, sandwich=Sandwich.objects.create(size='Individual', price=5))
+		ProductsInCombo.objects.create(combo=self.combo, drink=self.drink)
+		ProductsInCombo.objects.create(combo=self.combo, side_dish=fries)
+
+	def summary(self) -> ComboSummary:
+		return ComboSummary.objects.get(combo=self.combo)
+
+	def test_summary_skips_inactive_components(self):
+		summary = self.summary()
+
+		self.assertEqual([item['name'] for item in summary.components], ['Individual', 'Pepsi'])
+		self.assertEqual((summary.parts_total, summary.savings), (Decimal('8.00'), Decimal('1.00')))
+
+	def test_summary_follows_component_changes(self):
+		version = get_version('menu')
+
+		self.drink.price = Decimal('4.00')
+		self.drink.save()
+		self.assertEqual((self.summary().parts_total, self.summary().savings), (Decimal('9.00'), Decimal('2.00')))
+
+		self.drink.is_activated = False
+		self.drink.save()
+		self.assertEqual([item['name'] for item in self.summary().components], ['Individual'])
+		self.assertEqual(self.summary().savings, Decimal('0.00'))
+		self.assertGreater(get_version('menu'), version)
+
+
+class CatalogImportTests(TestCase):
+	"""Pruebas de la importación del catálogo.
+	"""
+	catalog = {
+		'sandwich': [{'size': 'Individual', 'price': '5.00'}],
+		'drink': [
+			{'name': 'Agua mineral', 'drink_type': 'Agua', 'price': '0.50'},
+			{'name': 'Pepsi', 'drink_type': 'Refresco', 'price': '1.00'},
+		],
+		'side_dish': [{'name': 'Papas fritas', 'price': '2.00'}],
+		'combo': [{'name': 'Chamito', 'price': '7.00', 'products': [{'sandwich': 'Individual'}, {'drink': 'Pepsi'}]}],
+		'ingredient': [{'name': 'Queso', 'price': '1.00'}],
+	}
+
+	def test_import_applies_only_the_differences(self):
+		import_catalog(self.catalog)
+		self.assertEqual(export_catalog(), self.catalog)
+		self.assertEqual(ComboSummary.objects.get().parts_total, Decimal('6.00'))
+
+		catalog = json.loads(json.dumps(self.catalog))
+		catalog['drink'].pop(0)
+		catalog['sandwich'][0]['price'] = '5.50'
+		catalog['combo'][0]['products'].append({'side_dish': 'Papas fritas'})
+		summary = import_catalog(catalog)
+
+		self.assertEqual(summary['sandwich'], {'created': 0, 'updated': 1, 'deactivated': 0})
+		self.assertEqual(summary['drink'], {'created': 0, 'updated': 0, 'deactivated': 1})
+		self.assertEqual(summary['combo_products'], {'created': 1, 'updated': 0, 'deactivated': 0})
+		self.assertFalse(Drink.objects.get(name='Agua mineral').is_activated)
+		self.assertEqual(export_catalog(), catalog)
+
+		# Sin cambios, ninguna escritura.
+		summary = import_catalog(catalog)
+		self.assertFalse(any(sum(changes.values()) for changes in summary.values()))
+
+	def test_csv_round_trip(self):
+		import_catalog(self.catalog)
+		file = io.StringIO()
+		write_catalog(export_catalog(), file, 'csv')
+		file.seek(0)
+		self.assertEqual(read_catalog(file, 'csv'), self.catalog)
+
+
+class ActiveCatalogTests(TestCase):
+	"""Pruebas del manejador ``active`` y de los índices parciales del catálogo.
+	"""
+	partial_indexes = {
+		'sandwich': 'sw_sandwich_active_size_idx',
+		'drink': 'sw_drink_active_name_idx',
+		'sidedish': 'sw_side_dish_active_name_idx',
+		'combo': 'sw_combo_active_name_idx',
+		'ingredient': 'sw_ingredient_active_name_idx',
+	}
+
+	def test_active_excludes_deactivated(self):
+		pepsi = Drink.objects.create(name='Pepsi', drink_type='Refresco', price=Decimal('1.00'))
+		Drink.objects.create(name='Agua mineral', drink_type='Agua', price=Decimal('0.50'), is_activated=False)
+		cheese = Ingredient.objects.create(name='Queso', price=Decimal('1.00'))
+		Ingredient.objects.create(name='Jamón', price=Decimal('1.50'), is_activated=False)
+
+		self.assertEqual(list(Drink.active.all()), [pepsi])
+		self.assertEqual(list(Ingredient.active.all()), [cheese])
+		self.assertEqual(Drink.objects.count(), 2)
+		self.assertIs(Drink._default_manager, Drink.objects)
+
+	def test_partial_indexes_in_migration_state(self):
+		state = MigrationLoader(connection).project_state()
+		with connection.cursor() as cursor:
+			for model_name, index_name in self.partial_indexes.items():
+				indexes = {index.name: index for index in state.models['sandwichesweb', model_name].options['indexes']}
+				self.assertEqual(indexes[index_name].condition, Q(is_activated=True))
+
+				table = state.apps.get_model('sandwichesweb', model_name)._meta.db_table
+				self.assertIn(index_name, connection.introspection.get_constraints(cursor, table))
+
+
+class CompressedStaticFilesTests(SimpleTestCase):
+	"""Pruebas de ``collectstatic`` con ``CompressedManifestStaticFilesStorage``.
+	"""
+	def temporary_directory(self) -> Path:
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		return Path(directory.name)
+
+	def collect(self, files: dict) -> Path:
+		source, static_root = self.temporary_directory(), self.temporary_directory()
+		for name, content in files.items():
+			(source / name).write_bytes(content)
+
+		with override_settings(
+			STATIC_ROOT=static_root, STATICFILES_DIRS=[source],
+			STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+			STATICFILES_STORAGE='sandwichesweb.storage.CompressedManifestStaticFilesStorage',
+		):
+			call_command('collectstatic', interactive=False, verbosity=0)
+		return static_root
+
+	def test_writes_gz_next_to_hashed_names(self):
+		content = b'.menu { color: #333; }\n' * 200
+		static_root = self.collect({'styles.css': content})
+
+		hashed_name = json.loads((static_root / 'staticfiles.json').read_text())['paths']['styles.css']
+		self.assertNotEqual(hashed_name, 'styles.css')
+		self.assertEqual(gzip.decompress((static_root / (hashed_name + '.gz')).read_bytes()), content)
+		self.assertFalse((static_root / 'styles.css.gz').exists())
+
+	def test_skips_compressed_and_small_files(self):
+		photo = io.BytesIO()
+		Image.new('RGB', (64, 64), 'red').save(photo, 'PNG')
+		static_root = self.collect({'logo.png': photo.getvalue(), 'robots.txt': b'x'})
+
+		# La imagen por la extensión; el texto porque comprimido ocuparía más.
+		self.assertEqual(list(static_root.glob('*.gz')), [])
+		self.assertTrue((static_root / 'robots.txt').exists())
+
+
+class BenchTests(SimpleTestCase):
+	"""Pruebas de los resúmenes de las mediciones de rendimiento.
+	"""
+	def test_percentile_nearest_rank(self):
+		values = list(range(1, 101))
+		self.assertEqual(percentile(values, 0.50), 50)
+		self.assertEqual(percentile(values, 0.95), 95)
+		self.assertEqual(percentile(values, 0.99), 99)
+		self.assertEqual(percentile(values, 0.07), 7)
+		self.assertEqual(percentile(values, 1.0), 100)
+		self.assertEqual(percentile(values, 0.0), 1)
+
+		self.assertEqual(percentile([3, 7, 9], 0.50), 7)
+		self.assertEqual(percentile([3], 0.99), 3)
+		self.assertEqual(percentile([], 0.50), 0.0)
+
+	def test_summarize(self):
+		latencies = [0.004, 0.001, 0.003, 0.002]
+		self.assertEqual(summarize(latencies, 2.0), {
+			'requests': 4, 'rps': 2.0, 'p50_ms': 2.0, 'p95_ms': 4.0, 'p99_ms': 4.0, 'max_ms': 4.0,
+		})
+		self.assertEqual(summarize([], 0), {
+			'requests': 0, 'rps': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0,
+		})
@@ -10,5 +10,12 @@ urlpatterns = [
 	# path('<int:product_id>/selection', views.selection, name='selection')
 	path('selection/', views.selection, name='selection'),
 	path('client/', views.client_view, name='client'),
-	path('client/purchasedone/', views.bill_view, name='genbill')
+	path('client/purchasedone/', views.bill_view, name='genbill'),
+	path('bill/<int:bill_id>/', views.invoice_view, name='invoice'),
+	path('metrics/', views.metrics_view, name='metrics'),
+	path('reports/sales/daily/', views.daily_sales_view, name='daily_sales'),
+	path('reports/sales/hourly/', views.hourly_sales_view, name='hourly_sales'),
+	path('reports/bills/export/', views.export_bills_view, name='export_bills'),
+	path('reports/bills/<int:bill_id>/', views.bill_lookup_view, name='bill_lookup'),
+	path('reports/clients/<int:ci>/bills/', views.client_bills_view, name='client_bills'),
 ]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Versiones de los datos del catálogo guardadas en la base de datos.
+
+Cada conjunto de datos (el menú, las ofertas, etc.) tiene un número de versión que cambia cada vez que se modifica
+alguno de sus modelos. Lo que se guarde en caché a partir de esos datos se guarda bajo una clave que incluye la
+versión, así al cambiar la versión las entradas viejas simplemente dejan de usarse.
+
+Las versiones se guardan en ``DataVersion``, así un cambio hecho en un proceso (otro trabajador, el administrador o
+un comando) llega a todos los demás. Cada proceso lee todas las versiones con una sola consulta y las usa durante
+``VERSION_TTL`` segundos antes de volver a leerlas.
+
+La versión es una marca de tiempo en milisegundos, así sirve también como fecha de última modificación y no se
+repite aunque se vacíe la tabla.
+
+Los cambios de los modelos cambian la versión después de que se confirma su transacción (``schedule_bump``): si no,
+otro proceso podría ver la nueva versión antes que los datos nuevos y guardar en caché, bajo la nueva versión, los
+datos anteriores.
+"""
+import functools
+import threading
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .conf import get_setting
+from .models import *
+
+# Versiones leídas de la base de datos y el momento de la lectura. Se reemplazan juntas, nunca se modifican.
+_versions = ({}, float('-inf'))
+
+
+def _now() -> int:
+	return int(time.time() * 1000)
+
+
+def _remember(versions: dict, read_at: float = None):
+	global _versions
+	_versions = (versions, time.monotonic() if read_at is None else read_at)
+
+
+def _remember_version(name: str, version: int):
+	# No cambia el momento de la lectura: las demás versiones se vuelven a leer a su tiempo.
+	versions, read_at = _versions
+	_remember(dict(versions, **{name: version}), read_at)
+
+
+def _load_versions() -> dict:
+	"""Obtiene todas las versiones, leyéndolas de la base de datos si pasaron más de ``VERSION_TTL`` segundos desde
+	la última lectura.
+
+	:rtype: dict
+	"""
+	versions, read_at = _versions
+	if time.monotonic() - read_at >= get_setting('VERSION_TTL'):
+		versions = dict(DataVersion.objects.values_list('name', 'version'))
+		_remember(versions)
+
+	return versions
+
+
+def get_cached_version(name: str) -> int:
+	"""Obtiene la versión de un conjunto de datos solo si se leyó hace menos de ``VERSION_TTL`` segundos. No consulta
+	la base de datos, así puede usarse desde el ciclo de eventos de las vistas asíncronas.
+
+	:return: la versión, o None si hay que volver a leerla.
+	:rtype: int
+	"""
+	versions, read_at = _versions
+	if time.monotonic() - read_at >= get_setting('VERSION_TTL'):
+		return None
+
+	return versions.get(name)
+
+
+def get_version(name: str) -> int:
+	"""Obtiene la versión actual de un conjunto de datos.
+
+	:param name: nombre del conjunto de datos (por ejemplo, 'menu').
+	:return: versión actual.
+	:rtype: int
+	"""
+	version = _load_versions().get(name)
+	if version is None:
+		try:
+			with transaction.atomic():
+				DataVersion.objects.create(name=name, version=_now())
+		except IntegrityError:  # Otro proceso creó la versión al mismo tiempo.
+			pass
+		version = DataVersion.objects.filter(name=name).values_list('version', flat=True).get()
+		_remember_version(name, version)
+
+	return version
+
+
+def bump_version(name: str) -> int:
+	"""Cambia la versión de un conjunto de datos, para invalidar lo que se haya guardado con la anterior.
+
+	El ``UPDATE`` calcula la nueva versión en la base de datos, así dos procesos que la cambien a la vez nunca
+	obtienen la misma.
+
+	El proceso recuerda la nueva versión solo si se confirma la transacción en curso.
+
+	:param name: nombre del conjunto de datos.
+	:return: nueva versión.
+	:rtype: int
+	"""
+	with transaction.atomic():
+		rows = DataVersion.objects.filter(name=name)
+		if not rows.update(version=Greatest(F('version') + 1, Value(_now()))):
+			try:
+				with transaction.atomic():
+					DataVersion.objects.create(name=name, version=_now())
+			except IntegrityError:  # Otro proceso creó la versión al mismo tiempo.
+				rows.update(version=Greatest(F('version') + 1, Value(_now())))
+		version = rows.values_list('version', flat=True).get()
+
+	transaction.on_commit(functools.partial(_remember_version, name, version))
+	return version
+
+
+def schedule_bump(name: str):
+	"""Cambia la versión de un conjunto de datos cuando se confirme la transacción en curso, o ahora mismo si no hay
+	ninguna.
+	"""
+	transaction.on_commit(functools.partial(bump_version, name))
+
+
+def versioned_key(name: str, *parts) -> str:
+	"""Genera una clave de caché que incluye la versión actual de un conjunto de datos.
+
+	:param name: nombre del conjunto de datos.
+	:param parts: partes adicionales de la clave.
+	:return: clave del tipo 'sandwichesweb:menu:1612300000000'.
+	:rtype: str
+	"""
+	return ':'.join(['sandwichesweb', name, str(get_version(name))] + [str(part) for part in parts])
+
+
+class VersionedValue:
+	"""Valor guardado en la memoria del proceso, que se vuelve a calcular cuando cambia la versión de sus datos.
+
+	:param name: nombre del conjunto de datos.
+	:param loader: función que recibe la versión y calcula el valor.
+	"""
+	def __init__(self, name: str, loader):
+		self.name = name
+		self.loader = loader
+		self._version = None
+		self._value = None
+		self._lock = threading.Lock()
+
+	def get_if_current(self):
+		"""Obtiene el valor solo si ya está calculado para la versión actual. No consulta la base de datos (ver
+		``get_cached_version``).
+
+		:return: el valor, o None si hay que volver a calcularlo.
+		"""
+		version = get_cached_version(self.name)
+		if version is None or self._version != version:
+			return None
+
+		return self._value
+
+	def get(self):
+		version = get_version(self.name)
+		if self._version != version:
+			with self._lock:
+				if self._version != version:
+					self._value = self.loader(version)
+					self._version = version
+
+		return self._value
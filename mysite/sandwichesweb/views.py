@@ -1,13 +1,32 @@
-from django.http import HttpResponse, HttpResponseRedirect
-from django.shortcuts import render
+from datetime import datetime, time, timedelta
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (
+	Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+)
+from django.template.response import TemplateResponse
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
 
+from .archive import client_bills, find_bill, find_invoice
+from .billing import INVOICE_PAGE_TEMPLATE
+from .cart import CartFull
+from .checkout import CheckoutTimeout, checkout
+from .conf import get_setting
+from .export import EXPORT_FORMATS, archived_between, bills_between, export_lines, month_range
+from .menu import get_menu
+from .metrics import registry
 from .models import *
+from .prices import INGREDIENT, SANDWICH, get_price_index
+from .pricing import get_pricing_rules
+from .promotions import applicable_promotions
 
-orders_dict = {}
-
-order_list = []
-add_ing = []
+# Facturas de la sesión que el cliente puede volver a ver, las más recientes primero.
+BILLS_SESSION_KEY = '_sandwichesweb_bills'
+BILLS_IN_SESSION = 20
 
 PRODUCTS_TYPE = [
 	"combo",
@@ -17,52 +36,37 @@ PRODUCTS_TYPE = [
 ]
 
 
-def reset_orders_dict():
-	orders_dict = {  # Para guardar las órdenes sin tener que
-		'number': 1,
-		'orders': {
-			'order_list': [],
-			'additional_ing_list': []
-		}
-	}
-	
-	return
-
-
 def index_view(request):
 	template = 'sandwichesweb/index.html'
 	
-	promotions_list = Promotion.objects.filter(is_activated=True)
+	promotions_list = applicable_promotions()
 	
 	context = {
 		'promotions_list': promotions_list,
 	}
 	
-	return render(request, template, context)
+	return TemplateResponse(request, template, context)
 
 
-def order_view(request, order_number=1):
+def order_view(request):
 	template = 'sandwichesweb/order.html'
 	
-	sandwiches_list = Sandwich.objects.filter(is_activated=True).order_by('size')
-	drinks_list = Drink.objects.filter(is_activated=True).order_by('name')
-	side_dishes_list = SideDish.objects.filter(is_activated=True).order_by('name')
-	combo_list = Combo.objects.filter(is_activated=True).order_by('name')
+	# El menú solo se lee si su fragmento de la plantilla no está en la caché.
+	menu = SimpleLazyObject(get_menu)
 	
 	# Generando el pedido
-	order = Order(number=order_number)
-	order_list.append(order)
+	try:
+		order = request.cart.new_order()
+	except CartFull:
+		return HttpResponseRedirect(reverse('sandwichesweb:client', args=()))
 	
 	context = {
-		'sandwiches_list': sandwiches_list,
-		'drinks_list': drinks_list,
-		'side_dishes_list': side_dishes_list,
-		'combo_list': combo_list,
+		'menu': menu,
 		'order': order,
 		# 'type_products': PRODUCTS_TYPE
 	}
 	
-	return render(request, template, context)
+	return TemplateResponse(request, template, context)
 
 
 def selection(request):
@@ -70,8 +74,11 @@ def selection(request):
 	product_type = request.POST['product_type']
 	decision = request.POST['decision']
 	
-	if product_type == 'sandwich':
-		selecting_sandwich(request, product_id)
+	try:
+		if product_type == 'sandwich':
+			selecting_sandwich(request, product_id)
+	except CartFull:
+		return HttpResponseBadRequest("El carrito está lleno.")
 
 	return HttpResponseRedirect(reverse('sandwichesweb:client', args=()))
 
@@ -82,27 +89,27 @@ def selection(request):
 # 	# else:
 #
 # 	if decision == 1:
-# 		order_list[len(order_list) - 1].number += 1
+# 		request.cart.new_order(request.cart.lines[-1]['number'] + 1)
 
 
 def selecting_sandwich(request, sandwich_id):
-	sandwich = Sandwich.objects.get(pk=sandwich_id)
-	cheese = Ingredient.objects.filter(
-		name__exact='Queso'.capitalize(),
-		is_activated=True
-	).get()
-	
-	order = order_list[len(order_list) - 1]
-	order.sub_total = sandwich.price + cheese.price
+	prices = get_price_index()
+	sandwich = prices.get(SANDWICH, sandwich_id)
+	cheese = prices.get_by_name(INGREDIENT, 'Queso')
+	if sandwich is None or cheese is None:
+		raise Http404("El sándwich no está disponible.")
 	
-	additional_ingredient = Addition(ingredient=cheese, sandwich=sandwich, order=order)
-	add_ing.append(additional_ingredient)
+	additions = [{'ingredient_id': cheese.id, 'sandwich_id': sandwich.id}]
+	request.cart.update_current(
+		sub_total=get_pricing_rules().base_price({'additions': additions}),
+		additions=additions,
+	)
 
 
 def client_view(request):
 	template = 'sandwichesweb/client.html'
 	
-	return render(request, template, {})
+	return TemplateResponse(request, template, {})
 
 
 def bill_view(request):
@@ -120,17 +127,25 @@ def bill_view(request):
 		second_surname_client=second_surname,
 	)
 	
-	bill = successful_purchase(bill)
-	billing(bill)
-	qops = QuantityOfProducts.objects.filter(bill=bill)
-	details = Detail.objects.filter(bill=bill)
+	cart = request.cart
+	# Las ofertas son las del momento de la compra, el mismo de la factura, aunque la compra espere en la cola.
+	orders, additions = cart.to_models(bill.date)
+	# Los pedidos sin productos no se guardan, así no usan números para retirar.
+	orders = [order for order, line in zip(orders, cart.lines) if not cart.line_is_empty(line)]
+	if not orders:
+		return HttpResponseRedirect(reverse('sandwichesweb:order', args=()))
+	
+	try:
+		bill = checkout(bill, orders, additions)
+	except CheckoutTimeout:
+		# La compra no se guardó y el carrito sigue igual: el cliente puede volver a intentarlo.
+		return HttpResponse("No se pudo procesar la compra. Intente de nuevo.", status=503)
 	
-	order_list.clear()
-	add_ing.clear()
+	cart.clear()
+	bills = request.session.get(BILLS_SESSION_KEY, [])
+	request.session[BILLS_SESSION_KEY] = [bill.id] + bills[:BILLS_IN_SESSION - 1]
 	
-	return HttpResponse("lo lograste: " +
-	                    "bill: " + str(bill.id)
-	                    )
+	return invoice_view(request, bill.id)
 	# return HttpResponse("Hola, nuevo cliente: " +
 	#                     "ci: " + str(ci) +
 	#                     "first_name: " + first_name +
@@ -139,93 +154,137 @@ def bill_view(request):
 	#                     "second_surname: " + second_surname)
 
 
-def billing(bill):
-	orders_bill = Order.objects.filter(purchase=bill.purchase)
-	
-	sandwiches_count = 0
-	drinks_count = 0
-	side_dishes_count = 0
-	combos_count = 0
-	for order in orders_bill:
-		detail = Detail(bill=bill)
-		
-		# Contando los sándwiches de ese pedido
-		additional_ings = Addition.objects.filter(order=order)
-		if additional_ings:
-			sandwiches_count += 1
-			detail.product = Product.ListProducts.SANDWICH.label
-			
-			n = 1
-			for ing in additional_ings:
-				if n == 1:
-					detail.ingredients += " "
-				else:
-					if n == additional_ings.count():
-						detail.ingredients += "y "
-					else:
-						detail.ingredients += ", "
-				detail.ingredients += ing.ingredient.name
-				n += 1
-				
-				if n == additional_ings.count():
-					detail.size = ing.sandwich.size
-		elif order.drink_id:
-			drinks_count += 1
-			drink = order.drink
-			
-			detail.product = Product.ListProducts.DRINK.label
-			detail.name = drink.name
-		elif order.side_dish_id:
-			side_dishes_count += 1
-			side_dish = order.side_dish
-			
-			detail.product = Product.ListProducts.SIDE_DISH.label
-			detail.name = side_dish.name
-		elif order.combo_id:
-			combos_count += 1
-			combo = order.combo
-			
-			detail.product = Product.ListProducts.COMBO.label
-			detail.name = combo.name
-		detail.price = order.sub_total
-		detail.save()
-	
-	# Cantidad por tipo de producto
-	if sandwiches_count:
-		qop = QuantityOfProducts(bill=bill)
-		qop.product = Product.ListProducts.SANDWICH.label
-		qop.quantity = sandwiches_count
-		qop.save()
-	if drinks_count:
-		qop = QuantityOfProducts(bill=bill)
-		qop.product = Product.ListProducts.DRINK.label
-		qop.quantity = drinks_count
-		qop.save()
-	if side_dishes_count:
-		qop = QuantityOfProducts(bill=bill)
-		qop.product = Product.ListProducts.SIDE_DISH.label
-		qop.quantity = side_dishes_count
-		qop.save()
-	if combos_count:
-		qop = QuantityOfProducts(bill=bill)
-		qop.product = Product.ListProducts.COMBO.label
-		qop.quantity = combos_count
-		qop.save()
-
-
-def successful_purchase(bill: Bill):
-	purchase = Purchase()
-	purchase.save()
-	
-	bill.total = 0
-	for order in order_list:
-		bill.total += order.sub_total
-		order.save()
-		
-	for ingredient in add_ing:  # guardando las
-		ingredient.save()
-	
-	bill.purchase = purchase
-	bill.save()
-	
-	return bill
+def invoice_view(request, bill_id):
+	"""Muestra el documento de una factura, generado al pagar, aunque la compra ya esté archivada. Solo lee esa fila,
+	y la muestra dentro de la página de la factura.
+	
+	La ven el personal y el cliente que hizo la compra, desde la misma sesión.
+	"""
+	if not request.user.is_staff and bill_id not in request.session.get(BILLS_SESSION_KEY, []):
+		raise Http404()
+	
+	document = find_invoice(bill_id)
+	if document is None:
+		raise Http404()
+	
+	# El documento se generó con los datos escapados (ver billing.render_invoice).
+	return TemplateResponse(request, INVOICE_PAGE_TEMPLATE, {'bill_id': bill_id, 'document': mark_safe(document)})
+
+
+def metrics_view(request):
+	if request.META.get('REMOTE_ADDR') not in get_setting('METRICS_ALLOWED_IPS'):
+		raise Http404()
+	
+	return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _report_day(value, default):
+	"""Convierte el parámetro de fecha (AAAA-MM-DD) de un reporte.
+	"""
+	if not value:
+		return default
+	try:
+		day = parse_date(value)
+	except ValueError:
+		day = None
+	if day is None:
+		raise ValueError(value)
+	return day
+
+
+def _sales_rows(queryset, period_field: str) -> list:
+	def period(value):
+		return (timezone.localtime(value) if isinstance(value, datetime) else value).isoformat()
+	
+	return [
+		{
+			period_field: period(row[period_field]),
+			'product': row['product'],
+			'name': row['name'],
+			'quantity': row['quantity'],
+			'total': str(row['total']),
+		}
+		for row in queryset.order_by(period_field, 'product', 'name').values(
+			period_field, 'product', 'name', 'quantity', 'total'
+		)
+	]
+
+
+@staff_member_required
+def daily_sales_view(request):
+	"""Ventas por día, tipo de producto y producto, entre las fechas ``from`` y ``to`` (por defecto, los últimos 30
+	días). Lee solo los acumulados de ``DailySales``.
+	"""
+	today = timezone.localdate()
+	try:
+		end = _report_day(request.GET.get('to'), today)
+		start = _report_day(request.GET.get('from'), end - timedelta(days=29))
+	except ValueError:
+		return HttpResponseBadRequest("Fecha inválida.")
+	
+	rows = _sales_rows(DailySales.objects.filter(day__range=(start, end)), 'day')
+	return JsonResponse({'from': start.isoformat(), 'to': end.isoformat(), 'sales': rows})
+
+
+@staff_member_required
+def hourly_sales_view(request):
+	"""Ventas por hora, tipo de producto y producto del día ``date`` (por defecto, hoy). Lee solo los acumulados de
+	``HourlySales``.
+	"""
+	try:
+		day = _report_day(request.GET.get('date'), timezone.localdate())
+	except ValueError:
+		return HttpResponseBadRequest("Fecha inválida.")
+	
+	# Compara la hora con dos momentos, en lugar de extraer el día de cada fila, así se usa el índice de ``period``.
+	rows = _sales_rows(HourlySales.objects.filter(
+		period__gte=timezone.make_aware(datetime.combine(day, time.min)),
+		period__lt=timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)),
+	), 'period')
+	return JsonResponse({'date': day.isoformat(), 'sales': rows})
+
+
+@staff_member_required
+def bill_lookup_view(request, bill_id):
+	"""Una factura, con sus detalles y cantidades, aunque la compra ya esté archivada.
+	"""
+	bill = find_bill(bill_id)
+	if bill is None:
+		raise Http404()
+	
+	return JsonResponse(bill)
+
+
+@staff_member_required
+def client_bills_view(request, ci):
+	"""Las últimas facturas de un cliente, en curso y archivadas.
+	"""
+	return JsonResponse({'ci': ci, 'bills': client_bills(ci)})
+
+
+@staff_member_required
+def export_bills_view(request):
+	"""Exporta las facturas del mes ``month`` (AAAA-MM, por defecto el mes en curso), o entre las fechas ``from`` y
+	``to``, con sus detalles y cantidades de productos, en formato ``csv`` (por defecto) o ``jsonl``. Incluye las
+	facturas de las compras archivadas.
+	
+	El archivo se envía por partes, a medida que se genera.
+	"""
+	export_format = request.GET.get('format', 'csv')
+	if export_format not in EXPORT_FORMATS:
+		return HttpResponseBadRequest("Formato inválido.")
+	
+	try:
+		if request.GET.get('from') or request.GET.get('to'):
+			end = _report_day(request.GET.get('to'), timezone.localdate())
+			start = _report_day(request.GET.get('from'), end.replace(day=1))
+		else:
+			start, end = month_range(request.GET.get('month') or timezone.localdate().strftime('%Y-%m'))
+	except ValueError:
+		return HttpResponseBadRequest("Fecha inválida.")
+	
+	content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson; charset=utf-8'
+	lines = export_lines(bills_between(start, end), export_format, archived=archived_between(start, end))
+	response = StreamingHttpResponse(lines, content_type=content_type)
+	response['Content-Disposition'] = 'attachment; filename="facturas_%s_%s.%s"' % (start, end, export_format)
+	return response